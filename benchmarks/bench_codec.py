@@ -0,0 +1,95 @@
+"""
+Compare the JSON codecs on realistic API payloads.
+
+The payloads are a devices() response of an inventory of several hundred devices
+and a devices_status() response, as decoded for every call, and a command body as encoded.
+"requests" is the previous path, response.json() on a requests.Response,
+which decodes the body to text before parsing it.
+
+    python benchmarks/bench_codec.py [devices]
+"""
+
+import json
+import sys
+import timeit
+
+import requests
+
+from switchbot_client.codec import STDLIB_CODEC, msgspec_codec, orjson_codec
+
+
+def devices_body(count: int) -> bytes:
+    devices = [
+        {
+            "deviceId": f"{i:012X}",
+            "deviceName": f"Meter {i}",
+            "deviceType": "Meter",
+            "enableCloudService": True,
+            "hubDeviceId": f"{i // 16:012X}",
+        }
+        for i in range(count)
+    ]
+    remotes = [
+        {
+            "deviceId": f"01-{i:09d}-{i:08d}",
+            "deviceName": f"Air Conditioner {i}",
+            "remoteType": "Air Conditioner",
+            "hubDeviceId": f"{i:012X}",
+        }
+        for i in range(count // 10)
+    ]
+    body = {"deviceList": devices, "infraredRemoteList": remotes}
+    return json.dumps({"statusCode": 100, "message": "success", "body": body}).encode("utf-8")
+
+
+STATUS_BODY = json.dumps(
+    {
+        "statusCode": 100,
+        "message": "success",
+        "body": {
+            "deviceId": "ABCDEF123456",
+            "deviceType": "Color Bulb",
+            "hubDeviceId": "123456ABCDEF",
+            "power": "on",
+            "brightness": 80,
+            "color": "255:128:0",
+            "colorTemperature": 4000,
+        },
+    }
+).encode("utf-8")
+
+COMMAND = {"command": "setColor", "parameter": "255:128:0", "commandType": "command"}
+
+
+def requests_response(content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["content-type"] = "application/json"
+    response._content = content  # pylint: disable=protected-access
+    return response
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    payloads = [(f"devices ({count})", devices_body(count), 200), ("status", STATUS_BODY, 20000)]
+    codecs = [STDLIB_CODEC]
+    for factory in (orjson_codec, msgspec_codec):
+        try:
+            codecs.append(factory())
+        except ImportError:
+            print(f"{factory.__name__[:-6]} is not installed")
+
+    for name, content, number in payloads:
+        response = requests_response(content)
+        elapsed = timeit.timeit(response.json, number=number)
+        print(f"decode {name:>14} {'requests':>8}: {elapsed * 1e6 / number:9.2f} us")
+        for codec in codecs:
+            elapsed = timeit.timeit(lambda c=codec, b=content: c.loads(b), number=number)
+            print(f"decode {name:>14} {codec.name:>8}: {elapsed * 1e6 / number:9.2f} us")
+    for codec in codecs:
+        elapsed = timeit.timeit(lambda c=codec: c.dumps(COMMAND), number=100000)
+        print(f"encode {'command':>14} {codec.name:>8}: {elapsed * 1e6 / 100000:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure the cost of turning a device list into device objects.
+
+"chain" finds the class of each device by comparing its type against every supported type
+in turn, as the factories did before the device registry, "registry" finds it with one lookup
+in DEVICE_REGISTRY. "create" is SwitchBotDeviceFactory, dispatch and construction,
+and "devices" a whole SwitchBotClient.devices() through SwitchBotFakeTransport.
+
+    python benchmarks/bench_device_factory.py [devices]
+"""
+
+import sys
+import timeit
+
+from switchbot_client import SwitchBotAPIClient, SwitchBotClient, SwitchBotFakeTransport
+from switchbot_client.devices import DEVICE_REGISTRY, SwitchBotDeviceFactory
+
+
+def inventory(count: int) -> dict:
+    physical = list(DEVICE_REGISTRY.physical_classes())
+    remote = list(DEVICE_REGISTRY.remote_classes())
+    devices = [
+        {
+            "deviceId": f"{i:012X}",
+            "deviceName": f"Device {i}",
+            "deviceType": physical[i % len(physical)],
+            "enableCloudService": True,
+            "hubDeviceId": "000000000000",
+        }
+        for i in range(count)
+    ]
+    remotes = [
+        {
+            "deviceId": f"01-{i:09d}-{i:08d}",
+            "deviceName": f"Remote {i}",
+            "remoteType": remote[i % len(remote)],
+            "hubDeviceId": "000000000000",
+        }
+        for i in range(count // 4)
+    ]
+    return {"deviceList": devices, "infraredRemoteList": remotes}
+
+
+def chain_class(api_object, physical, remote):
+    if "deviceType" in api_object:
+        for device_type, device_class in physical:
+            if api_object["deviceType"] == device_type:
+                return device_class
+        return None
+    for remote_type, device_class in remote:
+        if api_object["remoteType"] == remote_type:
+            return device_class
+    return None
+
+
+def registry_class(api_object):
+    if "deviceType" in api_object:
+        return DEVICE_REGISTRY.physical_class(api_object["deviceType"])
+    return DEVICE_REGISTRY.remote_class(api_object["remoteType"])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    body = inventory(count)
+    objects = body["deviceList"] + body["infraredRemoteList"]
+    transport = SwitchBotFakeTransport(
+        lambda method, url, data: (200, {"statusCode": 100, "message": "success", "body": body})
+    )
+    client = SwitchBotClient(api_client=SwitchBotAPIClient("token", "secret", transport=transport))
+    physical = list(DEVICE_REGISTRY.physical_classes().items())
+    remote = list(DEVICE_REGISTRY.remote_classes().items())
+
+    def devices():
+        client.invalidate_inventory()
+        return client.devices()
+
+    cases = [
+        ("chain", lambda: [chain_class(o, physical, remote) for o in objects]),
+        ("registry", lambda: [registry_class(o) for o in objects]),
+        ("create", lambda: [SwitchBotDeviceFactory.create(client, o) for o in objects]),
+        ("devices", devices),
+    ]
+    for name, function in cases:
+        elapsed = min(timeit.repeat(function, number=5, repeat=3)) / 5
+        print(f"{name:>9}: {elapsed * 1e3:8.2f} ms, {elapsed * 1e6 / len(objects):6.2f} us/device")
+
+
+if __name__ == "__main__":
+    main()
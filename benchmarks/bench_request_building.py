@@ -0,0 +1,67 @@
+"""
+Measure the CPU cost of building a request: the url, the signed headers and the body.
+
+"before" rebuilds every part on each call, as the client did before its request templates,
+"after" is the client, which keeps the static headers, a keyed HMAC, the URI prefix and the
+encoded payloads of commands without parameters in a template. "call" sends a whole
+devices_commands() through the in-process SwitchBotFakeTransport.
+
+    python benchmarks/bench_request_building.py [number]
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import sys
+import time
+import timeit
+
+from switchbot_client import SwitchBotAPIClient, SwitchBotFakeTransport
+from switchbot_client.constants import AppConstants
+
+TOKEN = "a" * 96
+SECRET_KEY = "b" * 32
+
+
+def build_before(client: SwitchBotAPIClient, endpoint: str, payload: dict):
+    uri = f"{client.api_host_domain}/{client.api_version}/{endpoint}"
+    nonce = ""
+    timestamp = int(round(time.time() * 1000))
+    string_to_sign = bytes(f"{client.token}{timestamp}{nonce}", "utf-8")
+    secret = bytes(client.secret_key, "utf-8")
+    sign = base64.b64encode(hmac.new(secret, msg=string_to_sign, digestmod=hashlib.sha256).digest())
+    headers = {
+        "content-type": "application/json",
+        "user-agent": f"switchbot-client/{AppConstants.VERSION}",
+        "Authorization": client.token,
+        "t": str(timestamp),
+        "sign": str(sign, "utf-8"),
+        "nonce": nonce,
+    }
+    return uri, headers, json.dumps(payload).encode("utf-8")
+
+
+def build_after(client: SwitchBotAPIClient, endpoint: str, command: str):
+    body = client._devices_commands_body(command)  # pylint: disable=protected-access
+    uri = client._uri(endpoint)  # pylint: disable=protected-access
+    headers = client._headers()  # pylint: disable=protected-access
+    return uri, headers, client._encode_payload(body)  # pylint: disable=protected-access
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    client = SwitchBotAPIClient(TOKEN, SECRET_KEY, transport=SwitchBotFakeTransport())
+    endpoint = "devices/ABCDEF123456/commands"
+    cases = [
+        ("before", lambda: build_before(client, endpoint, {"command": "turnOn"})),
+        ("after", lambda: build_after(client, endpoint, "turnOn")),
+        ("call", lambda: client.devices_commands("ABCDEF123456", "turnOn")),
+    ]
+    for name, function in cases:
+        elapsed = min(timeit.repeat(function, number=number, repeat=3))
+        print(f"{name:>7}: {elapsed * 1e6 / number:7.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare per-call connections against a pooled keep-alive session.
+
+A local HTTP server stands in for the SwitchBot API and counts accepted connections,
+so the amortised handshake cost is visible without network access.
+Over TLS to api.switch-bot.com the gap is considerably larger than on loopback.
+
+    python benchmarks/bench_session.py [calls]
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from switchbot_client import SwitchBotAPIClient
+
+BODY = json.dumps(
+    {
+        "statusCode": 100,
+        "message": "success",
+        "body": {"deviceId": "ABCDE", "deviceType": "Meter", "humidity": 50, "temperature": 25.0},
+    }
+).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with Handler.lock:
+            Handler.connections += 1
+
+    def do_GET(self):  # noqa: N802
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(client: SwitchBotAPIClient, calls: int):
+    Handler.connections = 0
+    start = time.perf_counter()
+    for _ in range(calls):
+        client.devices_status("ABCDE")
+    elapsed = time.perf_counter() - start
+    return elapsed, Handler.connections
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    domain = f"http://127.0.0.1:{server.server_address[1]}"
+
+    for name, keep_alive in [("per-call connection", False), ("pooled session", True)]:
+        with SwitchBotAPIClient(
+            "token", "secret", api_host_domain=domain, keep_alive=keep_alive
+        ) as c:
+            elapsed, connections = run(c, calls)
+        print(
+            f"{name:>20}: {calls} calls, {connections} connections, "
+            f"{elapsed * 1000 / calls:.3f} ms/call"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
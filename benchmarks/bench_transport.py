@@ -0,0 +1,53 @@
+"""
+Compare the bundled transports of SwitchBotAPIClient.
+
+The requests and urllib3 transports talk to a local SwitchBotSimulator,
+the fake transport answers in-process, so its time per call is the overhead
+of the client itself (signing, headers, retries, response parsing) without any network.
+
+    python benchmarks/bench_transport.py [calls]
+"""
+
+import sys
+import time
+
+from switchbot_client import (
+    DeviceType,
+    SwitchBotAPIClient,
+    SwitchBotFakeTransport,
+    SwitchBotRequestsTransport,
+    SwitchBotUrllib3Transport,
+)
+from switchbot_client.simulator import SwitchBotSimulator
+
+
+def run(client: SwitchBotAPIClient, calls: int):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(calls):
+        client.devices_status("ABCDE")
+    return time.perf_counter() - start, time.process_time() - cpu_start
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with SwitchBotSimulator(token="token", secret_key="secret") as simulator:
+        simulator.add_device(DeviceType.METER, device_id="ABCDE")
+        transports = [
+            ("requests", SwitchBotRequestsTransport()),
+            ("urllib3", SwitchBotUrllib3Transport()),
+            ("fake", SwitchBotFakeTransport()),
+        ]
+        for name, transport in transports:
+            with SwitchBotAPIClient(
+                "token", "secret", api_host_domain=simulator.url, transport=transport
+            ) as c:
+                elapsed, cpu = run(c, calls)
+            print(
+                f"{name:>10}: {elapsed * 1e6 / calls:8.1f} us/call, "
+                f"{cpu * 1e6 / calls:8.1f} us CPU/call (client and server)"
+            )
+
+
+if __name__ == "__main__":
+    main()
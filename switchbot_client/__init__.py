@@ -1,6 +1,44 @@
 from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
+from switchbot_client.cassette import (
+    SwitchBotCassette,
+    SwitchBotRecordingSession,
+    SwitchBotReplaySession,
+    SwitchBotReplayStats,
+)
 from switchbot_client.client import SwitchBotClient
+from switchbot_client.coalesce import SwitchBotCommandCoalescer
+from switchbot_client.codec import SwitchBotJSONCodec
+from switchbot_client.dispatch import SwitchBotDispatchStats, SwitchBotIRDispatcher
+from switchbot_client.durable import SwitchBotCommandQueue, SwitchBotQueueHandle
 from switchbot_client.enums import ControlCommand, DeviceType, RemoteType
+from switchbot_client.exceptions import (
+    SwitchBotAPIError,
+    SwitchBotClientError,
+    SwitchBotDeadLetterError,
+    SwitchBotQueueClosedError,
+    SwitchBotQueueWriteError,
+    SwitchBotRateLimitError,
+)
+from switchbot_client.ratelimit import SwitchBotRateLimiter
+from switchbot_client.retry import SwitchBotRetryPolicy
+from switchbot_client.schedule import (
+    SwitchBotSchedule,
+    SwitchBotScheduleEngine,
+    SwitchBotScheduleStats,
+)
+from switchbot_client.scheduler import (
+    SwitchBotPriority,
+    SwitchBotRequestScheduler,
+    SwitchBotSchedulerStats,
+    request_priority,
+)
+from switchbot_client.transport import (
+    SwitchBotFakeTransport,
+    SwitchBotHTTPResponse,
+    SwitchBotRequestsTransport,
+    SwitchBotTransport,
+    SwitchBotUrllib3Transport,
+)
 
 __all__ = [
     "SwitchBotClient",
@@ -9,4 +47,34 @@ __all__ = [
     "DeviceType",
     "RemoteType",
     "ControlCommand",
+    "SwitchBotClientError",
+    "SwitchBotRateLimitError",
+    "SwitchBotRateLimiter",
+    "SwitchBotAPIError",
+    "SwitchBotRetryPolicy",
+    "SwitchBotCommandCoalescer",
+    "SwitchBotIRDispatcher",
+    "SwitchBotDispatchStats",
+    "SwitchBotRequestScheduler",
+    "SwitchBotSchedulerStats",
+    "SwitchBotPriority",
+    "request_priority",
+    "SwitchBotCommandQueue",
+    "SwitchBotQueueHandle",
+    "SwitchBotDeadLetterError",
+    "SwitchBotQueueWriteError",
+    "SwitchBotQueueClosedError",
+    "SwitchBotScheduleEngine",
+    "SwitchBotSchedule",
+    "SwitchBotScheduleStats",
+    "SwitchBotCassette",
+    "SwitchBotRecordingSession",
+    "SwitchBotReplaySession",
+    "SwitchBotReplayStats",
+    "SwitchBotTransport",
+    "SwitchBotHTTPResponse",
+    "SwitchBotRequestsTransport",
+    "SwitchBotUrllib3Transport",
+    "SwitchBotFakeTransport",
+    "SwitchBotJSONCodec",
 ]
@@ -0,0 +1,8 @@
+from .api import *  # noqa
+from .client import *  # noqa
+from .coalesce import *  # noqa
+from .devices import *  # noqa
+from .dispatch import *  # noqa
+from .scenes import *  # noqa
+from .scheduler import *  # noqa
+from .transport import *  # noqa
@@ -0,0 +1,234 @@
+import asyncio
+from typing import List, Optional
+
+from switchbot_client.aio.scheduler import AsyncSwitchBotRequestScheduler
+from switchbot_client.aio.transport import (
+    AsyncSwitchBotAiohttpTransport,
+    AsyncSwitchBotTransport,
+)
+from switchbot_client.api import Payload, SwitchBotAPIClientBase, SwitchBotAPIResponse
+from switchbot_client.codec import SwitchBotJSONCodec
+from switchbot_client.exceptions import SwitchBotAPIError
+from switchbot_client.ratelimit import SwitchBotRateLimiter
+from switchbot_client.retry import SwitchBotRetryPolicy
+from switchbot_client.scheduler import SwitchBotPriority
+from switchbot_client.singleflight import AsyncSingleFlight
+from switchbot_client.transport import SwitchBotHTTPResponse
+
+try:
+    import aiohttp
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "switchbot_client.aio requires aiohttp. "
+        "Install it with `pip install switchbot-client[aio]`."
+    ) from e
+
+
+class AsyncSwitchBotAPIClient(SwitchBotAPIClientBase):
+    """
+    An asyncio version of SwitchBotAPIClient.
+    All endpoint methods are coroutines and share one pooled aiohttp session.
+    https://github.com/OpenWonderLabs/SwitchBotAPI
+    """
+
+    scheduler: Optional[AsyncSwitchBotRequestScheduler]
+
+    def __init__(
+        self,
+        token: str = None,
+        secret_key: str = None,
+        api_host_domain: str = None,
+        config_file_path: str = None,
+        pool_size: int = SwitchBotAPIClientBase.DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        connect_timeout: float = SwitchBotAPIClientBase.DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = SwitchBotAPIClientBase.DEFAULT_READ_TIMEOUT,
+        session: aiohttp.ClientSession = None,
+        rate_limiter: SwitchBotRateLimiter = None,
+        retry_policy: SwitchBotRetryPolicy = None,
+        scheduler: AsyncSwitchBotRequestScheduler = None,
+        transport: AsyncSwitchBotTransport = None,
+        codec: SwitchBotJSONCodec = None,
+    ) -> None:
+        """
+        pool_size: maximum number of connections kept open to api_host_domain
+        keep_alive: reuse connections between requests, set False to close them after each call
+        connect_timeout, read_timeout: timeouts in seconds applied to every request
+        session: an aiohttp.ClientSession to share with other clients instead of creating a new one
+        rate_limiter: limits the request rate and the daily number of requests of every endpoint
+        retry_policy: retries transient failures, by default reads are retried up to 3 times
+        scheduler: limits the requests in flight and serves interactive requests before
+            background ones, see AsyncSwitchBotRequestScheduler
+        transport: sends the signed requests, by default an AsyncSwitchBotAiohttpTransport
+            built from session, pool_size, keep_alive and the timeouts
+        codec: encodes request and decodes response bodies, as for SwitchBotAPIClient
+
+        The session is created lazily on first use, so the client can be constructed
+        outside of a running event loop.
+        Concurrent identical GET requests share one HTTP request and its SwitchBotAPIResponse,
+        see the counters of single_flight.
+        """
+        super().__init__(
+            token,
+            secret_key,
+            api_host_domain,
+            config_file_path,
+            rate_limiter,
+            retry_policy,
+            scheduler,
+            codec,
+        )
+        if transport is not None:
+            self.transport = transport
+        else:
+            self.transport = AsyncSwitchBotAiohttpTransport(
+                session, pool_size, keep_alive, connect_timeout, read_timeout
+            )
+        self.single_flight = AsyncSingleFlight()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The aiohttp.ClientSession of the default transport.
+        """
+        if not isinstance(self.transport, AsyncSwitchBotAiohttpTransport):
+            raise RuntimeError("the transport of this client does not use an aiohttp session")
+        return self.transport.session
+
+    async def devices(self) -> SwitchBotAPIResponse:
+        return await self._get("devices")
+
+    async def devices_status(self, device_id: str) -> SwitchBotAPIResponse:
+        formatted_response = await self._get(f"devices/{device_id}/status")
+        self._check_devices_status_response(formatted_response)
+        return formatted_response
+
+    async def devices_commands(
+        self,
+        device_id: str,
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> SwitchBotAPIResponse:
+        payload = self._devices_commands_body(command, parameter, command_type)
+        return await self._post(f"devices/{device_id}/commands", payload)
+
+    async def scenes(self) -> SwitchBotAPIResponse:
+        return await self._get("scenes")
+
+    async def scenes_execute(self, scene_id: str) -> SwitchBotAPIResponse:
+        return await self._post(f"scenes/{scene_id}/execute")
+
+    async def webhook_setup(self, url: str) -> SwitchBotAPIResponse:
+        payload = {
+            "action": "setupWebhook",
+            "url": url,
+            "deviceList": "ALL",
+        }
+        return await self._post("webhook/setupWebhook", payload)
+
+    async def webhook_query_url(self) -> SwitchBotAPIResponse:
+        payload = {
+            "action": "queryUrl",
+        }
+        return await self._post("webhook/queryWebhook", payload, idempotent=True)
+
+    async def webhook_query_details(self, urls: List[str]) -> SwitchBotAPIResponse:
+        payload = {"action": "queryDetails", "urls": urls}
+        return await self._post("webhook/queryWebhook", payload, idempotent=True)
+
+    async def webhook_update(self, config: dict) -> SwitchBotAPIResponse:
+        payload = {"action": "updateWebhook", "config": config}
+        return await self._post("webhook/updateWebhook", payload)
+
+    async def webhook_delete(self, url: str) -> SwitchBotAPIResponse:
+        payload = {"action": "deleteWebhook", "url": url}
+        return await self._post("webhook/deleteWebhook", payload)
+
+    async def prewarm(self):
+        """
+        Open a pooled connection to api_host_domain ahead of the first API call.
+        """
+        await self.transport.prewarm(self.api_host_domain)
+
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _get(self, endpoint: str) -> SwitchBotAPIResponse:
+        return await self.single_flight.do(
+            endpoint, lambda: self._request("GET", endpoint, idempotent=True)
+        )
+
+    async def _post(
+        self, endpoint: str, payload: Payload = None, idempotent: bool = False
+    ) -> SwitchBotAPIResponse:
+        return await self._request("POST", endpoint, payload, idempotent)
+
+    async def _request(
+        self, method: str, endpoint: str, payload: Payload = None, idempotent: bool = False
+    ) -> SwitchBotAPIResponse:
+        priority = self._request_priority(idempotent)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await self._send(method, endpoint, payload, priority)
+            except self.transport.retryable_errors as e:
+                delay = self.retry_policy.retry_delay(attempt, idempotent)
+                if delay is None:
+                    raise
+                self._log_retry(method, endpoint, attempt, delay, e)
+                await asyncio.sleep(delay)
+                continue
+
+            status = response.status_code
+            if self.retry_policy.is_retryable_http_status(status):
+                delay = self.retry_policy.retry_delay(attempt, idempotent)
+                if delay is None:
+                    raise SwitchBotAPIError(f"Http {status} Error", status, response.text)
+                self._log_retry(method, endpoint, attempt, delay, f"http {status}")
+                await asyncio.sleep(delay)
+                continue
+
+            formatted_response = self._check_api_response(response)
+            if self.retry_policy.is_retryable_api_status(formatted_response.status_code):
+                delay = self.retry_policy.retry_delay(attempt, idempotent)
+                if delay is not None:
+                    self._log_retry(
+                        method,
+                        endpoint,
+                        attempt,
+                        delay,
+                        f"statusCode {formatted_response.status_code}",
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+            return formatted_response
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Payload = None,
+        priority: SwitchBotPriority = SwitchBotPriority.INTERACTIVE,
+    ) -> SwitchBotHTTPResponse:
+        if self.scheduler is None:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            return await self._send_now(method, endpoint, payload)
+        # the scheduler takes the rate limiter token, in priority order
+        async with self.scheduler.slot(priority, self.rate_limiter):
+            return await self._send_now(method, endpoint, payload)
+
+    async def _send_now(
+        self, method: str, endpoint: str, payload: Payload = None
+    ) -> SwitchBotHTTPResponse:
+        return await self.transport.send(
+            method, self._uri(endpoint), self._headers(), self._encode_payload(payload)
+        )
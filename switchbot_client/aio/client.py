@@ -0,0 +1,420 @@
+# pylint: disable=protected-access
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from switchbot_client.aio.api import AsyncSwitchBotAPIClient
+from switchbot_client.aio.coalesce import AsyncSwitchBotCommandCoalescer
+from switchbot_client.aio.devices import AnyAsyncDevice, AsyncSwitchBotDeviceFactory
+from switchbot_client.aio.dispatch import AsyncSwitchBotIRDispatcher
+from switchbot_client.aio.scenes import AsyncSwitchBotScene
+from switchbot_client.api import SwitchBotAPIResponse
+from switchbot_client.bulk import (
+    SwitchBotBulkCommandResult,
+    SwitchBotCommandItemResult,
+    SwitchBotReconcileItemResult,
+    SwitchBotReconcileResult,
+    SwitchBotStatusResult,
+)
+from switchbot_client.cache import TTLCache
+from switchbot_client.client import SwitchBotClient
+from switchbot_client.devices.status import DeviceStatusMetadata
+from switchbot_client.webhooks.base import SwitchBotWebhook
+
+
+class AsyncSwitchBotClient:
+    """
+    An asyncio version of SwitchBotClient.
+    It returns wrapped objects whose API calling methods are awaitable.
+    """
+
+    def __init__(
+        self,
+        token: str = None,
+        secret_key: str = None,
+        api_host_domain: str = None,
+        config_file_path: str = None,
+        api_client: AsyncSwitchBotAPIClient = None,
+        inventory_ttl: float = SwitchBotClient.DEFAULT_INVENTORY_TTL,
+        inventory_refresh_ahead: float = SwitchBotClient.DEFAULT_INVENTORY_REFRESH_AHEAD,
+        status_ttl: float = SwitchBotClient.DEFAULT_STATUS_TTL,
+        skip_satisfied_commands: bool = False,
+        optimistic_updates: bool = False,
+        reconcile_delay: Optional[float] = SwitchBotClient.DEFAULT_RECONCILE_DELAY,
+        command_coalescer: AsyncSwitchBotCommandCoalescer = None,
+        ir_dispatcher: AsyncSwitchBotIRDispatcher = None,
+    ):
+        """
+        inventory_ttl: seconds the device list is cached for, 0 fetches it on every lookup
+        inventory_refresh_ahead: fraction of inventory_ttl after which the device list is
+            refreshed in the background while the cached one is still returned
+        status_ttl: seconds a device status is cached for, 0 calls the API on every status read.
+            Commands sent through a device object drop the cached status of the device.
+        skip_satisfied_commands: do not send turn_on, turn_off and setter commands when the
+            cached status or the pseudo status shows that the device is already in that state.
+            The number of skipped commands is counted in saved_calls.
+        optimistic_updates: apply successful commands of physical devices to their cached status
+            instead of dropping it, so that toggle() and reading a value back after setting it
+            do not call the API. See status_metadata() for whether a status is optimistic.
+        reconcile_delay: seconds after an optimistic update when the status is fetched again
+            in the background to correct the local state, None disables it
+        command_coalescer: holds setter commands for a short window and sends only the latest
+            one of a kind per device, see AsyncSwitchBotCommandCoalescer
+        ir_dispatcher: queues the commands of infrared remote devices per hub and sends them
+            a minimum interval apart, see AsyncSwitchBotIRDispatcher
+        """
+        if api_client is not None:
+            self.api_client = api_client
+        else:
+            self.api_client = AsyncSwitchBotAPIClient(
+                token, secret_key, api_host_domain, config_file_path
+            )
+        self.inventory_cache = TTLCache(inventory_ttl)
+        self.inventory_refresh_ahead = inventory_refresh_ahead
+        self._inventory_refresh: Optional[asyncio.Task] = None
+        self.status_cache = TTLCache(status_ttl)
+        self.skip_satisfied_commands = skip_satisfied_commands
+        self.saved_calls = 0
+        self.optimistic_updates = optimistic_updates
+        self.reconcile_delay = reconcile_delay
+        self._status_metadata: Dict[str, DeviceStatusMetadata] = {}
+        self._status_refreshes: Dict[str, asyncio.Task] = {}
+        self.command_coalescer = command_coalescer
+        self.ir_dispatcher = ir_dispatcher
+
+    async def inventory(self) -> dict:
+        """
+        The body of the devices endpoint, served from the inventory cache.
+        It is shared by devices(), device() and the create_by_id methods of the device classes.
+        """
+        body = self.inventory_cache.get(SwitchBotClient.INVENTORY_KEY)
+        if body is None:
+            return await self.refresh_inventory()
+        age = self.inventory_cache.age(SwitchBotClient.INVENTORY_KEY)
+        refresh_at = self.inventory_cache.ttl * self.inventory_refresh_ahead
+        if age is not None and age >= refresh_at and self._inventory_refresh is None:
+            self._inventory_refresh = asyncio.create_task(self._refresh_inventory_in_background())
+        return body
+
+    async def refresh_inventory(self) -> dict:
+        body = (await self.api_client.devices()).body
+        self.inventory_cache.set(SwitchBotClient.INVENTORY_KEY, body)
+        return body
+
+    def invalidate_inventory(self):
+        self.inventory_cache.invalidate(SwitchBotClient.INVENTORY_KEY)
+
+    def record_saved_call(self):
+        self.saved_calls += 1
+
+    def invalidate_status(self, device_id: str = None):
+        self.status_cache.invalidate(device_id)
+        if device_id is None:
+            self._status_metadata.clear()
+        else:
+            self._status_metadata.pop(device_id, None)
+
+    async def refresh_status(self, device_id: str) -> dict:
+        requested_at = time.monotonic()
+        raw_data = (await self.api_client.devices_status(device_id)).body
+        self._store_status(device_id, raw_data, requested_at)
+        return raw_data
+
+    def update_status(self, device_id: str, changes: dict):
+        """
+        Apply the values a successful command has set to the cached status of device_id.
+        It must be called from a running event loop, the status is fetched again
+        reconcile_delay seconds later in a task of that loop.
+        """
+        raw_data = self.status_cache.get(device_id)
+        metadata = self._status_metadata.get(device_id)
+        if raw_data is None or metadata is None:
+            self.invalidate_status(device_id)
+            return
+        self.status_cache.set(device_id, {**raw_data, **changes})
+        metadata.source = DeviceStatusMetadata.SOURCE_COMMAND
+        metadata.updated_at = time.monotonic()
+        if self.reconcile_delay is not None and device_id not in self._status_refreshes:
+            self._status_refreshes[device_id] = asyncio.create_task(
+                self._refresh_status_later(device_id, self.reconcile_delay)
+            )
+
+    def status_metadata(self, device_id: str) -> Optional[DeviceStatusMetadata]:
+        metadata = self._status_metadata.get(device_id)
+        if metadata is None or self.status_cache.get(device_id) is None:
+            return None
+        return dataclasses.replace(metadata)
+
+    async def devices(self) -> List[AnyAsyncDevice]:
+        items = []
+        for device in SwitchBotClient._device_objects(await self.inventory()):
+            model = AsyncSwitchBotDeviceFactory.create(self, device)
+            if model:
+                items.append(model)
+        return items
+
+    async def device(self, device_id: str) -> Optional[AnyAsyncDevice]:
+        device = SwitchBotClient._find_device_object(await self.inventory(), device_id)
+        if device is None:
+            return None
+        return AsyncSwitchBotDeviceFactory.create(self, device)
+
+    async def statuses(
+        self,
+        devices: Iterable[Union[str, AnyAsyncDevice]],
+        concurrency: int = SwitchBotClient.DEFAULT_CONCURRENCY,
+        deadline: float = None,
+    ) -> AsyncIterator[SwitchBotStatusResult]:
+        """
+        The asyncio version of SwitchBotClient.statuses, used with `async for`.
+        """
+        end = None if deadline is None else time.monotonic() + deadline
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(device: Union[str, AnyAsyncDevice]) -> SwitchBotStatusResult:
+            async with semaphore:
+                return await self._status_result(device)
+
+        pending: Dict[asyncio.Future, str] = {}
+        try:
+            for device in devices:
+                device_id = device if isinstance(device, str) else device.device_id
+                pending[asyncio.ensure_future(fetch(device))] = device_id
+            while pending:
+                timeout = None if end is None else max(end - time.monotonic(), 0)
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for future in done:
+                    del pending[future]
+                    yield future.result()
+            for device_id in pending.values():
+                yield SwitchBotStatusResult(
+                    device_id, error=TimeoutError(f"no status within {deadline} seconds")
+                )
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def execute_many(
+        self,
+        commands: Iterable[Sequence],
+        concurrency: int = SwitchBotClient.DEFAULT_CONCURRENCY,
+        hub_interval: float = SwitchBotClient.DEFAULT_HUB_INTERVAL,
+    ) -> SwitchBotBulkCommandResult:
+        """
+        The asyncio version of SwitchBotClient.execute_many.
+        """
+        started = time.monotonic()
+        items = [await self._command_item(*command) for command in commands]
+        await self._execute_command_items(items, concurrency, hub_interval)
+        return SwitchBotBulkCommandResult(items, time.monotonic() - started)
+
+    async def reconcile(
+        self,
+        desired_states: Union[
+            Mapping[str, Dict[str, Any]],
+            Iterable[Tuple[Union[str, AnyAsyncDevice], Dict[str, Any]]],
+        ],
+        concurrency: int = SwitchBotClient.DEFAULT_CONCURRENCY,
+        hub_interval: float = SwitchBotClient.DEFAULT_HUB_INTERVAL,
+    ) -> SwitchBotReconcileResult:
+        """
+        The asyncio version of SwitchBotClient.reconcile.
+        """
+        started = time.monotonic()
+        if isinstance(desired_states, Mapping):
+            entries: Iterable = desired_states.items()
+        else:
+            entries = desired_states
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def plan(device: Union[str, AnyAsyncDevice], desired: Dict[str, Any]):
+            async with semaphore:
+                return await self._reconcile_item(device, desired)
+
+        items = await asyncio.gather(*[plan(device, desired) for device, desired in entries])
+        commands = [command for item in items for command in item.commands]
+        await self._execute_command_items(commands, concurrency, hub_interval)
+        return SwitchBotReconcileResult(list(items), time.monotonic() - started)
+
+    async def scenes(self) -> List[AsyncSwitchBotScene]:
+        response = (await self.api_client.scenes()).body
+        return [
+            AsyncSwitchBotScene(self, scene["sceneId"], scene["sceneName"])  # type: ignore
+            for scene in response
+        ]
+
+    async def scene(self, scene_id: str) -> Optional[AsyncSwitchBotScene]:
+        filtered = [s for s in await self.scenes() if s.scene_id == scene_id]
+        if len(filtered) > 1:
+            raise RuntimeError(f"duplicated scene ids found: {filtered}")
+        if len(filtered) == 0:
+            return None
+        return filtered[0]
+
+    async def webhooks(self) -> List[SwitchBotWebhook]:
+        response_urls = (await self.api_client.webhook_query_url()).body["urls"]
+        response = (await self.api_client.webhook_query_details(response_urls)).body
+        return [SwitchBotWebhook.create_by_api_object(r) for r in response]
+
+    async def create_webhook(self, url: str) -> SwitchBotAPIResponse:
+        return await self.api_client.webhook_setup(url)
+
+    async def set_webhook(self, url: str, enable: bool) -> SwitchBotAPIResponse:
+        config = {
+            "url": url,
+            "enable": enable,
+        }
+        return await self.api_client.webhook_update(config)
+
+    async def delete_webhook(self, url: str) -> SwitchBotAPIResponse:
+        return await self.api_client.webhook_delete(url)
+
+    async def close(self):
+        if self._inventory_refresh is not None:
+            self._inventory_refresh.cancel()
+        for task in self._status_refreshes.values():
+            task.cancel()
+        if self.command_coalescer is not None:
+            await self.command_coalescer.flush()
+        if self.ir_dispatcher is not None:
+            await self.ir_dispatcher.close()
+        await self.api_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _status_result(self, device: Union[str, AnyAsyncDevice]) -> SwitchBotStatusResult:
+        if isinstance(device, str):
+            result = SwitchBotStatusResult(device)
+        else:
+            result = SwitchBotStatusResult(device.device_id, device)
+        try:
+            if result.device is None:
+                result.device = await self.device(result.device_id)
+            if result.device is None:
+                raise RuntimeError(f"device not found: {result.device_id}")
+            result.status = await result.device.status()  # type: ignore[misc]
+        except Exception as e:  # pylint: disable=broad-except
+            result.error = e
+        return result
+
+    async def _command_item(
+        self,
+        device: Union[str, AnyAsyncDevice],
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> SwitchBotCommandItemResult:
+        if isinstance(device, str):
+            item = SwitchBotCommandItemResult(device, command, parameter, command_type)
+            try:
+                item.device = await self.device(device)
+                if item.device is None:
+                    raise RuntimeError(f"device not found: {device}")
+            except Exception as e:  # pylint: disable=broad-except
+                item.error = e
+            return item
+        return SwitchBotCommandItemResult(
+            device.device_id, command, parameter, command_type, device
+        )
+
+    async def _reconcile_item(
+        self, device: Union[str, AnyAsyncDevice], desired: Dict[str, Any]
+    ) -> SwitchBotReconcileItemResult:
+        if isinstance(device, str):
+            item = SwitchBotReconcileItemResult(device)
+        else:
+            item = SwitchBotReconcileItemResult(device.device_id, device)
+        try:
+            if item.device is None:
+                item.device = await self.device(item.device_id)
+            if item.device is None:
+                raise RuntimeError(f"device not found: {item.device_id}")
+            current = await item.device.status()  # type: ignore[misc]
+            item.changes = SwitchBotClient._state_changes(current, desired)
+            commands = item.device._reconcile_commands(
+                current, {key: value for key, (_, value) in item.changes.items()}
+            )
+            item.commands = [
+                SwitchBotCommandItemResult(item.device_id, command, parameter, None, item.device)
+                for command, parameter in commands
+            ]
+        except Exception as e:  # pylint: disable=broad-except
+            item.error = e
+        return item
+
+    async def _execute_command_items(
+        self, items: List[SwitchBotCommandItemResult], concurrency: int, hub_interval: float
+    ):
+        groups: Dict[str, List[SwitchBotCommandItemResult]] = {}
+        for item in items:
+            if item.error is None:
+                groups.setdefault(item.hub_key, []).append(item)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def execute(group: List[SwitchBotCommandItemResult]):
+            async with semaphore:
+                await self._execute_hub_commands(group, hub_interval)
+
+        await asyncio.gather(*[execute(group) for group in groups.values()])
+
+    @staticmethod
+    async def _execute_hub_commands(items: List[SwitchBotCommandItemResult], hub_interval: float):
+        for i, item in enumerate(items):
+            if i > 0 and hub_interval > 0:
+                await asyncio.sleep(hub_interval)
+            started = time.monotonic()
+            try:
+                item.result = await item.device.command(  # type: ignore
+                    item.command, item.parameter, item.command_type
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                item.error = e
+            item.elapsed = time.monotonic() - started
+
+    def _store_status(self, device_id: str, raw_data: dict, requested_at: float):
+        metadata = self._status_metadata.get(device_id)
+        if metadata is not None and metadata.updated_at > requested_at:
+            # a command was applied while the status was being fetched, keep the newer state
+            return
+        self.status_cache.set(device_id, raw_data)
+        now = time.monotonic()
+        self._status_metadata[device_id] = DeviceStatusMetadata(
+            DeviceStatusMetadata.SOURCE_API, now, now
+        )
+
+    async def _refresh_status_later(self, device_id: str, delay: float):
+        await asyncio.sleep(delay)
+        del self._status_refreshes[device_id]
+        try:
+            await self.refresh_status(device_id)
+        except Exception as e:  # pylint: disable=broad-except
+            logging.warning("failed to refresh the status of %s: %s", device_id, e)
+
+    async def _refresh_inventory_in_background(self):
+        try:
+            await self.refresh_inventory()
+        except Exception as e:  # pylint: disable=broad-except
+            logging.warning("failed to refresh the device list: %s", e)
+        finally:
+            self._inventory_refresh = None
@@ -0,0 +1,75 @@
+# pylint: disable=protected-access
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, FrozenSet
+
+from switchbot_client.coalesce import SwitchBotCommandCoalescerBase, _PendingCommand
+
+if TYPE_CHECKING:
+    from switchbot_client.devices.base import SwitchBotDevice
+
+
+class AsyncSwitchBotCommandCoalescer(SwitchBotCommandCoalescerBase):
+    """
+    The asyncio version of SwitchBotCommandCoalescer, used by AsyncSwitchBotClient.
+    Commands awaited in separate tasks are coalesced, each await returns once the
+    coalesced command has been sent.
+    """
+
+    def __init__(
+        self,
+        window: float = SwitchBotCommandCoalescerBase.DEFAULT_WINDOW,
+        debounce: bool = False,
+        max_delay: float = None,
+        commands: FrozenSet[str] = SwitchBotCommandCoalescerBase.DEFAULT_COMMANDS,
+    ) -> None:
+        super().__init__(window, debounce, max_delay, commands)
+        self._tasks: set = set()
+
+    def submit(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        pending, delay = self._add(device, command, parameter, command_type, future)
+        if delay is not None:
+            if pending.timer is not None:
+                pending.timer.cancel()
+            pending.timer = asyncio.get_running_loop().call_later(delay, self._send_later, pending)
+        return future
+
+    async def flush(self):
+        """
+        Send every pending command now and wait until they are sent.
+        """
+        pending_commands = [self._take(key) for key in list(self._pending)]
+        for pending in pending_commands:
+            if pending is not None:
+                if pending.timer is not None:
+                    pending.timer.cancel()
+                await self._send(pending)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _send_later(self, pending: _PendingCommand):
+        key = self._key(pending.device.device_id, pending.command, pending.command_type)
+        if self._pending.get(key) is not pending:
+            return
+        self._take(key)
+        task = asyncio.ensure_future(self._send(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, pending: _PendingCommand):
+        try:
+            result = await pending.device._send_command(  # type: ignore[misc]
+                pending.command, pending.parameter, pending.command_type
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            self._reject(pending, e)
+        else:
+            self._resolve(pending, result)
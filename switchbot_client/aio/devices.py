@@ -0,0 +1,644 @@
+# pylint: disable=invalid-overridden-method,too-many-ancestors
+from __future__ import annotations
+
+import asyncio
+from abc import abstractmethod
+from contextlib import asynccontextmanager
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Type,
+    Union,
+)
+
+from switchbot_client.devices import (
+    DVD,
+    TV,
+    AirConditioner,
+    AirPurifier,
+    AnyDeviceStatus,
+    AnyRemoteDeviceStatus,
+    Bot,
+    Camera,
+    ColorBulb,
+    ContactSensor,
+    Curtain,
+    Fan,
+    Hub,
+    HubMini,
+    HubPlus,
+    Humidifier,
+    IndoorCam,
+    IPTVStreamer,
+    Light,
+    Lock,
+    Meter,
+    MeterPlus,
+    MotionSensor,
+    Others,
+    Plug,
+    PlugMiniJp,
+    PlugMiniUs,
+    Projector,
+    Remote,
+    RobotVacuumCleanerS1,
+    RobotVacuumCleanerS1Plus,
+    SetTopBox,
+    SmartFan,
+    Speaker,
+    StripLight,
+    SwitchBotCommandResult,
+    SwitchBotDevice,
+    SwitchBotPhysicalControllableDevice,
+    SwitchBotPhysicalDevice,
+    SwitchBotRemoteDevice,
+    VacuumCleaner,
+    WaterHeater,
+)
+from switchbot_client.devices.physical import _status_snapshots
+from switchbot_client.devices.registry import (
+    ASYNC_ENTRY_POINT_GROUP,
+    DEVICE_REGISTRY,
+    SwitchBotDeviceRegistry,
+)
+from switchbot_client.dispatch import SwitchBotIRDispatcherBase
+from switchbot_client.enums import ControlCommand
+from switchbot_client.types import APIPhysicalDeviceObject, APIRemoteDeviceObject
+
+if TYPE_CHECKING:
+    from switchbot_client.aio import AsyncSwitchBotAPIClient, AsyncSwitchBotClient
+
+
+async def _resolved(result: SwitchBotCommandResult) -> SwitchBotCommandResult:
+    """
+    Wraps a result which is not sent to the API, such as a skipped command,
+    so that it can be awaited like the results of the command methods.
+    """
+    return result
+
+
+class AsyncSwitchBotPhysicalDevice(SwitchBotPhysicalDevice[AnyDeviceStatus]):
+    """
+    Base class of the awaitable physical devices.
+    Command methods inherited from the synchronous classes return coroutines,
+    and status parsing is shared with them through _parse_status.
+    """
+
+    def __init__(self, client: AsyncSwitchBotClient, device: APIPhysicalDeviceObject):
+        super().__init__(client, device)  # type: ignore[arg-type]
+
+    @property
+    def api_client(self) -> AsyncSwitchBotAPIClient:
+        return self.client.api_client  # type: ignore[return-value]
+
+    @classmethod
+    async def create_by_id(cls, client: AsyncSwitchBotClient, device_id: str):
+        if client is None:
+            raise TypeError
+        if device_id is None:
+            raise TypeError
+        for device in (await client.inventory())["deviceList"]:
+            if device["deviceId"] == device_id:
+                return cls(client, device)
+        raise RuntimeError(f"device not found: {device_id}")
+
+    async def command(
+        self, command: str, parameter: str = None, command_type: str = None
+    ) -> SwitchBotCommandResult:
+        coalescer = self.client.command_coalescer
+        if coalescer is not None and coalescer.accepts(command):
+            return await coalescer.submit(self, command, parameter, command_type)
+        return await self._send_command(command, parameter, command_type)
+
+    async def _send_command(
+        self, command: str, parameter: Optional[str], command_type: Optional[str]
+    ) -> SwitchBotCommandResult:
+        response = await self.api_client.devices_commands(
+            self.device_id, command, parameter, command_type
+        )
+        result = SwitchBotCommandResult(response.status_code, response.message, response.body)
+        self._after_command(command, parameter, result)
+        return result
+
+    def _skipped_result(self, result: SwitchBotCommandResult):
+        return _resolved(result)
+
+    async def status(self, max_age: float = None) -> AnyDeviceStatus:
+        raw_data = self._snapshot_status()
+        if raw_data is None:
+            raw_data = await self._fetch_status(max_age)
+        return self._parse_status(raw_data)
+
+    @asynccontextmanager
+    async def snapshot(self, max_age: float = None) -> AsyncIterator[AnyDeviceStatus]:
+        raw_data = await self._fetch_status(max_age)
+        token = self._enter_snapshot(raw_data)
+        try:
+            yield self._parse_status(raw_data)
+        finally:
+            _status_snapshots.reset(token)
+
+    async def read(self, fields: Iterable[str], max_age: float = None) -> Dict[str, Any]:
+        status = await self.status(max_age)
+        return {field: getattr(status, field) for field in fields}
+
+    async def _fetch_status(self, max_age: float = None) -> dict:
+        raw_data = self.client.status_cache.get(self.device_id, max_age)
+        if raw_data is None:
+            raw_data = await self.client.refresh_status(self.device_id)  # type: ignore[misc]
+        return raw_data
+
+
+class AsyncSwitchBotPhysicalControllableDevice(
+    AsyncSwitchBotPhysicalDevice[AnyDeviceStatus],
+    SwitchBotPhysicalControllableDevice[AnyDeviceStatus],
+):
+    async def toggle(self) -> SwitchBotCommandResult:
+        if await self.is_turned_on():
+            return await self.turn_off()
+        return await self.turn_on()
+
+    @abstractmethod
+    async def is_turned_on(self) -> bool:
+        pass
+
+
+class AsyncHub(AsyncSwitchBotPhysicalDevice, Hub):
+    pass
+
+
+class AsyncHubMini(AsyncSwitchBotPhysicalDevice, HubMini):
+    pass
+
+
+class AsyncHubPlus(AsyncSwitchBotPhysicalDevice, HubPlus):
+    pass
+
+
+class AsyncBot(AsyncSwitchBotPhysicalControllableDevice, Bot):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+
+class AsyncPlug(AsyncSwitchBotPhysicalControllableDevice, Plug):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+
+class AsyncPlugMiniUs(AsyncSwitchBotPhysicalControllableDevice, PlugMiniUs):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+    async def voltage(self) -> int:
+        return (await self.status()).voltage
+
+    async def weight(self) -> int:
+        return (await self.status()).weight
+
+    async def electricity_of_day(self) -> int:
+        return (await self.status()).electricity_of_day
+
+    async def electric_current(self) -> int:
+        return (await self.status()).electric_current
+
+    async def toggle(self) -> SwitchBotCommandResult:
+        return await self.command(ControlCommand.PlugMiniUs.TOGGLE)
+
+
+class AsyncPlugMiniJp(AsyncSwitchBotPhysicalControllableDevice, PlugMiniJp):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+    async def voltage(self) -> int:
+        return (await self.status()).voltage
+
+    async def weight(self) -> int:
+        return (await self.status()).weight
+
+    async def electricity_of_day(self) -> int:
+        return (await self.status()).electricity_of_day
+
+    async def electric_current(self) -> int:
+        return (await self.status()).electric_current
+
+    async def toggle(self) -> SwitchBotCommandResult:
+        return await self.command(ControlCommand.PlugMiniJp.TOGGLE)
+
+
+class AsyncCurtain(AsyncSwitchBotPhysicalControllableDevice, Curtain):
+    async def slide_position(self) -> int:
+        return (await self.status()).slide_position
+
+    async def is_calibrated(self) -> bool:
+        return (await self.status()).is_calibrated
+
+    async def is_grouped(self) -> bool:
+        return (await self.status()).is_grouped
+
+    async def is_moving(self) -> bool:
+        return (await self.status()).is_moving
+
+    async def is_turned_on(self) -> bool:
+        return (await self.status()).slide_position != 0
+
+
+class AsyncMeter(AsyncSwitchBotPhysicalDevice, Meter):
+    async def temperature(self) -> float:
+        return (await self.status()).temperature
+
+    async def humidity(self) -> int:
+        return (await self.status()).humidity
+
+
+class AsyncMeterPlus(AsyncSwitchBotPhysicalDevice, MeterPlus):
+    async def temperature(self) -> float:
+        return (await self.status()).temperature
+
+    async def humidity(self) -> int:
+        return (await self.status()).humidity
+
+
+class AsyncMotionSensor(AsyncSwitchBotPhysicalDevice, MotionSensor):
+    async def brightness(self) -> str:
+        return (await self.status()).brightness
+
+    async def is_move_detected(self) -> bool:
+        return (await self.status()).is_move_detected
+
+
+class AsyncContactSensor(AsyncSwitchBotPhysicalDevice, ContactSensor):
+    async def brightness(self) -> str:
+        return (await self.status()).brightness
+
+    async def open_state(self) -> str:
+        return (await self.status()).open_state
+
+    async def is_move_detected(self) -> bool:
+        return (await self.status()).is_move_detected
+
+
+class AsyncColorBulb(AsyncSwitchBotPhysicalControllableDevice, ColorBulb):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+    async def brightness(self) -> int:
+        return (await self.status()).brightness
+
+    async def color_hex(self) -> str:
+        """
+        returns #rrggbb format color string
+        """
+        return (await self.status()).color_hex
+
+    async def color_temperature(self) -> int:
+        return (await self.status()).color_temperature
+
+
+class AsyncHumidifier(AsyncSwitchBotPhysicalControllableDevice, Humidifier):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+    async def temperature(self) -> float:
+        return (await self.status()).temperature
+
+    async def humidity(self) -> int:
+        return (await self.status()).humidity
+
+    async def atomization_efficiency(self) -> int:
+        return (await self.status()).atomization_efficiency
+
+    async def is_auto(self) -> bool:
+        return (await self.status()).is_auto
+
+    async def is_child_lock(self) -> bool:
+        return (await self.status()).is_child_lock
+
+    async def is_muted(self) -> bool:
+        return not (await self.status()).is_muted
+
+    async def is_lack_water(self) -> bool:
+        return not (await self.status()).is_lack_water
+
+
+class AsyncSmartFan(AsyncSwitchBotPhysicalControllableDevice, SmartFan):
+    async def mode(self) -> int:
+        return (await self.status()).mode
+
+    async def speed(self) -> int:
+        return (await self.status()).speed
+
+    async def shake_center(self) -> int:
+        return (await self.status()).shake_center
+
+    async def shake_range(self) -> int:
+        return (await self.status()).shake_range
+
+    async def is_shaking(self) -> bool:
+        return (await self.status()).is_shaking
+
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+    async def set_fan_mode(self, fan_mode: int) -> SwitchBotCommandResult:
+        """
+        fan_mode(Parameters.FAN_MODE_XXX): 1 (Standard), 2 (Natural)
+        """
+        status = await self.status()
+        return await self.set_all_status("on", fan_mode, status.speed, status.shake_range)
+
+    async def set_fan_speed(self, fan_speed: int) -> SwitchBotCommandResult:
+        """
+        fan_speed: 1, 2, 3, 4
+        """
+        status = await self.status()
+        return await self.set_all_status("on", status.mode, fan_speed, status.shake_range)
+
+    async def set_shake_range(self, shake_range: int) -> SwitchBotCommandResult:
+        """
+        shake_range: 0 ~ 120
+        """
+        status = await self.status()
+        return await self.set_all_status("on", status.mode, status.speed, shake_range)
+
+
+class AsyncStripLight(AsyncSwitchBotPhysicalControllableDevice, StripLight):
+    async def power(self) -> str:
+        return (await self.status()).power
+
+    async def is_turned_on(self) -> bool:
+        return (await self.power()).lower() == "on"
+
+    async def brightness(self) -> int:
+        return (await self.status()).brightness
+
+    async def color_hex(self) -> str:
+        """
+        returns #rrggbb format color string
+        """
+        return (await self.status()).color_hex
+
+    async def toggle(self) -> SwitchBotCommandResult:
+        return await self.command(ControlCommand.StripLight.TOGGLE)
+
+
+class AsyncIndoorCam(AsyncSwitchBotPhysicalDevice, IndoorCam):
+    pass
+
+
+class AsyncRemote(AsyncSwitchBotPhysicalDevice, Remote):
+    pass
+
+
+class AsyncLock(AsyncSwitchBotPhysicalDevice, Lock):
+    async def is_calibrated(self) -> bool:
+        return (await self.status()).is_calibrated
+
+    async def lock_state(self) -> str:
+        return (await self.status()).lock_state
+
+    async def door_state(self) -> str:
+        return (await self.status()).door_state
+
+
+class AsyncRobotVacuumCleanerS1(AsyncSwitchBotPhysicalDevice, RobotVacuumCleanerS1):
+    async def working_status(self) -> str:
+        return (await self.status()).working_status
+
+    async def online_status(self) -> str:
+        return (await self.status()).online_status
+
+    async def battery(self) -> int:
+        return (await self.status()).battery
+
+
+class AsyncRobotVacuumCleanerS1Plus(AsyncRobotVacuumCleanerS1, RobotVacuumCleanerS1Plus):
+    pass
+
+
+class AsyncSwitchBotRemoteDevice(SwitchBotRemoteDevice[AnyRemoteDeviceStatus]):
+    """
+    Base class of the awaitable virtual infrared remote devices.
+    The pseudo status is shared with the synchronous classes.
+    """
+
+    def __init__(self, client: AsyncSwitchBotClient, device: APIRemoteDeviceObject):
+        super().__init__(client, device)  # type: ignore[call-arg,arg-type]
+
+    @property
+    def api_client(self) -> AsyncSwitchBotAPIClient:
+        return self.client.api_client  # type: ignore[return-value]
+
+    @classmethod
+    async def create_by_id(cls, client: AsyncSwitchBotClient, device_id: str):
+        if client is None:
+            raise TypeError
+        if device_id is None:
+            raise TypeError
+        for device in (await client.inventory())["infraredRemoteList"]:
+            if device["deviceId"] == device_id:
+                return cls(client, device)
+        raise RuntimeError(f"device not found: {device_id}")
+
+    async def command(
+        self, command: str, parameter: str = None, command_type: str = None
+    ) -> SwitchBotCommandResult:
+        coalescer = self.client.command_coalescer
+        if coalescer is not None and coalescer.accepts(command):
+            return await coalescer.submit(self, command, parameter, command_type)
+        return await self._send_command(command, parameter, command_type)
+
+    async def _send_command(
+        self, command: str, parameter: Optional[str], command_type: Optional[str]
+    ) -> SwitchBotCommandResult:
+        dispatcher = self.client.ir_dispatcher
+        if dispatcher is not None:
+            return await dispatcher.submit(self, command, parameter, command_type)
+        return await self._post_command(command, parameter, command_type)
+
+    async def _post_command(
+        self, command: str, parameter: Optional[str], command_type: Optional[str]
+    ) -> SwitchBotCommandResult:
+        response = await self.api_client.devices_commands(
+            self.device_id, command, parameter, command_type
+        )
+        result = SwitchBotCommandResult(response.status_code, response.message, response.body)
+        self._after_command(command, parameter, result)
+        return result
+
+    async def repeat(
+        self, command: str, times: int, parameter: str = None, command_type: str = None
+    ) -> List[SwitchBotCommandResult]:
+        dispatcher = self.client.ir_dispatcher
+        if dispatcher is not None:
+            futures: list = [
+                dispatcher.submit(self, command, parameter, command_type) for _ in range(times)
+            ]
+            return list(await asyncio.gather(*futures))
+        results = []
+        for i in range(times):
+            if i > 0:
+                await asyncio.sleep(SwitchBotIRDispatcherBase.DEFAULT_INTERVAL)
+            results.append(await self._post_command(command, parameter, command_type))
+        return results
+
+    async def turn_on(self) -> SwitchBotCommandResult:
+        skipped = self._skip_if_satisfied(self.pseudo_status.power == "on")
+        if skipped is not None:
+            return await skipped
+        return await self.command(ControlCommand.Common.TURN_ON)
+
+    async def turn_off(self) -> SwitchBotCommandResult:
+        skipped = self._skip_if_satisfied(self.pseudo_status.power == "off")
+        if skipped is not None:
+            return await skipped
+        return await self.command(ControlCommand.Common.TURN_OFF)
+
+    def _skipped_result(self, result: SwitchBotCommandResult):
+        return _resolved(result)
+
+    async def status(self) -> AnyRemoteDeviceStatus:
+        return self.pseudo_status
+
+
+class AsyncAirConditioner(AsyncSwitchBotRemoteDevice, AirConditioner):
+    pass
+
+
+class AsyncTV(AsyncSwitchBotRemoteDevice, TV):
+    pass
+
+
+class AsyncLight(AsyncSwitchBotRemoteDevice, Light):
+    pass
+
+
+class AsyncIPTVStreamer(AsyncSwitchBotRemoteDevice, IPTVStreamer):
+    pass
+
+
+class AsyncSetTopBox(AsyncSwitchBotRemoteDevice, SetTopBox):
+    pass
+
+
+class AsyncDVD(AsyncSwitchBotRemoteDevice, DVD):
+    pass
+
+
+class AsyncFan(AsyncSwitchBotRemoteDevice, Fan):
+    pass
+
+
+class AsyncProjector(AsyncSwitchBotRemoteDevice, Projector):
+    pass
+
+
+class AsyncCamera(AsyncSwitchBotRemoteDevice, Camera):
+    pass
+
+
+class AsyncAirPurifier(AsyncSwitchBotRemoteDevice, AirPurifier):
+    pass
+
+
+class AsyncSpeaker(AsyncSwitchBotRemoteDevice, Speaker):
+    pass
+
+
+class AsyncWaterHeater(AsyncSwitchBotRemoteDevice, WaterHeater):
+    pass
+
+
+class AsyncVacuumCleaner(AsyncSwitchBotRemoteDevice, VacuumCleaner):
+    pass
+
+
+class AsyncOthers(AsyncSwitchBotRemoteDevice, Others):
+    pass
+
+
+AnyAsyncDevice = Union[AsyncSwitchBotPhysicalDevice, AsyncSwitchBotRemoteDevice]
+
+ASYNC_DEVICE_CLASSES: Dict[Type[SwitchBotDevice], Type[AnyAsyncDevice]] = {
+    Hub: AsyncHub,
+    HubMini: AsyncHubMini,
+    HubPlus: AsyncHubPlus,
+    Bot: AsyncBot,
+    Plug: AsyncPlug,
+    PlugMiniUs: AsyncPlugMiniUs,
+    PlugMiniJp: AsyncPlugMiniJp,
+    Curtain: AsyncCurtain,
+    Meter: AsyncMeter,
+    MeterPlus: AsyncMeterPlus,
+    MotionSensor: AsyncMotionSensor,
+    ContactSensor: AsyncContactSensor,
+    ColorBulb: AsyncColorBulb,
+    Humidifier: AsyncHumidifier,
+    SmartFan: AsyncSmartFan,
+    StripLight: AsyncStripLight,
+    IndoorCam: AsyncIndoorCam,
+    Remote: AsyncRemote,
+    Lock: AsyncLock,
+    RobotVacuumCleanerS1: AsyncRobotVacuumCleanerS1,
+    RobotVacuumCleanerS1Plus: AsyncRobotVacuumCleanerS1Plus,
+    AirConditioner: AsyncAirConditioner,
+    TV: AsyncTV,
+    Light: AsyncLight,
+    IPTVStreamer: AsyncIPTVStreamer,
+    SetTopBox: AsyncSetTopBox,
+    DVD: AsyncDVD,
+    Fan: AsyncFan,
+    Projector: AsyncProjector,
+    Camera: AsyncCamera,
+    AirPurifier: AsyncAirPurifier,
+    Speaker: AsyncSpeaker,
+    WaterHeater: AsyncWaterHeater,
+    VacuumCleaner: AsyncVacuumCleaner,
+    Others: AsyncOthers,
+}
+
+
+ASYNC_DEVICE_REGISTRY = SwitchBotDeviceRegistry(ASYNC_ENTRY_POINT_GROUP)
+for _device_type, _device_class in DEVICE_REGISTRY.physical_classes().items():
+    if _device_class in ASYNC_DEVICE_CLASSES:
+        ASYNC_DEVICE_REGISTRY.register_physical(_device_type, ASYNC_DEVICE_CLASSES[_device_class])
+for _remote_type, _device_class in DEVICE_REGISTRY.remote_classes().items():
+    if _device_class in ASYNC_DEVICE_CLASSES:
+        ASYNC_DEVICE_REGISTRY.register_remote(_remote_type, ASYNC_DEVICE_CLASSES[_device_class])
+
+
+class AsyncSwitchBotDeviceFactory:
+    @staticmethod
+    def create(
+        client: AsyncSwitchBotClient,
+        api_object: Union[APIPhysicalDeviceObject, APIRemoteDeviceObject],
+    ) -> Optional[AnyAsyncDevice]:
+        """
+        Create the awaitable class registered in ASYNC_DEVICE_REGISTRY for the type of api_object.
+        """
+        return ASYNC_DEVICE_REGISTRY.create(client, api_object)  # type: ignore[return-value]
@@ -0,0 +1,71 @@
+# pylint: disable=protected-access
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Dict
+
+from switchbot_client.dispatch import (
+    SwitchBotIRDispatcherBase,
+    _HubState,
+    _QueuedCommand,
+)
+
+if TYPE_CHECKING:
+    from switchbot_client.devices.base import SwitchBotDevice
+
+
+class AsyncSwitchBotIRDispatcher(SwitchBotIRDispatcherBase):
+    """
+    The asyncio version of SwitchBotIRDispatcher, used by AsyncSwitchBotClient.
+    Each hub is served by a task of the running event loop, cancelled by close().
+    """
+
+    def __init__(self, interval: float = SwitchBotIRDispatcherBase.DEFAULT_INTERVAL) -> None:
+        super().__init__(interval)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    def submit(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        hub_id = self._hub_id(device)
+        hub_queue = self._queues.get(hub_id)
+        if hub_queue is None:
+            hub_queue = self._queues[hub_id] = asyncio.Queue()
+            self._hubs[hub_id] = _HubState()
+            self._workers[hub_id] = asyncio.create_task(self._work(hub_id, hub_queue))
+        self._hubs[hub_id].depth += 1
+        hub_queue.put_nowait(_QueuedCommand(device, command, parameter, command_type, future))
+        return future
+
+    async def close(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
+        self._queues.clear()
+
+    async def _work(self, hub_id: str, hub_queue: asyncio.Queue):
+        next_at = 0.0
+        while True:
+            item = await hub_queue.get()
+            wait = next_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._record(hub_id, item)
+            try:
+                result = await item.device._post_command(  # type: ignore[misc]
+                    item.command, item.parameter, item.command_type
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                if not item.future.done():
+                    item.future.set_exception(e)
+            else:
+                if not item.future.done():
+                    item.future.set_result(result)
+            next_at = time.monotonic() + self.interval
@@ -0,0 +1,14 @@
+# pylint: disable=invalid-overridden-method
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from switchbot_client.devices import SwitchBotCommandResult
+from switchbot_client.scenes import SwitchBotScene
+
+
+@dataclass(repr=False)
+class AsyncSwitchBotScene(SwitchBotScene):
+    async def execute(self) -> SwitchBotCommandResult:
+        response = await self.client.api_client.scenes_execute(self.scene_id)
+        return SwitchBotCommandResult(response.status_code, response.message, response.body)
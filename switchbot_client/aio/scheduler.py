@@ -0,0 +1,66 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from switchbot_client.ratelimit import SwitchBotRateLimiter
+from switchbot_client.scheduler import SwitchBotPriority, SwitchBotRequestSchedulerBase
+
+
+class AsyncSwitchBotRequestScheduler(SwitchBotRequestSchedulerBase):
+    """
+    The asyncio version of SwitchBotRequestScheduler, used by AsyncSwitchBotAPIClient.
+    """
+
+    @asynccontextmanager
+    async def slot(
+        self, priority: SwitchBotPriority, rate_limiter: SwitchBotRateLimiter = None
+    ) -> AsyncIterator[None]:
+        """
+        Take a token of rate_limiter, then wait for a free slot,
+        hold it while the block runs and pass it on to the next waiter.
+        """
+        self._check_budget(priority, rate_limiter)
+        if rate_limiter is not None:
+            await self._acquire_token(priority, rate_limiter)
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: SwitchBotPriority):
+        future = asyncio.get_running_loop().create_future()
+        waiter = self._enqueue(priority, future)
+        if waiter is None:
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            if waiter.granted:
+                self.release()
+            else:
+                self._cancel(waiter)
+            raise
+
+    def release(self):
+        for waiter in self._release_slot():
+            if not waiter.signal.done():
+                waiter.signal.set_result(None)
+
+    async def _acquire_token(self, priority: SwitchBotPriority, rate_limiter: SwitchBotRateLimiter):
+        waiter = self._queue_for_token(priority)
+        try:
+            while True:
+                if self._token_head() is not waiter:
+                    waiter.signal = asyncio.get_running_loop().create_future()
+                    await waiter.signal
+                    continue
+                wait = rate_limiter.try_acquire()
+                if wait <= 0:
+                    return
+                # a request of higher priority arriving meanwhile takes the next token
+                await asyncio.sleep(wait)
+        finally:
+            head = self._leave_token_queue(waiter)
+            if head is not None and head.signal is not None and not head.signal.done():
+                head.signal.set_result(None)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, Dict, Optional, Tuple, Type, Union
+
+from typing_extensions import Protocol
+
+from switchbot_client.transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    SwitchBotFakeTransport,
+    SwitchBotHTTPResponse,
+    SwitchBotRawResponse,
+)
+
+try:
+    import aiohttp
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "switchbot_client.aio requires aiohttp. "
+        "Install it with `pip install switchbot-client[aio]`."
+    ) from e
+
+__all__ = [
+    "AsyncSwitchBotTransport",
+    "AsyncSwitchBotAiohttpTransport",
+    "AsyncSwitchBotFakeTransport",
+]
+
+
+class AsyncSwitchBotTransport(Protocol):
+    """
+    The asyncio version of SwitchBotTransport, used by AsyncSwitchBotAPIClient.
+    """
+
+    retryable_errors: Tuple[Type[BaseException], ...]
+
+    async def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> SwitchBotHTTPResponse:
+        """
+        Send a request and return its response, raise an error if no response arrived.
+        """
+
+    async def prewarm(self, url: str):
+        """
+        Open a pooled connection to url ahead of the first request, errors are only logged.
+        """
+
+    async def close(self):
+        """
+        Close the pooled connections.
+        """
+
+
+class AsyncSwitchBotAiohttpTransport(AsyncSwitchBotTransport):
+    """
+    The default asyncio transport, a pooled aiohttp.ClientSession.
+    session: an aiohttp.ClientSession to share with other clients instead of creating a new one
+    pool_size, keep_alive, connect_timeout, read_timeout: as for SwitchBotRequestsTransport
+
+    The session is created lazily on first use, so the transport can be constructed
+    outside of a running event loop.
+    """
+
+    retryable_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ) -> None:
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self._session = session
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> SwitchBotRawResponse:
+        if method == "GET":
+            request = self.session.get(url, headers=headers)
+        else:
+            request = self.session.post(url, headers=headers, data=body)
+        async with request as response:
+            return SwitchBotRawResponse(response.status, response.headers, await response.read())
+
+    async def prewarm(self, url: str):
+        try:
+            async with self.session.head(url):
+                pass
+        except aiohttp.ClientError as e:
+            logging.warning("failed to prewarm connection to %s: %s", url, e)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class AsyncSwitchBotFakeTransport(AsyncSwitchBotTransport):
+    """
+    The asyncio version of SwitchBotFakeTransport, answering without any I/O.
+    """
+
+    retryable_errors: Tuple[Type[BaseException], ...] = ()
+
+    def __init__(
+        self,
+        handler: Callable[[str, str, Optional[bytes]], Tuple[int, Union[dict, bytes]]] = None,
+    ) -> None:
+        self._transport = SwitchBotFakeTransport(handler)
+
+    @property
+    def requests(self) -> int:
+        return self._transport.requests
+
+    async def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> SwitchBotRawResponse:
+        return self._transport.send(method, url, headers, body)
+
+    async def prewarm(self, url: str):
+        pass
+
+    async def close(self):
+        pass
@@ -1,16 +1,38 @@
 import base64
 import hashlib
 import hmac
-import json
+import logging
 import os
 import time
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 
 import requests
 import yaml
 
+from switchbot_client.codec import SwitchBotJSONCodec, default_codec
 from switchbot_client.constants import AppConstants
+from switchbot_client.exceptions import SwitchBotAPIError
+from switchbot_client.ratelimit import SwitchBotRateLimiter
+from switchbot_client.retry import SwitchBotRetryPolicy
+from switchbot_client.scheduler import (
+    SwitchBotPriority,
+    SwitchBotRequestScheduler,
+    SwitchBotRequestSchedulerBase,
+    current_request_priority,
+)
+from switchbot_client.singleflight import SingleFlight
+from switchbot_client.transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_TIMEOUT,
+    SwitchBotHTTPResponse,
+    SwitchBotRequestsTransport,
+    SwitchBotTransport,
+)
+
+# a JSON payload, or one already encoded by the codec of the client
+Payload = Union[dict, bytes]
 
 
 @dataclass
@@ -20,14 +42,40 @@ class SwitchBotAPIResponse:
     body: dict
 
 
-class SwitchBotAPIClient:
+class _RequestTemplate:
     """
-    A thin wrapper for SwitchBot API.
-    It returns almost raw API response.
-    https://github.com/OpenWonderLabs/SwitchBotAPI
+    The parts of every request which only change with the credentials, the host or the codec:
+    the static headers, an HMAC already keyed and fed with the token, which is copied to sign
+    a request, the URI prefix and the encoded payloads of commands without parameters.
+    """
+
+    MAX_COMMAND_BODIES = 256
+
+    def __init__(self, key: tuple, token: str, secret_key: str, uri_prefix: str) -> None:
+        self.key = key
+        self.uri_prefix = uri_prefix
+        self.headers = {
+            "content-type": "application/json",
+            "user-agent": f"switchbot-client/{AppConstants.VERSION}",
+            "Authorization": token,
+            "nonce": "",
+        }
+        self.signer = hmac.new(
+            secret_key.encode("utf-8"), token.encode("utf-8"), digestmod=hashlib.sha256
+        )
+        self.command_bodies: Dict[Tuple[str, Optional[str], Optional[str]], bytes] = {}
+
+
+class SwitchBotAPIClientBase:
+    """
+    Configuration, authentication and response handling shared by
+    SwitchBotAPIClient and its asyncio counterpart.
     """
 
     DEFAULT_CONFIG_FILE_PATH = "~/.config/switchbot-client/config.yml"
+    DEFAULT_POOL_SIZE = DEFAULT_POOL_SIZE
+    DEFAULT_CONNECT_TIMEOUT = DEFAULT_CONNECT_TIMEOUT
+    DEFAULT_READ_TIMEOUT = DEFAULT_READ_TIMEOUT
 
     def __init__(
         self,
@@ -35,8 +83,17 @@ class SwitchBotAPIClient:
         secret_key: str = None,
         api_host_domain: str = None,
         config_file_path: str = None,
+        rate_limiter: SwitchBotRateLimiter = None,
+        retry_policy: SwitchBotRetryPolicy = None,
+        scheduler: SwitchBotRequestSchedulerBase = None,
+        codec: SwitchBotJSONCodec = None,
     ) -> None:
         self.__config_file_path = config_file_path
+        self.codec = codec if codec is not None else default_codec()
+        self._request_template: Optional[_RequestTemplate] = None
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self.retry_policy = retry_policy if retry_policy is not None else SwitchBotRetryPolicy()
         self.api_version = "v1.1"
         config = self._load_config()
 
@@ -65,21 +122,202 @@ class SwitchBotAPIClient:
         else:
             self.api_host_domain = "https://api.switch-bot.com"
 
-    def devices(self) -> SwitchBotAPIResponse:
-        response: requests.Response = requests.get(self._uri("devices"), headers=self._headers())
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+    def config_file_path(self):
+        if self.__config_file_path is None:
+            return os.path.expanduser(SwitchBotAPIClientBase.DEFAULT_CONFIG_FILE_PATH)
+        return self.__config_file_path
 
-    def devices_status(self, device_id: str) -> SwitchBotAPIResponse:
-        response: requests.Response = requests.get(
-            self._uri(f"devices/{device_id}/status"), headers=self._headers()
+    def _template(self) -> _RequestTemplate:
+        """
+        Returns the request template, rebuilt only when the token, the secret key,
+        the host, the API version or the codec have been changed.
+        """
+        key = (self.token, self.secret_key, self.api_host_domain, self.api_version, self.codec)
+        template = self._request_template
+        if template is None or template.key != key:
+            template = self._request_template = _RequestTemplate(
+                key, self.token, self.secret_key, f"{self.api_host_domain}/{self.api_version}/"
+            )
+        return template
+
+    def _uri(self, endpoint: str):
+        return self._template().uri_prefix + endpoint
+
+    def _headers(self):
+        template = self._template()
+        return {**template.headers, **self._generate_auth_header(template)}
+
+    def _generate_auth_header(self, template: _RequestTemplate = None):
+        if template is None:
+            template = self._template()
+        timestamp = str(time.time_ns() // 1000000)
+        signer = template.signer.copy()
+        signer.update(timestamp.encode("ascii"))
+        return {
+            "Authorization": self.token,
+            "t": timestamp,
+            "sign": base64.b64encode(signer.digest()).decode("ascii"),
+            "nonce": "",
+        }
+
+    def _load_config(self):
+        config_file_path = self.config_file_path()
+        if os.path.exists(config_file_path):
+            with open(config_file_path, encoding="utf-8") as config_file:
+                return yaml.safe_load(config_file)
+        return None
+
+    @staticmethod
+    def _request_priority(idempotent: bool) -> SwitchBotPriority:
+        priority = current_request_priority()
+        if priority is not None:
+            return priority
+        return SwitchBotPriority.BACKGROUND if idempotent else SwitchBotPriority.INTERACTIVE
+
+    @staticmethod
+    def _log_retry(method: str, endpoint: str, attempt: int, delay: float, reason):
+        logging.info(
+            "retrying %s %s in %.2f seconds after attempt %d failed: %s",
+            method,
+            endpoint,
+            delay,
+            attempt,
+            reason,
         )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
+
+    @staticmethod
+    def _devices_commands_payload(
+        command: str, parameter: str = None, command_type: str = None
+    ) -> dict:
+        payload = {
+            "command": command,
+        }
+
+        if parameter is not None:
+            payload["parameter"] = parameter
+        if command_type is not None:
+            payload["command_type"] = command_type
+        return payload
+
+    def _devices_commands_body(
+        self, command: str, parameter: str = None, command_type: str = None
+    ) -> Payload:
+        """
+        Returns the payload of a command, commands without a parameter such as turnOn, turnOff
+        and press are encoded once and reused.
+        """
+        payload = self._devices_commands_payload(command, parameter, command_type)
+        if parameter not in (None, "default"):
+            return payload
+        bodies = self._template().command_bodies
+        key = (command, parameter, command_type)
+        body = bodies.get(key)
+        if body is None:
+            body = self.codec.dumps(payload)
+            if len(bodies) < _RequestTemplate.MAX_COMMAND_BODIES:
+                bodies[key] = body
+        return body
+
+    def _encode_payload(self, payload: Optional[Payload]) -> Optional[bytes]:
+        if payload is None or isinstance(payload, bytes):
+            return payload
+        return self.codec.dumps(payload)
+
+    def _check_api_response(self, original_response: SwitchBotHTTPResponse) -> SwitchBotAPIResponse:
+        response = self.codec.loads(original_response.content)
+        if "message" not in response:
+            raise RuntimeError("format error", original_response.text)
+        return self._check_api_response_body(response)
+
+    @staticmethod
+    def _check_api_response_body(response: dict) -> SwitchBotAPIResponse:
+        if response["message"] == "Unauthorized":
+            raise RuntimeError(
+                "Http 401 Error. User permission is denied due to invalid token.",
+                response,
+            )
+        return SwitchBotAPIResponse(response["statusCode"], response["message"], response["body"])
+
+    @staticmethod
+    def _check_devices_status_response(formatted_response: SwitchBotAPIResponse):
         if formatted_response.status_code == 190:
             raise RuntimeError(
                 "Wrong device ID or trying to get infrared virtual device status",
                 formatted_response,
             )
+
+
+class SwitchBotAPIClient(SwitchBotAPIClientBase):
+    """
+    A thin wrapper for SwitchBot API.
+    It returns almost raw API response.
+    https://github.com/OpenWonderLabs/SwitchBotAPI
+    """
+
+    scheduler: Optional[SwitchBotRequestScheduler]
+
+    def __init__(  # pylint: disable=too-many-locals
+        self,
+        token: str = None,
+        secret_key: str = None,
+        api_host_domain: str = None,
+        config_file_path: str = None,
+        pool_size: int = SwitchBotAPIClientBase.DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        connect_timeout: float = SwitchBotAPIClientBase.DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = SwitchBotAPIClientBase.DEFAULT_READ_TIMEOUT,
+        prewarm: bool = False,
+        session: requests.Session = None,
+        rate_limiter: SwitchBotRateLimiter = None,
+        retry_policy: SwitchBotRetryPolicy = None,
+        scheduler: SwitchBotRequestScheduler = None,
+        transport: SwitchBotTransport = None,
+        codec: SwitchBotJSONCodec = None,
+    ) -> None:
+        """
+        pool_size: maximum number of connections kept open to api_host_domain
+        keep_alive: reuse connections between requests, set False to close them after each call
+        connect_timeout, read_timeout: timeouts in seconds passed to every request
+        prewarm: open a connection to api_host_domain while constructing the client
+        session: a requests.Session to share with other clients instead of creating a new one
+        transport: sends the signed requests, by default a SwitchBotRequestsTransport built from
+            session, pool_size, keep_alive and the timeouts, see switchbot_client.transport
+        codec: encodes request and decodes response bodies, by default orjson or msgspec
+            when installed and the json module otherwise, see switchbot_client.codec
+        rate_limiter: limits the request rate and the daily number of requests of every endpoint
+        retry_policy: retries transient failures, by default reads are retried up to 3 times
+        scheduler: limits the requests in flight and serves interactive requests before
+            background ones, see SwitchBotRequestScheduler
+
+        Concurrent identical GET requests from several threads share one HTTP request
+        and its SwitchBotAPIResponse, see the counters of single_flight.
+        """
+        super().__init__(
+            token,
+            secret_key,
+            api_host_domain,
+            config_file_path,
+            rate_limiter,
+            retry_policy,
+            scheduler,
+            codec,
+        )
+        self.single_flight = SingleFlight()
+        if transport is not None:
+            self.transport = transport
+        else:
+            self.transport = SwitchBotRequestsTransport(
+                session, pool_size, keep_alive, connect_timeout, read_timeout
+            )
+        if prewarm:
+            self.prewarm()
+
+    def devices(self) -> SwitchBotAPIResponse:
+        return self._get("devices")
+
+    def devices_status(self, device_id: str) -> SwitchBotAPIResponse:
+        formatted_response = self._get(f"devices/{device_id}/status")
+        self._check_devices_status_response(formatted_response)
         return formatted_response
 
     def devices_commands(
@@ -89,33 +327,14 @@ class SwitchBotAPIClient:
         parameter: str = None,
         command_type: str = None,
     ) -> SwitchBotAPIResponse:
-        payload = {
-            "command": command,
-        }
-
-        if parameter is not None:
-            payload["parameter"] = parameter
-        if command_type is not None:
-            payload["command_type"] = command_type
-        response: requests.Response = requests.post(
-            self._uri(f"devices/{device_id}/commands"),
-            headers=self._headers(),
-            data=json.dumps(payload),
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        payload = self._devices_commands_body(command, parameter, command_type)
+        return self._post(f"devices/{device_id}/commands", payload)
 
     def scenes(self) -> SwitchBotAPIResponse:
-        response: requests.Response = requests.get(self._uri("scenes"), headers=self._headers())
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._get("scenes")
 
     def scenes_execute(self, scene_id: str) -> SwitchBotAPIResponse:
-        response: requests.Response = requests.post(
-            self._uri(f"scenes/{scene_id}/execute"), headers=self._headers()
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._post(f"scenes/{scene_id}/execute")
 
     def webhook_setup(self, url: str) -> SwitchBotAPIResponse:
         payload = {
@@ -123,102 +342,121 @@ class SwitchBotAPIClient:
             "url": url,
             "deviceList": "ALL",
         }
-        response: requests.Response = requests.post(
-            self._uri("webhook/setupWebhook"),
-            headers=self._headers(),
-            data=json.dumps(payload),
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._post("webhook/setupWebhook", payload)
 
     def webhook_query_url(self) -> SwitchBotAPIResponse:
         payload = {
             "action": "queryUrl",
         }
-        response: requests.Response = requests.post(
-            self._uri("webhook/queryWebhook"),
-            headers=self._headers(),
-            data=json.dumps(payload),
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._post("webhook/queryWebhook", payload, idempotent=True)
 
     def webhook_query_details(self, urls: List[str]) -> SwitchBotAPIResponse:
         payload = {"action": "queryDetails", "urls": urls}
-        response: requests.Response = requests.post(
-            self._uri("webhook/queryWebhook"),
-            headers=self._headers(),
-            data=json.dumps(payload),
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._post("webhook/queryWebhook", payload, idempotent=True)
 
     def webhook_update(self, config: dict) -> SwitchBotAPIResponse:
         payload = {"action": "updateWebhook", "config": config}
-        response: requests.Response = requests.post(
-            self._uri("webhook/updateWebhook"),
-            headers=self._headers(),
-            data=json.dumps(payload),
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._post("webhook/updateWebhook", payload)
 
     def webhook_delete(self, url: str) -> SwitchBotAPIResponse:
         payload = {"action": "deleteWebhook", "url": url}
-        response: requests.Response = requests.post(
-            self._uri("webhook/deleteWebhook"),
-            headers=self._headers(),
-            data=json.dumps(payload),
-        )
-        formatted_response: SwitchBotAPIResponse = self._check_api_response(response)
-        return formatted_response
+        return self._post("webhook/deleteWebhook", payload)
 
-    def config_file_path(self):
-        if self.__config_file_path is None:
-            return os.path.expanduser(SwitchBotAPIClient.DEFAULT_CONFIG_FILE_PATH)
-        return self.__config_file_path
+    @property
+    def session(self) -> requests.Session:
+        """
+        The requests.Session of the default transport.
+        """
+        if not isinstance(self.transport, SwitchBotRequestsTransport):
+            raise RuntimeError("the transport of this client does not use a requests.Session")
+        return self.transport.session
 
-    def _uri(self, endpoint: str):
-        return f"{self.api_host_domain}/{self.api_version}/{endpoint}"
+    def prewarm(self):
+        """
+        Open a pooled connection to api_host_domain ahead of the first API call,
+        so that the TCP and TLS handshake is not paid by the first real request.
+        """
+        self.transport.prewarm(self.api_host_domain)
 
-    def _headers(self):
-        version = AppConstants.VERSION
-        return {
-            "content-type": "application/json",
-            "user-agent": f"switchbot-client/{version}",
-            **self._generate_auth_header(),
-        }
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        return self
 
-    def _generate_auth_header(self):
-        nonce = ""
-        timestamp = int(round(time.time() * 1000))
-        string_to_sign = bytes(f"{self.token}{timestamp}{nonce}", "utf-8")
-        secret = bytes(self.secret_key, "utf-8")
-        sign = base64.b64encode(
-            hmac.new(secret, msg=string_to_sign, digestmod=hashlib.sha256).digest()
+    def __exit__(self, *args):
+        self.close()
+
+    def _get(self, endpoint: str) -> SwitchBotAPIResponse:
+        return self.single_flight.do(
+            endpoint, lambda: self._request("GET", endpoint, idempotent=True)
         )
-        return {
-            "Authorization": self.token,
-            "t": str(timestamp),
-            "sign": str(sign, "utf-8"),
-            "nonce": nonce,
-        }
 
-    def _load_config(self):
-        config_file_path = self.config_file_path()
-        if os.path.exists(config_file_path):
-            with open(config_file_path, encoding="utf-8") as config_file:
-                return yaml.safe_load(config_file)
-        return None
+    def _post(
+        self, endpoint: str, payload: Payload = None, idempotent: bool = False
+    ) -> SwitchBotAPIResponse:
+        return self._request("POST", endpoint, payload, idempotent)
 
-    @staticmethod
-    def _check_api_response(original_response: requests.Response):
-        response = original_response.json()
-        if "message" not in response:
-            raise RuntimeError("format error", original_response.text)
-        if response["message"] == "Unauthorized":
-            raise RuntimeError(
-                "Http 401 Error. User permission is denied due to invalid token.",
-                response,
-            )
-        return SwitchBotAPIResponse(response["statusCode"], response["message"], response["body"])
+    def _request(
+        self, method: str, endpoint: str, payload: Payload = None, idempotent: bool = False
+    ) -> SwitchBotAPIResponse:
+        priority = self._request_priority(idempotent)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self._send(method, endpoint, payload, priority)
+            except self.transport.retryable_errors as e:
+                delay = self.retry_policy.retry_delay(attempt, idempotent)
+                if delay is None:
+                    raise
+                self._log_retry(method, endpoint, attempt, delay, e)
+                time.sleep(delay)
+                continue
+
+            if self.retry_policy.is_retryable_http_status(response.status_code):
+                delay = self.retry_policy.retry_delay(attempt, idempotent)
+                if delay is None:
+                    raise SwitchBotAPIError(
+                        f"Http {response.status_code} Error", response.status_code, response.text
+                    )
+                self._log_retry(method, endpoint, attempt, delay, f"http {response.status_code}")
+                time.sleep(delay)
+                continue
+
+            formatted_response = self._check_api_response(response)
+            if self.retry_policy.is_retryable_api_status(formatted_response.status_code):
+                delay = self.retry_policy.retry_delay(attempt, idempotent)
+                if delay is not None:
+                    self._log_retry(
+                        method,
+                        endpoint,
+                        attempt,
+                        delay,
+                        f"statusCode {formatted_response.status_code}",
+                    )
+                    time.sleep(delay)
+                    continue
+            return formatted_response
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Payload = None,
+        priority: SwitchBotPriority = SwitchBotPriority.INTERACTIVE,
+    ) -> SwitchBotHTTPResponse:
+        if self.scheduler is None:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            return self._send_now(method, endpoint, payload)
+        # the scheduler takes the rate limiter token, in priority order
+        with self.scheduler.slot(priority, self.rate_limiter):
+            return self._send_now(method, endpoint, payload)
+
+    def _send_now(
+        self, method: str, endpoint: str, payload: Payload = None
+    ) -> SwitchBotHTTPResponse:
+        return self.transport.send(
+            method, self._uri(endpoint), self._headers(), self._encode_payload(payload)
+        )
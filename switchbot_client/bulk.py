@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from switchbot_client.devices.base import SwitchBotCommandResult, SwitchBotDevice
+from switchbot_client.devices.status import DeviceStatus
+
+
+@dataclass
+class SwitchBotStatusResult:
+    """
+    The outcome of fetching the status of one device in SwitchBotClient.statuses.
+    Exactly one of status and error is set.
+    """
+
+    device_id: str
+    device: Optional[SwitchBotDevice] = None
+    status: Optional[DeviceStatus] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class SwitchBotCommandItemResult:
+    """
+    The outcome of one command in SwitchBotClient.execute_many.
+    elapsed: seconds the API call took
+    """
+
+    device_id: str
+    command: str
+    parameter: Optional[str] = None
+    command_type: Optional[str] = None
+    device: Optional[SwitchBotDevice] = None
+    result: Optional[SwitchBotCommandResult] = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.result is not None and self.result.status_code == 100
+
+    @property
+    def hub_key(self) -> str:
+        """
+        Commands with the same key are sent one after another.
+        Devices without a hub are not serialized with any other device.
+        """
+        if self.device is not None and self.device.hub_device_id is not None:
+            return self.device.hub_device_id
+        return self.device_id
+
+
+@dataclass
+class SwitchBotBulkCommandResult:
+    """
+    items: a result per command, in the order the commands were given
+    elapsed: seconds the whole batch took
+    """
+
+    items: List[SwitchBotCommandItemResult]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return all(item.ok for item in self.items)
+
+    @property
+    def failed(self) -> List[SwitchBotCommandItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def hub_count(self) -> int:
+        return len({item.hub_key for item in self.items if item.device is not None})
+
+
+@dataclass
+class SwitchBotReconcileItemResult:
+    """
+    The outcome of bringing one device to its desired state in SwitchBotClient.reconcile.
+    changes: the fields which differed from the desired state, as (previous, desired) values
+    commands: the commands sent to apply the changes, empty if nothing had to change
+    """
+
+    device_id: str
+    device: Optional[SwitchBotDevice] = None
+    changes: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    commands: List[SwitchBotCommandItemResult] = field(default_factory=list)
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and all(command.ok for command in self.commands)
+
+    @property
+    def changed(self) -> bool:
+        return len(self.commands) > 0
+
+
+@dataclass
+class SwitchBotReconcileResult:
+    """
+    items: a result per device, in the order the devices were given
+    elapsed: seconds the whole reconciliation took
+    """
+
+    items: List[SwitchBotReconcileItemResult]
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return all(item.ok for item in self.items)
+
+    @property
+    def failed(self) -> List[SwitchBotReconcileItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def changed(self) -> List[SwitchBotReconcileItemResult]:
+        return [item for item in self.items if item.changed]
+
+    @property
+    def command_count(self) -> int:
+        return sum(len(item.commands) for item in self.items)
@@ -0,0 +1,57 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    A thread-safe in-memory cache whose entries expire ttl seconds after they were stored.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """
+        ttl: seconds an entry is returned for, 0 disables caching
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, max_age: float = None) -> Optional[Any]:
+        """
+        max_age: accept entries up to this age in seconds instead of ttl
+        Returns None if there is no fresh enough entry.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self._clock() - stored_at >= max_age:
+            return None
+        return value
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """
+        Returns the seconds since the entry was stored, or None if there is no entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return self._clock() - entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """
+        Drop the entry of key, or every entry if key is None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from switchbot_client.scheduler import percentile
+
+REDACTED = "REDACTED"
+
+
+@dataclass
+class SwitchBotInteraction:
+    """
+    One recorded API request and its response.
+    offset: seconds between the start of the recording and the request
+    duration: seconds until the response arrived
+    method, endpoint: e.g. "GET" and "devices/ABC/status", without the host and API version
+    payload: the JSON body of the request, None if it had none
+    status: the HTTP status code of the response
+    body: the response body
+    """
+
+    offset: float
+    duration: float
+    method: str
+    endpoint: str
+    payload: Any
+    status: int
+    body: str
+
+    def key(self) -> Tuple[str, str, str]:
+        return self.method, self.endpoint, _canonical(self.payload)
+
+    def to_json(self) -> str:
+        data: Dict[str, Any] = {
+            "offset": round(self.offset, 6),
+            "duration": round(self.duration, 6),
+            "method": self.method,
+            "endpoint": self.endpoint,
+            "status": self.status,
+        }
+        if self.payload is not None:
+            data["payload"] = self.payload
+        try:
+            data["json"] = json.loads(self.body)
+        except ValueError:
+            data["text"] = self.body
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> SwitchBotInteraction:
+        data = json.loads(line)
+        if "json" in data:
+            body = json.dumps(data["json"], separators=(",", ":"), ensure_ascii=False)
+        else:
+            body = data.get("text", "")
+        return cls(
+            data["offset"],
+            data["duration"],
+            data["method"],
+            data["endpoint"],
+            data.get("payload"),
+            data["status"],
+            body,
+        )
+
+
+@dataclass
+class SwitchBotReplayStats:
+    """
+    The result of SwitchBotCassette.play().
+    requests: requests sent
+    errors: requests which raised an error, e.g. SwitchBotAPIError for a recorded HTTP 500
+    wall_time: seconds the replay took
+    cpu_time: CPU seconds the process used during the replay
+    mean_latency, p99_latency, max_latency: seconds per request as seen by the caller
+    """
+
+    requests: int
+    errors: int
+    wall_time: float
+    cpu_time: float
+    mean_latency: float
+    p99_latency: float
+    max_latency: float
+
+
+def _canonical(payload: Any) -> str:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+def _redact(text: str, secrets: Iterable[str]) -> str:
+    for secret in secrets:
+        if secret:
+            text = text.replace(secret, REDACTED)
+    return text
+
+
+def _endpoint(url: str) -> str:
+    """
+    Returns the endpoint of an API url, e.g. devices for https://api.switch-bot.com/v1.1/devices.
+    """
+    path = urlsplit(url).path.lstrip("/")
+    return path.split("/", 1)[1] if "/" in path else path
+
+
+def _payload(data: Any, secrets: Iterable[str]) -> Any:
+    if data is None:
+        return None
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    return json.loads(_redact(data, secrets))
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")  # pylint: disable=consider-using-with
+
+
+class SwitchBotCassette:
+    """
+    API interactions recorded by SwitchBotRecordingSession and served by SwitchBotReplaySession.
+    It is stored as one compact JSON line per interaction, gzip-compressed if the path ends
+    with .gz.
+    No request headers are recorded, so the file contains neither the token nor signatures.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str = None, interactions: List[SwitchBotInteraction] = None) -> None:
+        self.path = path
+        self.interactions: List[SwitchBotInteraction] = list(interactions or [])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> SwitchBotCassette:
+        with _open(path, "r") as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("version") != cls.VERSION:
+                raise RuntimeError(f"unsupported cassette version: {header.get('version')}")
+            interactions = [SwitchBotInteraction.from_json(line) for line in file if line.strip()]
+        return cls(path, interactions)
+
+    def save(self, path: str = None):
+        path = path or self.path
+        if path is None:
+            raise RuntimeError("no cassette path specified")
+        with self._lock:
+            interactions = sorted(self.interactions, key=lambda i: i.offset)
+        with _open(path, "w") as file:
+            file.write(json.dumps({"version": self.VERSION}) + "\n")
+            for interaction in interactions:
+                file.write(interaction.to_json() + "\n")
+
+    def append(self, interaction: SwitchBotInteraction):
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def __iter__(self) -> Iterator[SwitchBotInteraction]:
+        return iter(list(self.interactions))
+
+    def play(self, api_client, speed: Optional[float] = None) -> SwitchBotReplayStats:
+        """
+        Send the recorded requests again through api_client, one after another,
+        and measure the latency and CPU time of the client.
+        With api_client on a SwitchBotReplaySession this needs no network,
+        so the numbers of two library versions can be compared on the same traffic.
+        speed: start the requests at their recorded offsets divided by speed,
+            None sends them back to back
+        """
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        for interaction in sorted(self.interactions, key=lambda i: i.offset):
+            if speed:
+                delay = started + interaction.offset / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            request_started = time.perf_counter()
+            try:
+                api_client._request(  # pylint: disable=protected-access
+                    interaction.method,
+                    interaction.endpoint,
+                    interaction.payload,
+                    interaction.method == "GET",
+                )
+            except Exception:  # pylint: disable=broad-except
+                errors += 1
+            latencies.append(time.perf_counter() - request_started)
+        latencies.sort()
+        return SwitchBotReplayStats(
+            len(latencies),
+            errors,
+            time.perf_counter() - started,
+            time.process_time() - cpu_started,
+            sum(latencies) / len(latencies) if latencies else 0.0,
+            percentile(latencies, 0.99),
+            latencies[-1] if latencies else 0.0,
+        )
+
+
+class SwitchBotRecordingSession(requests.Session):
+    """
+    A requests.Session recording the API requests sent through it into a cassette,
+    pass it to SwitchBotAPIClient as session to capture real traffic.
+    The token and the strings in redact, e.g. webhook URLs, are replaced by REDACTED
+    in the recorded payloads and bodies. close() saves the cassette if it has a path.
+
+    cassette: the cassette to append the interactions to
+    redact: further secrets to remove from the recording
+    pool_size: maximum number of connections kept open to the API host
+    """
+
+    def __init__(
+        self,
+        cassette: SwitchBotCassette,
+        redact: Iterable[str] = (),
+        pool_size: int = 10,
+    ) -> None:
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.cassette = cassette
+        self.redact = set(redact)
+        self._started = time.perf_counter()
+
+    def request(  # type: ignore[override] # pylint: disable=arguments-differ
+        self, method: str, url: str, *args, **kwargs
+    ) -> requests.Response:
+        headers = kwargs.get("headers") or {}
+        if headers.get("Authorization"):
+            self.redact.add(headers["Authorization"])
+        started = time.perf_counter()
+        response = super().request(method, url, *args, **kwargs)
+        if method.upper() == "HEAD":
+            return response
+        self.cassette.append(
+            SwitchBotInteraction(
+                started - self._started,
+                time.perf_counter() - started,
+                method.upper(),
+                _redact(_endpoint(url), self.redact),
+                _payload(kwargs.get("data"), self.redact),
+                response.status_code,
+                _redact(response.text, self.redact),
+            )
+        )
+        return response
+
+    def close(self):
+        super().close()
+        if self.cassette.path is not None:
+            self.cassette.save()
+
+
+class SwitchBotReplaySession(requests.Session):
+    """
+    A requests.Session answering API requests from a cassette without network access,
+    pass it to SwitchBotAPIClient as session.
+    Requests are matched by method, endpoint and payload. Repeated requests get the recorded
+    responses in order and the last one again once they are used up,
+    requests which were not recorded raise RuntimeError.
+
+    cassette: the recorded interactions
+    speed: responses take their recorded duration divided by speed, None answers at once
+    redact: the strings redacted while recording, to match payloads which contained them
+    """
+
+    def __init__(
+        self,
+        cassette: SwitchBotCassette,
+        speed: Optional[float] = 1.0,
+        redact: Iterable[str] = (),
+    ) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.speed = speed
+        self.redact = set(redact)
+        self.served = 0
+        self._lock = threading.Lock()
+        self._responses: Dict[Tuple[str, str, str], Deque[SwitchBotInteraction]] = {}
+        for interaction in sorted(cassette.interactions, key=lambda i: i.offset):
+            self._responses.setdefault(interaction.key(), deque()).append(interaction)
+
+    def request(  # type: ignore[override] # pylint: disable=arguments-differ,unused-argument
+        self, method: str, url: str, *args, **kwargs
+    ) -> requests.Response:
+        method = method.upper()
+        if method == "HEAD":
+            return self._response(url, 200, "")
+        key = (method, _endpoint(url), _canonical(_payload(kwargs.get("data"), self.redact)))
+        with self._lock:
+            recorded = self._responses.get(key)
+            if not recorded:
+                raise RuntimeError(f"no recorded response for {method} {key[1]}", key[2])
+            interaction = recorded.popleft() if len(recorded) > 1 else recorded[0]
+            self.served += 1
+        if self.speed:
+            time.sleep(interaction.duration / self.speed)
+        return self._response(url, interaction.status, interaction.body)
+
+    @staticmethod
+    def _response(url: str, status: int, body: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = body.encode("utf-8")  # pylint: disable=protected-access
+        response.headers["content-type"] = "application/json"
+        return response
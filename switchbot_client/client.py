@@ -1,10 +1,37 @@
-from datetime import datetime
-from typing import List, Optional
+import dataclasses
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
+from switchbot_client.bulk import (
+    SwitchBotBulkCommandResult,
+    SwitchBotCommandItemResult,
+    SwitchBotReconcileItemResult,
+    SwitchBotReconcileResult,
+    SwitchBotStatusResult,
+)
+from switchbot_client.cache import TTLCache
+from switchbot_client.coalesce import SwitchBotCommandCoalescer
 from switchbot_client.devices.base import SwitchBotDevice
 from switchbot_client.devices.factory import SwitchBotDeviceFactory
+from switchbot_client.devices.status import DeviceStatusMetadata
+from switchbot_client.dispatch import SwitchBotIRDispatcher
 from switchbot_client.scenes import SwitchBotScene
+from switchbot_client.types import APIPhysicalDeviceObject, APIRemoteDeviceObject
 from switchbot_client.webhooks.base import SwitchBotWebhook
 
 
@@ -14,33 +41,249 @@ class SwitchBotClient:
     It returns wrapped objects.
     """
 
+    DEFAULT_INVENTORY_TTL = 60.0
+    DEFAULT_INVENTORY_REFRESH_AHEAD = 0.8
+    DEFAULT_STATUS_TTL = 5.0
+    DEFAULT_CONCURRENCY = 8
+    DEFAULT_HUB_INTERVAL = 0.3
+    DEFAULT_RECONCILE_DELAY = 10.0
+    INVENTORY_KEY = "devices"
+
     def __init__(
         self,
         token: str = None,
         secret_key: str = None,
         api_host_domain: str = None,
         config_file_path: str = None,
+        api_client: SwitchBotAPIClient = None,
+        inventory_ttl: float = DEFAULT_INVENTORY_TTL,
+        inventory_refresh_ahead: float = DEFAULT_INVENTORY_REFRESH_AHEAD,
+        status_ttl: float = DEFAULT_STATUS_TTL,
+        skip_satisfied_commands: bool = False,
+        optimistic_updates: bool = False,
+        reconcile_delay: Optional[float] = DEFAULT_RECONCILE_DELAY,
+        command_coalescer: SwitchBotCommandCoalescer = None,
+        ir_dispatcher: SwitchBotIRDispatcher = None,
     ):
-        self.api_client = SwitchBotAPIClient(token, secret_key, api_host_domain, config_file_path)
+        """
+        api_client: an existing SwitchBotAPIClient to build on.
+        Its pooled HTTP session is shared by this client and every device object it creates.
+        inventory_ttl: seconds the device list is cached for, 0 fetches it on every lookup
+        inventory_refresh_ahead: fraction of inventory_ttl after which the device list is
+            refreshed in the background while the cached one is still returned
+        status_ttl: seconds a device status is cached for, 0 calls the API on every status read.
+            Commands sent through a device object drop the cached status of the device.
+        skip_satisfied_commands: do not send turn_on, turn_off and setter commands when the
+            cached status or the pseudo status shows that the device is already in that state.
+            The number of skipped commands is counted in saved_calls.
+        optimistic_updates: apply successful commands of physical devices to their cached status
+            instead of dropping it, so that toggle() and reading a value back after setting it
+            do not call the API. See status_metadata() for whether a status is optimistic.
+        reconcile_delay: seconds after an optimistic update when the status is fetched again
+            in the background to correct the local state, None disables it
+        command_coalescer: holds setter commands for a short window and sends only the latest
+            one of a kind per device, see SwitchBotCommandCoalescer
+        ir_dispatcher: queues the commands of infrared remote devices per hub and sends them
+            a minimum interval apart, see SwitchBotIRDispatcher
+        """
+        if api_client is not None:
+            self.api_client = api_client
+        else:
+            self.api_client = SwitchBotAPIClient(
+                token, secret_key, api_host_domain, config_file_path
+            )
+        self.inventory_cache = TTLCache(inventory_ttl)
+        self.inventory_refresh_ahead = inventory_refresh_ahead
+        self._inventory_lock = threading.Lock()
+        self._inventory_refreshing = False
+        self.status_cache = TTLCache(status_ttl)
+        self.skip_satisfied_commands = skip_satisfied_commands
+        self.saved_calls = 0
+        self._saved_calls_lock = threading.Lock()
+        self.optimistic_updates = optimistic_updates
+        self.reconcile_delay = reconcile_delay
+        self._status_lock = threading.Lock()
+        self._status_metadata: Dict[str, DeviceStatusMetadata] = {}
+        self._status_refreshes: Dict[str, threading.Timer] = {}
+        self.command_coalescer = command_coalescer
+        self.ir_dispatcher = ir_dispatcher
+
+    def inventory(self) -> dict:
+        """
+        The body of the devices endpoint, served from the inventory cache.
+        It is shared by devices(), device() and the create_by_id methods of the device classes.
+        """
+        body = self.inventory_cache.get(self.INVENTORY_KEY)
+        if body is None:
+            return self.refresh_inventory()
+        if self._needs_refresh_ahead():
+            self._start_inventory_refresh()
+        return body
+
+    def refresh_inventory(self) -> dict:
+        body = self.api_client.devices().body
+        self.inventory_cache.set(self.INVENTORY_KEY, body)
+        return body
+
+    def invalidate_inventory(self):
+        self.inventory_cache.invalidate(self.INVENTORY_KEY)
+
+    def record_saved_call(self):
+        with self._saved_calls_lock:
+            self.saved_calls += 1
+
+    def invalidate_status(self, device_id: str = None):
+        """
+        Drop the cached status of device_id, or of every device if device_id is None.
+        """
+        with self._status_lock:
+            self.status_cache.invalidate(device_id)
+            if device_id is None:
+                self._status_metadata.clear()
+            else:
+                self._status_metadata.pop(device_id, None)
+
+    def refresh_status(self, device_id: str) -> dict:
+        """
+        Fetch the status of device_id from the API and cache it.
+        Returns the raw status.
+        """
+        requested_at = time.monotonic()
+        raw_data = self.api_client.devices_status(device_id).body
+        self._store_status(device_id, raw_data, requested_at)
+        return raw_data
+
+    def update_status(self, device_id: str, changes: dict):
+        """
+        Apply the values a successful command has set to the cached status of device_id.
+        changes: raw status keys and their new values, e.g. {"power": "on"}
+        The status is fetched again reconcile_delay seconds later to correct the local state.
+        If no status is cached there is nothing to update and the status is dropped.
+        """
+        with self._status_lock:
+            raw_data = self.status_cache.get(device_id)
+            metadata = self._status_metadata.get(device_id)
+            if raw_data is None or metadata is None:
+                self.status_cache.invalidate(device_id)
+                self._status_metadata.pop(device_id, None)
+                return
+            self.status_cache.set(device_id, {**raw_data, **changes})
+            metadata.source = DeviceStatusMetadata.SOURCE_COMMAND
+            metadata.updated_at = time.monotonic()
+        self._schedule_status_refresh(device_id)
+
+    def status_metadata(self, device_id: str) -> Optional[DeviceStatusMetadata]:
+        """
+        Returns where the cached status of device_id comes from and how old it is,
+        or None if no status is cached.
+        """
+        with self._status_lock:
+            metadata = self._status_metadata.get(device_id)
+            if metadata is None or self.status_cache.get(device_id) is None:
+                return None
+            return dataclasses.replace(metadata)
 
     def devices(self) -> List[SwitchBotDevice]:
-        response = self.api_client.devices().body
-        devices = response["deviceList"]
-        devices.extend(response["infraredRemoteList"])
         items = []
-        for device in devices:
+        for device in self._device_objects(self.inventory()):
             model = SwitchBotDeviceFactory.create(self, device)
             if model:
                 items.append(model)
         return items
 
     def device(self, device_id: str) -> Optional[SwitchBotDevice]:
-        filtered = [d for d in self.devices() if d.device_id == device_id]
-        if len(filtered) > 1:
-            raise RuntimeError(f"duplicated device ids found: {filtered}")
-        if len(filtered) == 0:
+        device = self._find_device_object(self.inventory(), device_id)
+        if device is None:
             return None
-        return filtered[0]
+        return SwitchBotDeviceFactory.create(self, device)
+
+    def statuses(
+        self,
+        devices: Iterable[Union[str, SwitchBotDevice]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        deadline: float = None,
+    ) -> Iterator[SwitchBotStatusResult]:
+        """
+        Fetch the statuses of many devices in parallel and yield them as they complete.
+        devices: device ids or device objects
+        concurrency: maximum number of statuses fetched at the same time
+        deadline: seconds after which the devices still pending are yielded
+            with a TimeoutError instead of a status
+        Errors are reported per device in SwitchBotStatusResult.error and do not stop the others.
+        """
+        end = None if deadline is None else time.monotonic() + deadline
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending: Dict[Future, str] = {}
+        try:
+            for device in devices:
+                device_id = device if isinstance(device, str) else device.device_id
+                pending[executor.submit(self._status_result, device)] = device_id
+            while pending:
+                timeout = None if end is None else max(end - time.monotonic(), 0)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    del pending[future]
+                    yield future.result()
+            for device_id in pending.values():
+                yield SwitchBotStatusResult(
+                    device_id, error=TimeoutError(f"no status within {deadline} seconds")
+                )
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def execute_many(
+        self,
+        commands: Iterable[Sequence],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        hub_interval: float = DEFAULT_HUB_INTERVAL,
+    ) -> SwitchBotBulkCommandResult:
+        """
+        Send many commands at once.
+        commands: (device, command[, parameter[, command_type]]) tuples,
+            device is a device object or a device id
+        concurrency: maximum number of hubs commanded at the same time
+        hub_interval: seconds between two commands sent through the same hub
+        Commands for devices behind the same hub are sent one after another with hub_interval
+        in between so that the hub does not drop them, different hubs are commanded in parallel.
+        Errors are reported per command and do not stop the others.
+        """
+        started = time.monotonic()
+        items = [self._command_item(*command) for command in commands]
+        self._execute_command_items(items, concurrency, hub_interval)
+        return SwitchBotBulkCommandResult(items, time.monotonic() - started)
+
+    def reconcile(
+        self,
+        desired_states: Union[
+            Mapping[str, Dict[str, Any]],
+            Iterable[Tuple[Union[str, SwitchBotDevice], Dict[str, Any]]],
+        ],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        hub_interval: float = DEFAULT_HUB_INTERVAL,
+    ) -> SwitchBotReconcileResult:
+        """
+        Bring devices to a desired state with the fewest commands.
+        desired_states: {device_id: state} or (device, state) pairs, a state maps attribute names
+            of the status class of the device to values, e.g. {"power": "on", "brightness": 50}
+        Each state is compared with the cached status of the device, fetched if needed,
+        or with the pseudo status of infrared devices. Only the fields which differ are sent,
+        SmartFan and AirConditioner with one command covering all of them.
+        The commands are sent as execute_many sends them, errors are reported per device.
+        """
+        started = time.monotonic()
+        if isinstance(desired_states, Mapping):
+            entries: Iterable = desired_states.items()
+        else:
+            entries = desired_states
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            items = list(executor.map(lambda entry: self._reconcile_item(*entry), entries))
+        commands = [command for item in items for command in item.commands]
+        self._execute_command_items(commands, concurrency, hub_interval)
+        return SwitchBotReconcileResult(items, time.monotonic() - started)
 
     def scenes(self) -> List[SwitchBotScene]:
         response = self.api_client.scenes().body
@@ -57,16 +300,7 @@ class SwitchBotClient:
     def webhooks(self) -> List[SwitchBotWebhook]:
         response_urls = self.api_client.webhook_query_url().body["urls"]
         response = self.api_client.webhook_query_details(response_urls).body
-        return [
-            SwitchBotWebhook(
-                r["url"],
-                r["enable"],
-                r["deviceList"],
-                datetime.fromtimestamp(r["createTime"] / 1000),
-                datetime.fromtimestamp(r["lastUpdateTime"] / 1000),
-            )
-            for r in response
-        ]
+        return [SwitchBotWebhook.create_by_api_object(r) for r in response]
 
     def create_webhook(self, url: str) -> SwitchBotAPIResponse:
         return self.api_client.webhook_setup(url)
@@ -80,3 +314,195 @@ class SwitchBotClient:
 
     def delete_webhook(self, url: str) -> SwitchBotAPIResponse:
         return self.api_client.webhook_delete(url)
+
+    def _status_result(self, device: Union[str, SwitchBotDevice]) -> SwitchBotStatusResult:
+        if isinstance(device, str):
+            result = SwitchBotStatusResult(device)
+        else:
+            result = SwitchBotStatusResult(device.device_id, device)
+        try:
+            if result.device is None:
+                result.device = self.device(result.device_id)
+            if result.device is None:
+                raise RuntimeError(f"device not found: {result.device_id}")
+            result.status = result.device.status()
+        except Exception as e:  # pylint: disable=broad-except
+            result.error = e
+        return result
+
+    def _command_item(
+        self,
+        device: Union[str, SwitchBotDevice],
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> SwitchBotCommandItemResult:
+        if isinstance(device, str):
+            item = SwitchBotCommandItemResult(device, command, parameter, command_type)
+            try:
+                item.device = self.device(device)
+                if item.device is None:
+                    raise RuntimeError(f"device not found: {device}")
+            except Exception as e:  # pylint: disable=broad-except
+                item.error = e
+            return item
+        return SwitchBotCommandItemResult(
+            device.device_id, command, parameter, command_type, device
+        )
+
+    def _reconcile_item(
+        self, device: Union[str, SwitchBotDevice], desired: Dict[str, Any]
+    ) -> SwitchBotReconcileItemResult:
+        if isinstance(device, str):
+            item = SwitchBotReconcileItemResult(device)
+        else:
+            item = SwitchBotReconcileItemResult(device.device_id, device)
+        try:
+            if item.device is None:
+                item.device = self.device(item.device_id)
+            if item.device is None:
+                raise RuntimeError(f"device not found: {item.device_id}")
+            current = item.device.status()
+            item.changes = self._state_changes(current, desired)
+            commands = item.device._reconcile_commands(  # pylint: disable=protected-access
+                current, {key: value for key, (_, value) in item.changes.items()}
+            )
+            item.commands = [
+                SwitchBotCommandItemResult(item.device_id, command, parameter, None, item.device)
+                for command, parameter in commands
+            ]
+        except Exception as e:  # pylint: disable=broad-except
+            item.error = e
+        return item
+
+    @staticmethod
+    def _state_changes(current: Any, desired: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+        changes = {}
+        for key, value in desired.items():
+            if not hasattr(current, key):
+                raise RuntimeError(f"unknown status field of {type(current).__name__}: {key}")
+            previous = getattr(current, key)
+            if isinstance(previous, str) and isinstance(value, str):
+                if previous.lower() == value.lower():
+                    continue
+            elif previous == value:
+                continue
+            changes[key] = (previous, value)
+        return changes
+
+    def _execute_command_items(
+        self, items: List[SwitchBotCommandItemResult], concurrency: int, hub_interval: float
+    ):
+        groups: Dict[str, List[SwitchBotCommandItemResult]] = {}
+        for item in items:
+            if item.error is None:
+                groups.setdefault(item.hub_key, []).append(item)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for group in groups.values():
+                executor.submit(self._execute_hub_commands, group, hub_interval)
+
+    @staticmethod
+    def _execute_hub_commands(items: List[SwitchBotCommandItemResult], hub_interval: float):
+        for i, item in enumerate(items):
+            if i > 0 and hub_interval > 0:
+                time.sleep(hub_interval)
+            started = time.monotonic()
+            try:
+                item.result = item.device.command(  # type: ignore[union-attr]
+                    item.command, item.parameter, item.command_type
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                item.error = e
+            item.elapsed = time.monotonic() - started
+
+    def _store_status(self, device_id: str, raw_data: dict, requested_at: float):
+        with self._status_lock:
+            metadata = self._status_metadata.get(device_id)
+            if metadata is not None and metadata.updated_at > requested_at:
+                # a command was applied while the status was being fetched, keep the newer state
+                return
+            self.status_cache.set(device_id, raw_data)
+            now = time.monotonic()
+            self._status_metadata[device_id] = DeviceStatusMetadata(
+                DeviceStatusMetadata.SOURCE_API, now, now
+            )
+
+    def close(self):
+        """
+        Cancel the background status refreshes, send the held and queued commands,
+        stop the IR dispatcher and close the HTTP session of the API client.
+        """
+        with self._status_lock:
+            timers = list(self._status_refreshes.values())
+            self._status_refreshes.clear()
+        for timer in timers:
+            timer.cancel()
+        if self.command_coalescer is not None:
+            self.command_coalescer.flush()
+        if self.ir_dispatcher is not None:
+            self.ir_dispatcher.close()
+        self.api_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _schedule_status_refresh(self, device_id: str):
+        if self.reconcile_delay is None:
+            return
+        with self._status_lock:
+            if device_id in self._status_refreshes:
+                return
+            timer = threading.Timer(
+                self.reconcile_delay, self._refresh_status_in_background, [device_id]
+            )
+            timer.daemon = True
+            self._status_refreshes[device_id] = timer
+        timer.start()
+
+    def _refresh_status_in_background(self, device_id: str):
+        with self._status_lock:
+            self._status_refreshes.pop(device_id, None)
+        try:
+            self.refresh_status(device_id)
+        except Exception as e:  # pylint: disable=broad-except
+            logging.warning("failed to refresh the status of %s: %s", device_id, e)
+
+    def _needs_refresh_ahead(self) -> bool:
+        age = self.inventory_cache.age(self.INVENTORY_KEY)
+        return age is not None and age >= self.inventory_cache.ttl * self.inventory_refresh_ahead
+
+    def _start_inventory_refresh(self):
+        with self._inventory_lock:
+            if self._inventory_refreshing:
+                return
+            self._inventory_refreshing = True
+        threading.Thread(target=self._refresh_inventory_in_background, daemon=True).start()
+
+    def _refresh_inventory_in_background(self):
+        try:
+            self.refresh_inventory()
+        except Exception as e:  # pylint: disable=broad-except
+            logging.warning("failed to refresh the device list: %s", e)
+        finally:
+            with self._inventory_lock:
+                self._inventory_refreshing = False
+
+    @staticmethod
+    def _device_objects(response: dict) -> list:
+        return response["deviceList"] + response["infraredRemoteList"]
+
+    @staticmethod
+    def _find_device_object(
+        response: dict, device_id: str
+    ) -> Optional[Union[APIPhysicalDeviceObject, APIRemoteDeviceObject]]:
+        filtered = [
+            d for d in SwitchBotClient._device_objects(response) if d["deviceId"] == device_id
+        ]
+        if len(filtered) > 1:
+            raise RuntimeError(f"duplicated device ids found: {filtered}")
+        if len(filtered) == 0:
+            return None
+        return filtered[0]
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Tuple
+
+from switchbot_client.enums import ControlCommand
+
+if TYPE_CHECKING:
+    from switchbot_client.devices.base import SwitchBotCommandResult, SwitchBotDevice
+
+
+class _PendingCommand:
+    def __init__(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: Optional[str],
+        command_type: Optional[str],
+        started: float,
+    ) -> None:
+        self.device = device
+        self.command = command
+        self.parameter = parameter
+        self.command_type = command_type
+        self.started = started
+        self.futures: List[Any] = []
+        self.timer: Any = None
+
+
+class SwitchBotCommandCoalescerBase:
+    """
+    Holds commands for a short window and sends only the latest pending command of a kind
+    per device, so that a burst of slider updates results in one API call.
+
+    window: seconds a command is held before it is sent
+    debounce: restart the window whenever a newer command of the same kind arrives,
+        so that the command is sent once the updates stop. By default the window starts with
+        the first pending command and the latest command is sent when it ends.
+    max_delay: with debounce, the longest time in seconds a command is held
+    commands: the commands which are coalesced, other commands are sent immediately.
+        turnOn and turnOff are one kind, every other command is its own kind.
+
+    submitted: number of commands submitted
+    sent: number of commands sent to the API
+    coalesced: number of commands replaced by a later command before they were sent
+    """
+
+    DEFAULT_WINDOW = 0.3
+    DEFAULT_COMMANDS: FrozenSet[str] = frozenset(
+        {
+            ControlCommand.Curtain.SET_POSITION,
+            ControlCommand.ColorBulb.SET_BRIGHTNESS,
+            ControlCommand.ColorBulb.SET_COLOR,
+            ControlCommand.ColorBulb.SET_COLOR_TEMPERATURE,
+            ControlCommand.Humidifier.SET_MODE,
+            ControlCommand.SmartFan.SET_ALL_STATUS,
+            ControlCommand.VirtualInfrared.SET_ALL,
+        }
+    )
+    POWER_COMMANDS = frozenset({ControlCommand.Common.TURN_ON, ControlCommand.Common.TURN_OFF})
+
+    def __init__(
+        self,
+        window: float = DEFAULT_WINDOW,
+        debounce: bool = False,
+        max_delay: float = None,
+        commands: FrozenSet[str] = DEFAULT_COMMANDS,
+    ) -> None:
+        self.window = window
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.commands = commands
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self._pending: Dict[Tuple[str, str, Optional[str]], _PendingCommand] = {}
+
+    def accepts(self, command: str) -> bool:
+        return command in self.commands
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _key(
+        self, device_id: str, command: str, command_type: Optional[str]
+    ) -> Tuple[str, str, Optional[str]]:
+        kind = "power" if command in self.POWER_COMMANDS else command
+        return device_id, kind, command_type
+
+    def _add(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: Optional[str],
+        command_type: Optional[str],
+        future: Any,
+    ) -> Tuple[_PendingCommand, Optional[float]]:
+        """
+        Adds a command to the pending ones.
+        Returns the pending command and the seconds after which it must be sent,
+        or None if its timer is not to be (re)started.
+        """
+        self.submitted += 1
+        key = self._key(device.device_id, command, command_type)
+        now = time.monotonic()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingCommand(
+                device, command, parameter, command_type, now
+            )
+            pending.futures.append(future)
+            return pending, self.window
+
+        self.coalesced += 1
+        pending.parameter = self._merge_parameter(
+            command, pending.command, pending.parameter, parameter
+        )
+        pending.command = command
+        pending.futures.append(future)
+        if not self.debounce:
+            return pending, None
+        delay = self.window
+        if self.max_delay is not None:
+            delay = max(0.0, min(delay, pending.started + self.max_delay - now))
+        return pending, delay
+
+    def _take(self, key: Tuple[str, str, Optional[str]]) -> Optional[_PendingCommand]:
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            self.sent += 1
+        return pending
+
+    @staticmethod
+    def _merge_parameter(
+        command: str,
+        previous_command: str,
+        previous: Optional[str],
+        latest: Optional[str],
+    ) -> Optional[str]:
+        """
+        Fields of a setAll parameter given as None keep the value of the replaced command,
+        so that partial AirConditioner updates are merged into one setAll.
+        """
+        if (
+            command != ControlCommand.VirtualInfrared.SET_ALL
+            or previous_command != command
+            or previous is None
+            or latest is None
+        ):
+            return latest
+        previous_fields = previous.split(",")
+        latest_fields = latest.split(",")
+        if len(previous_fields) != len(latest_fields):
+            return latest
+        return ",".join(
+            old if new == "None" else new for old, new in zip(previous_fields, latest_fields)
+        )
+
+    @staticmethod
+    def _resolve(pending: _PendingCommand, result: SwitchBotCommandResult):
+        for future in pending.futures[:-1]:
+            if not future.done():
+                future.set_result(dataclasses.replace(result, coalesced=True))
+        if not pending.futures[-1].done():
+            pending.futures[-1].set_result(result)
+
+    @staticmethod
+    def _reject(pending: _PendingCommand, error: BaseException):
+        for future in pending.futures:
+            if not future.done():
+                future.set_exception(error)
+
+
+class SwitchBotCommandCoalescer(SwitchBotCommandCoalescerBase):
+    """
+    The thread-based coalescer used by SwitchBotClient.
+    The device command methods block until the coalesced command has been sent,
+    call them from worker threads, or use submit() which returns immediately.
+    """
+
+    def __init__(
+        self,
+        window: float = SwitchBotCommandCoalescerBase.DEFAULT_WINDOW,
+        debounce: bool = False,
+        max_delay: float = None,
+        commands: FrozenSet[str] = SwitchBotCommandCoalescerBase.DEFAULT_COMMANDS,
+    ) -> None:
+        super().__init__(window, debounce, max_delay, commands)
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> Future:
+        """
+        Returns a Future of the SwitchBotCommandResult of the command actually sent.
+        The result of a replaced command has coalesced=True.
+        """
+        future: Future = Future()
+        with self._lock:
+            pending, delay = self._add(device, command, parameter, command_type, future)
+            if delay is not None:
+                if pending.timer is not None:
+                    pending.timer.cancel()
+                self._start(pending, delay)
+        return future
+
+    def flush(self):
+        """
+        Send every pending command now and wait until they are sent.
+        """
+        with self._lock:
+            pending_commands = [self._take(key) for key in list(self._pending)]
+        for pending in pending_commands:
+            if pending is not None:
+                if pending.timer is not None:
+                    pending.timer.cancel()
+                self._send(pending)
+
+    def _start(self, pending: _PendingCommand, delay: float):
+        pending.timer = threading.Timer(delay, self._send_later, [pending])
+        pending.timer.daemon = True
+        pending.timer.start()
+
+    def _send_later(self, pending: _PendingCommand):
+        key = self._key(pending.device.device_id, pending.command, pending.command_type)
+        with self._lock:
+            if self._pending.get(key) is not pending:
+                return
+            self._take(key)
+        self._send(pending)
+
+    def _send(self, pending: _PendingCommand):
+        try:
+            result = pending.device._send_command(  # pylint: disable=protected-access
+                pending.command, pending.parameter, pending.command_type
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            self._reject(pending, e)
+        else:
+            self._resolve(pending, result)
@@ -0,0 +1,69 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable
+
+
+class SwitchBotJSONCodec:
+    """
+    Encodes request bodies and decodes response bodies of the API clients.
+    Both work on bytes, so a response is parsed from its body without decoding it to text first.
+    name: the JSON library used
+    dumps: returns the JSON bytes of an object
+    loads: parses JSON bytes, raising ValueError for invalid JSON
+    """
+
+    def __init__(
+        self, name: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]
+    ) -> None:
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return self.__class__.__qualname__ + f"({self.name})"
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+STDLIB_CODEC = SwitchBotJSONCodec("json", _stdlib_dumps, json.loads)
+
+
+def orjson_codec() -> SwitchBotJSONCodec:
+    """
+    Returns a codec on orjson, raises ImportError if it is not installed.
+    """
+    import orjson  # pylint: disable=import-outside-toplevel,import-error
+
+    return SwitchBotJSONCodec("orjson", orjson.dumps, orjson.loads)  # pylint: disable=no-member
+
+
+def msgspec_codec() -> SwitchBotJSONCodec:
+    """
+    Returns a codec on msgspec, raises ImportError if it is not installed.
+    """
+    import msgspec  # pylint: disable=import-outside-toplevel,import-error
+
+    decoder = msgspec.json.Decoder()
+
+    def loads(data: bytes) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return SwitchBotJSONCodec("msgspec", msgspec.json.Encoder().encode, loads)
+
+
+@lru_cache(maxsize=None)
+def default_codec() -> SwitchBotJSONCodec:
+    """
+    Returns the fastest available codec: orjson, msgspec or the standard library json module.
+    """
+    for factory in (orjson_codec, msgspec_codec):
+        try:
+            return factory()
+        except ImportError:
+            continue
+    return STDLIB_CODEC
@@ -1,5 +1,6 @@
 from .base import *  # noqa
 from .factory import *  # noqa
 from .physical import *  # noqa
+from .registry import *  # noqa
 from .remote import *  # noqa
 from .status import *  # noqa
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from switchbot_client import SwitchBotClient
@@ -32,16 +32,67 @@ class SwitchBotDeviceBase:
 class SwitchBotDevice(ABC, SwitchBotDeviceBase):
     def command(
         self, command: str, parameter: str = None, command_type: str = None
+    ) -> SwitchBotCommandResult:
+        coalescer = self.client.command_coalescer
+        if coalescer is not None and coalescer.accepts(command):
+            return coalescer.submit(self, command, parameter, command_type).result()
+        return self._send_command(command, parameter, command_type)
+
+    def _send_command(
+        self, command: str, parameter: Optional[str], command_type: Optional[str]
+    ) -> SwitchBotCommandResult:
+        dispatcher = self.client.ir_dispatcher
+        if dispatcher is not None and self.is_virtual_infrared:
+            return dispatcher.submit(self, command, parameter, command_type).result()
+        return self._post_command(command, parameter, command_type)
+
+    def _post_command(
+        self, command: str, parameter: Optional[str], command_type: Optional[str]
     ) -> SwitchBotCommandResult:
         response = self.client.api_client.devices_commands(
             self.device_id, command, parameter, command_type
         )
-        return SwitchBotCommandResult(response.status_code, response.message, response.body)
+        result = SwitchBotCommandResult(response.status_code, response.message, response.body)
+        self._after_command(command, parameter, result)
+        return result
 
     @abstractmethod
     def status(self) -> DeviceStatus:
         pass
 
+    def _after_command(
+        self, command: str, parameter: Optional[str], result: SwitchBotCommandResult
+    ):  # pylint: disable=unused-argument
+        """
+        Called with the result of every command sent through the device object.
+        """
+        self.client.invalidate_status(self.device_id)
+
+    def _reconcile_commands(  # pylint: disable=unused-argument
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Returns the fewest (command, parameter) pairs which bring the device to the desired state.
+        current: the status or the pseudo status of the device
+        changes: status fields whose desired values differ from current, and those values
+        """
+        if changes:
+            raise RuntimeError(f"cannot reconcile {', '.join(changes)} of {self.device_type}")
+        return []
+
+    def _skip_if_satisfied(self, satisfied: bool) -> Optional[SwitchBotCommandResult]:
+        """
+        Returns a result to be returned instead of sending a command,
+        if the client skips satisfied commands and the device is already in the requested state.
+        """
+        if not satisfied or not self.client.skip_satisfied_commands:
+            return None
+        self.client.record_saved_call()
+        return self._skipped_result(SwitchBotCommandResult(100, "success", {}, skipped=True))
+
+    def _skipped_result(self, result: SwitchBotCommandResult):
+        return result
+
     def __repr__(self):
         data = {
             "device_id": self.device_id,
@@ -58,3 +109,8 @@ class SwitchBotCommandResult:
     status_code: int
     message: str
     response_body: dict
+    # True if the command was not sent because the device was already in the requested state
+    skipped: bool = False
+    # True if the command was replaced by a later command of the same kind before it was sent,
+    # the result is the one of that command
+    coalesced: bool = False
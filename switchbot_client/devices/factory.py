@@ -1,10 +1,8 @@
 from __future__ import annotations
 
-import logging
 from typing import TYPE_CHECKING, Optional, Union
 
-from .physical import SwitchBotPhysicalDevice
-from .remote import SwitchBotRemoteDevice
+from .registry import DEVICE_REGISTRY
 
 if TYPE_CHECKING:
     from switchbot_client import SwitchBotClient
@@ -18,9 +16,7 @@ class SwitchBotDeviceFactory:
         client: SwitchBotClient,
         api_object: Union[APIPhysicalDeviceObject, APIRemoteDeviceObject],
     ) -> Optional[SwitchBotDevice]:
-        if "deviceType" in api_object:
-            return SwitchBotPhysicalDevice.create_by_api_object(client, api_object)  # type: ignore
-        if "remoteType" in api_object:
-            return SwitchBotRemoteDevice.create_by_api_object(client, api_object)  # type: ignore
-        logging.warning("invalid device object: %s", api_object)
-        return None
+        """
+        Create the device class registered in DEVICE_REGISTRY for the type of api_object.
+        """
+        return DEVICE_REGISTRY.create(client, api_object)
@@ -1,8 +1,22 @@
+# pylint: disable=too-many-lines
 from __future__ import annotations
 
-import logging
 from abc import abstractmethod
-from typing import TYPE_CHECKING, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
 
 from switchbot_client.devices.status import (
     BotDeviceStatus,
@@ -26,12 +40,27 @@ from switchbot_client.enums import ControlCommand, DeviceType
 from switchbot_client.types import APIPhysicalDeviceObject
 
 from .base import SwitchBotCommandResult, SwitchBotDevice
+from .registry import DEVICE_REGISTRY
 
 if TYPE_CHECKING:
     from switchbot_client import SwitchBotClient
 
 
-class SwitchBotPhysicalDevice(SwitchBotDevice):
+AnyDeviceStatus = TypeVar("AnyDeviceStatus", bound=DeviceStatus)
+
+# raw statuses of the devices in an active snapshot() block, keyed by device id
+_status_snapshots: ContextVar[Dict[str, dict]] = ContextVar("status_snapshots", default={})
+
+
+def _rgb(color_hex: str) -> str:
+    """
+    Converts a #rrggbb color to the r:g:b parameter of setColor.
+    """
+    rgb = [int(color_hex.lstrip("#")[i : i + 2], 16) for i in (0, 2, 4)]
+    return f"{rgb[0]}:{rgb[1]}:{rgb[2]}"
+
+
+class SwitchBotPhysicalDevice(SwitchBotDevice, Generic[AnyDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         device_id = device["deviceId"]
         device_type = device["deviceType"]
@@ -41,66 +70,10 @@ class SwitchBotPhysicalDevice(SwitchBotDevice):
         self.device = device
 
     @staticmethod
-    def create_by_api_object(  # noqa
+    def create_by_api_object(
         client: SwitchBotClient, device: APIPhysicalDeviceObject
     ) -> Optional[SwitchBotPhysicalDevice]:
-        # pylint: disable=too-many-branches,too-many-return-statements
-        device_type = device["deviceType"]
-        if device_type == DeviceType.HUB:
-            return Hub(client, device)
-        if device_type == DeviceType.HUB_MINI:
-            return HubMini(client, device)
-        if device_type == DeviceType.HUB_PLUS:
-            return HubPlus(client, device)
-        if device_type == DeviceType.BOT:
-            return Bot(client, device)
-        if device_type == DeviceType.PLUG:
-            return Plug(client, device)
-        if device_type == DeviceType.PLUG_MINI_US:
-            return PlugMiniUs(client, device)
-        if device_type == DeviceType.PLUG_MINI_JP:
-            return PlugMiniJp(client, device)
-        if device_type == DeviceType.CURTAIN:
-            return Curtain(client, device)
-        if device_type == DeviceType.METER:
-            return Meter(client, device)
-        if device_type == DeviceType.METER_PLUS:
-            return MeterPlus(client, device)
-        if device_type == DeviceType.MOTION_SENSOR:
-            return MotionSensor(client, device)
-        if device_type == DeviceType.CONTACT_SENSOR:
-            return ContactSensor(client, device)
-        if device_type == DeviceType.COLOR_BULB:
-            return ColorBulb(client, device)
-        if device_type == DeviceType.HUMIDIFIER:
-            return Humidifier(client, device)
-        if device_type == DeviceType.SMART_FAN:
-            return SmartFan(client, device)
-        if device_type == DeviceType.STRIP_LIGHT:
-            return StripLight(client, device)
-        if device_type == DeviceType.CEILING_LIGHT:
-            pass
-        if device_type == DeviceType.CEILING_LIGHT_PRO:
-            pass
-        if device_type == DeviceType.INDOOR_CAM:
-            return IndoorCam(client, device)
-        if device_type == DeviceType.PAN_TILT_CAM:
-            pass
-        if device_type == DeviceType.REMOTE:
-            return Remote(client, device)
-        if device_type == DeviceType.LOCK:
-            return Lock(client, device)
-        if device_type == DeviceType.KEYPAD:
-            pass
-        if device_type == DeviceType.KEYPAD_TOUCH:
-            pass
-        if device_type == DeviceType.ROBOT_VACUUM_CLEANER_S1:
-            return RobotVacuumCleanerS1(client, device)
-        if device_type == DeviceType.ROBOT_VACUUM_CLEANER_S1_PLUS:
-            return RobotVacuumCleanerS1Plus(client, device)
-
-        logging.warning("invalid physical device object %s", device)
-        return None
+        return DEVICE_REGISTRY.create_physical(client, device)  # type: ignore[return-value]
 
     @staticmethod
     def get_device_by_id(client: SwitchBotClient, device_id: str) -> APIPhysicalDeviceObject:
@@ -108,22 +81,116 @@ class SwitchBotPhysicalDevice(SwitchBotDevice):
             raise TypeError
         if device_id is None:
             raise TypeError
-        response = client.api_client.devices()
-        physical_devices = response.body["deviceList"]
+        physical_devices = client.inventory()["deviceList"]
         for device in physical_devices:
             if device["deviceId"] == device_id:
                 return device
         raise RuntimeError(f"device not found: {device_id}")
 
-    def status(self) -> DeviceStatus:
-        status = self.client.api_client.devices_status(self.device_id).body
-        return DeviceStatus(
-            device_id=status["deviceId"] if "deviceId" in status else self.device_id,
-            device_type=status["deviceType"] if "deviceType" in status else self.device_type,
-            device_name=status["deviceName"] if "deviceName" in status else self.device_name,
-            hub_device_id=status["hubDeviceId"] if "hubDeviceId" in status else self.hub_device_id,
-            raw_data=status,
+    def status(self, max_age: float = None) -> AnyDeviceStatus:
+        """
+        max_age: accept a cached status up to this age in seconds instead of the status_ttl
+            of the client, 0 always calls the API
+        Inside a snapshot() block the status of the snapshot is returned.
+        """
+        raw_data = self._snapshot_status()
+        if raw_data is None:
+            raw_data = self._fetch_status(max_age)
+        return self._parse_status(raw_data)
+
+    @contextmanager
+    def snapshot(self, max_age: float = None) -> Iterator[AnyDeviceStatus]:
+        """
+        Fetch the status once and serve every accessor call inside the with block from it,
+        so that all values read in the block come from the same point in time.
+            with plug.snapshot():
+                voltage, current = plug.voltage(), plug.electric_current()
+        """
+        raw_data = self._fetch_status(max_age)
+        token = self._enter_snapshot(raw_data)
+        try:
+            yield self._parse_status(raw_data)
+        finally:
+            _status_snapshots.reset(token)
+
+    def read(self, fields: Iterable[str], max_age: float = None) -> Dict[str, Any]:
+        """
+        Read several status fields from one status fetch.
+        fields: attribute names of the status class, e.g. ["voltage", "electric_current"]
+        """
+        status = self.status(max_age)
+        return {field: getattr(status, field) for field in fields}
+
+    def _snapshot_status(self) -> Optional[dict]:
+        return _status_snapshots.get().get(self.device_id)
+
+    def _known_value(self, key: str) -> Any:
+        """
+        Returns a value of the snapshot or the cached status without calling the API,
+        or None if the status is not known.
+        """
+        raw_data = self._snapshot_status() or self.client.status_cache.get(self.device_id)
+        if raw_data is None:
+            return None
+        return raw_data.get(key)
+
+    def _is_known_power(self, power: str) -> bool:
+        known = self._known_value("power")
+        return known is not None and str(known).lower() == power
+
+    def _after_command(
+        self, command: str, parameter: Optional[str], result: SwitchBotCommandResult
+    ):
+        try:
+            changes = self._optimistic_changes(command, parameter)
+        except (ValueError, IndexError):
+            changes = None
+        if self.client.optimistic_updates and result.status_code == 100 and changes is not None:
+            self.client.update_status(self.device_id, changes)
+        else:
+            self.client.invalidate_status(self.device_id)
+
+    def _optimistic_changes(  # pylint: disable=unused-argument
+        self, command: str, parameter: Optional[str]
+    ) -> Optional[dict]:
+        """
+        Returns the raw status values a successful command sets,
+        or None if its effect on the status is not known.
+        """
+        if command == ControlCommand.Common.TURN_ON:
+            return {"power": "on"}
+        if command == ControlCommand.Common.TURN_OFF:
+            return {"power": "off"}
+        if command in (
+            ControlCommand.PlugMiniUs.TOGGLE,
+            ControlCommand.PlugMiniJp.TOGGLE,
+            ControlCommand.ColorBulb.TOGGLE,
+            ControlCommand.StripLight.TOGGLE,
+        ):
+            power = self._known_value("power")
+            if power is None:
+                return None
+            return {"power": "off" if str(power).lower() == "on" else "on"}
+        return None
+
+    def _enter_snapshot(self, raw_data: dict) -> Token:
+        return _status_snapshots.set({**_status_snapshots.get(), self.device_id: raw_data})
+
+    def _fetch_status(self, max_age: float = None) -> dict:
+        raw_data = self.client.status_cache.get(self.device_id, max_age)
+        if raw_data is None:
+            raw_data = self.client.refresh_status(self.device_id)
+        return raw_data
+
+    def _parse_status(self, raw_data: dict) -> AnyDeviceStatus:
+        status = DeviceStatus(
+            device_id=raw_data.get("deviceId", self.device_id),
+            device_type=raw_data.get("deviceType", self.device_type),
+            device_name=raw_data.get("deviceName", self.device_name),
+            hub_device_id=raw_data.get("hubDeviceId", self.hub_device_id),
+            raw_data=raw_data,
         )
+        return cast(AnyDeviceStatus, status)
 
     def _check_device_type(self, expected_device_type: str):
         if self.device_type != expected_device_type:
@@ -133,11 +200,17 @@ class SwitchBotPhysicalDevice(SwitchBotDevice):
             )
 
 
-class SwitchBotPhysicalControllableDevice(SwitchBotPhysicalDevice):
+class SwitchBotPhysicalControllableDevice(SwitchBotPhysicalDevice[AnyDeviceStatus]):
     def turn_on(self) -> SwitchBotCommandResult:
+        skipped = self._skip_if_satisfied(self._is_known_power("on"))
+        if skipped is not None:
+            return skipped
         return self.command(ControlCommand.Common.TURN_ON)
 
     def turn_off(self) -> SwitchBotCommandResult:
+        skipped = self._skip_if_satisfied(self._is_known_power("off"))
+        if skipped is not None:
+            return skipped
         return self.command(ControlCommand.Common.TURN_OFF)
 
     def toggle(self) -> SwitchBotCommandResult:
@@ -145,6 +218,28 @@ class SwitchBotPhysicalControllableDevice(SwitchBotPhysicalDevice):
             return self.turn_off()
         return self.turn_on()
 
+    def _reconcile_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        setters = dict(changes)
+        power = setters.pop("power", None)
+        commands = self._reconcile_setter_commands(current, setters)
+        if power is None:
+            return commands
+        if str(power).lower() == "on":
+            return [(ControlCommand.Common.TURN_ON, None)] + commands
+        if str(power).lower() == "off":
+            return commands + [(ControlCommand.Common.TURN_OFF, None)]
+        raise RuntimeError(f"invalid power: {power}")
+
+    def _reconcile_setter_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Returns the commands setting the changed fields other than power.
+        """
+        return super()._reconcile_commands(current, changes)
+
     @abstractmethod
     def is_turned_on(self) -> bool:
         pass
@@ -183,7 +278,7 @@ class HubPlus(SwitchBotPhysicalDevice):
         return HubPlus(client, device)
 
 
-class Bot(SwitchBotPhysicalControllableDevice):
+class Bot(SwitchBotPhysicalControllableDevice[BotDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.BOT)
@@ -193,8 +288,8 @@ class Bot(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return Bot(client, device)
 
-    def status(self) -> BotDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> BotDeviceStatus:
+        status = super()._parse_status(raw_data)
         return BotDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -214,7 +309,7 @@ class Bot(SwitchBotPhysicalControllableDevice):
         return self.command(ControlCommand.Bot.PRESS)
 
 
-class Plug(SwitchBotPhysicalControllableDevice):
+class Plug(SwitchBotPhysicalControllableDevice[PlugDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.PLUG)
@@ -224,8 +319,8 @@ class Plug(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return Plug(client, device)
 
-    def status(self) -> PlugDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> PlugDeviceStatus:
+        status = super()._parse_status(raw_data)
         return PlugDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -242,7 +337,7 @@ class Plug(SwitchBotPhysicalControllableDevice):
         return self.power().lower() == "on"
 
 
-class PlugMiniUs(SwitchBotPhysicalControllableDevice):
+class PlugMiniUs(SwitchBotPhysicalControllableDevice[PlugMiniUsDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.PLUG_MINI_US)
@@ -252,8 +347,8 @@ class PlugMiniUs(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return PlugMiniUs(client, device)
 
-    def status(self) -> PlugMiniUsDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> PlugMiniUsDeviceStatus:
+        status = super()._parse_status(raw_data)
         return PlugMiniUsDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -289,7 +384,7 @@ class PlugMiniUs(SwitchBotPhysicalControllableDevice):
         return self.command(ControlCommand.PlugMiniUs.TOGGLE)
 
 
-class PlugMiniJp(SwitchBotPhysicalControllableDevice):
+class PlugMiniJp(SwitchBotPhysicalControllableDevice[PlugMiniJpDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.PLUG_MINI_JP)
@@ -299,8 +394,8 @@ class PlugMiniJp(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return PlugMiniJp(client, device)
 
-    def status(self) -> PlugMiniJpDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> PlugMiniJpDeviceStatus:
+        status = super()._parse_status(raw_data)
         return PlugMiniJpDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -336,7 +431,7 @@ class PlugMiniJp(SwitchBotPhysicalControllableDevice):
         return self.command(ControlCommand.PlugMiniJp.TOGGLE)
 
 
-class Curtain(SwitchBotPhysicalControllableDevice):
+class Curtain(SwitchBotPhysicalControllableDevice[CurtainDeviceStatus]):
     class Parameters:
         MODE_PERFORMANCE = "0"
         MODE_SILENT = "1"
@@ -351,8 +446,8 @@ class Curtain(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return Curtain(client, device)
 
-    def status(self) -> CurtainDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> CurtainDeviceStatus:
+        status = super()._parse_status(raw_data)
         return CurtainDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -389,8 +484,28 @@ class Curtain(SwitchBotPhysicalControllableDevice):
             ControlCommand.Curtain.SET_POSITION, parameter=f"{index},{mode},{position}"
         )
 
+    def _optimistic_changes(self, command: str, parameter: Optional[str]) -> Optional[dict]:
+        if command == ControlCommand.Curtain.SET_POSITION and parameter is not None:
+            return {"slide_position": int(parameter.split(",")[2])}
+        return None
+
+    def _reconcile_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        setters = dict(changes)
+        position = setters.pop("slide_position", None)
+        commands = super()._reconcile_setter_commands(current, setters)
+        if position is not None:
+            commands.append(
+                (
+                    ControlCommand.Curtain.SET_POSITION,
+                    f"0,{Curtain.Parameters.MODE_DEFAULT},{position}",
+                )
+            )
+        return commands
+
 
-class Meter(SwitchBotPhysicalDevice):
+class Meter(SwitchBotPhysicalDevice[MeterDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.METER)
@@ -400,8 +515,8 @@ class Meter(SwitchBotPhysicalDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return Meter(client, device)
 
-    def status(self) -> MeterDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> MeterDeviceStatus:
+        status = super()._parse_status(raw_data)
         return MeterDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -419,7 +534,7 @@ class Meter(SwitchBotPhysicalDevice):
         return self.status().humidity
 
 
-class MeterPlus(SwitchBotPhysicalDevice):
+class MeterPlus(SwitchBotPhysicalDevice[MeterPlusDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.METER_PLUS)
@@ -429,8 +544,8 @@ class MeterPlus(SwitchBotPhysicalDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return MeterPlus(client, device)
 
-    def status(self) -> MeterPlusDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> MeterPlusDeviceStatus:
+        status = super()._parse_status(raw_data)
         return MeterPlusDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -448,7 +563,7 @@ class MeterPlus(SwitchBotPhysicalDevice):
         return self.status().humidity
 
 
-class MotionSensor(SwitchBotPhysicalDevice):
+class MotionSensor(SwitchBotPhysicalDevice[MotionSensorDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.MOTION_SENSOR)
@@ -458,8 +573,8 @@ class MotionSensor(SwitchBotPhysicalDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return MotionSensor(client, device)
 
-    def status(self) -> MotionSensorDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> MotionSensorDeviceStatus:
+        status = super()._parse_status(raw_data)
         return MotionSensorDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -477,7 +592,7 @@ class MotionSensor(SwitchBotPhysicalDevice):
         return self.status().is_move_detected
 
 
-class ContactSensor(SwitchBotPhysicalDevice):
+class ContactSensor(SwitchBotPhysicalDevice[ContactSensorDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.CONTACT_SENSOR)
@@ -487,8 +602,8 @@ class ContactSensor(SwitchBotPhysicalDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return ContactSensor(client, device)
 
-    def status(self) -> ContactSensorDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> ContactSensorDeviceStatus:
+        status = super()._parse_status(raw_data)
         return ContactSensorDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -510,7 +625,7 @@ class ContactSensor(SwitchBotPhysicalDevice):
         return self.status().is_move_detected
 
 
-class ColorBulb(SwitchBotPhysicalControllableDevice):
+class ColorBulb(SwitchBotPhysicalControllableDevice[ColorBulbDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.COLOR_BULB)
@@ -520,8 +635,8 @@ class ColorBulb(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return ColorBulb(client, device)
 
-    def status(self) -> ColorBulbDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> ColorBulbDeviceStatus:
+        status = super()._parse_status(raw_data)
         colors = [int(i) for i in status.raw_data["color"].split(":")]
         color_hex = f"#{colors[0]:02x}{colors[1]:02x}{colors[2]:02x}"
         return ColorBulbDeviceStatus(
@@ -558,6 +673,9 @@ class ColorBulb(SwitchBotPhysicalControllableDevice):
         """
         brightness: 1 ~ 100
         """
+        skipped = self._skip_if_satisfied(self._known_value("brightness") == brightness)
+        if skipped is not None:
+            return skipped
         return self.command(ControlCommand.ColorBulb.SET_BRIGHTNESS, parameter=f"{brightness}")
 
     def set_color_by_number(self, red: int, green: int, blue: int) -> SwitchBotCommandResult:
@@ -566,6 +684,9 @@ class ColorBulb(SwitchBotPhysicalControllableDevice):
         green: 0 ~ 255
         blue: 0 ~ 255
         """
+        skipped = self._skip_if_satisfied(self._known_value("color") == f"{red}:{green}:{blue}")
+        if skipped is not None:
+            return skipped
         return self.command(ControlCommand.ColorBulb.SET_COLOR, parameter=f"{red}:{green}:{blue}")
 
     def set_color(self, color_hex: str) -> SwitchBotCommandResult:
@@ -576,12 +697,44 @@ class ColorBulb(SwitchBotPhysicalControllableDevice):
         """
         temperature: 2700 ~ 6500
         """
+        skipped = self._skip_if_satisfied(self._known_value("colorTemperature") == temperature)
+        if skipped is not None:
+            return skipped
         return self.command(
             ControlCommand.ColorBulb.SET_COLOR_TEMPERATURE, parameter=f"{temperature}"
         )
 
+    def _optimistic_changes(self, command: str, parameter: Optional[str]) -> Optional[dict]:
+        if command == ControlCommand.ColorBulb.SET_BRIGHTNESS and parameter is not None:
+            return {"brightness": int(parameter)}
+        if command == ControlCommand.ColorBulb.SET_COLOR and parameter is not None:
+            return {"color": parameter}
+        if command == ControlCommand.ColorBulb.SET_COLOR_TEMPERATURE and parameter is not None:
+            return {"colorTemperature": int(parameter)}
+        return super()._optimistic_changes(command, parameter)
+
+    def _reconcile_setter_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        setters = dict(changes)
+        commands = []
+        if "brightness" in setters:
+            commands.append(
+                (ControlCommand.ColorBulb.SET_BRIGHTNESS, f"{setters.pop('brightness')}")
+            )
+        if "color_hex" in setters:
+            commands.append((ControlCommand.ColorBulb.SET_COLOR, _rgb(setters.pop("color_hex"))))
+        if "color_temperature" in setters:
+            commands.append(
+                (
+                    ControlCommand.ColorBulb.SET_COLOR_TEMPERATURE,
+                    f"{setters.pop('color_temperature')}",
+                )
+            )
+        return super()._reconcile_setter_commands(current, setters) + commands
+
 
-class Humidifier(SwitchBotPhysicalControllableDevice):
+class Humidifier(SwitchBotPhysicalControllableDevice[HumidifierDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.HUMIDIFIER)
@@ -591,8 +744,8 @@ class Humidifier(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return Humidifier(client, device)
 
-    def status(self) -> HumidifierDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> HumidifierDeviceStatus:
+        status = super()._parse_status(raw_data)
         return HumidifierDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -652,8 +805,31 @@ class Humidifier(SwitchBotPhysicalControllableDevice):
     def set_auto_mode(self) -> SwitchBotCommandResult:
         return self.set_mode("auto")
 
-
-class SmartFan(SwitchBotPhysicalControllableDevice):
+    def _optimistic_changes(self, command: str, parameter: Optional[str]) -> Optional[dict]:
+        if command == ControlCommand.Humidifier.SET_MODE and parameter is not None:
+            if parameter == "auto":
+                return {"auto": True}
+            efficiency = {"101": 34, "102": 67, "103": 100}.get(parameter, parameter)
+            return {"nebulizationEfficiency": int(efficiency), "auto": False}
+        return super()._optimistic_changes(command, parameter)
+
+    def _reconcile_setter_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        setters = dict(changes)
+        is_auto = setters.pop("is_auto", None)
+        efficiency = setters.pop("atomization_efficiency", None)
+        commands = super()._reconcile_setter_commands(current, setters)
+        if is_auto:
+            commands.append((ControlCommand.Humidifier.SET_MODE, "auto"))
+        elif efficiency is not None or is_auto is not None:
+            if efficiency is None:
+                efficiency = current.atomization_efficiency
+            commands.append((ControlCommand.Humidifier.SET_MODE, f"{efficiency}"))
+        return commands
+
+
+class SmartFan(SwitchBotPhysicalControllableDevice[SmartFanDeviceStatus]):
     class Parameters:
         POWER_ON = "on"
         POWER_OFF = "off"
@@ -669,8 +845,8 @@ class SmartFan(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return SmartFan(client, device)
 
-    def status(self) -> SmartFanDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> SmartFanDeviceStatus:
+        status = super()._parse_status(raw_data)
         return SmartFanDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -756,8 +932,40 @@ class SmartFan(SwitchBotPhysicalControllableDevice):
             parameter=f"on,{fan_mode},{fan_speed},{shake_range}",
         )
 
+    def _optimistic_changes(self, command: str, parameter: Optional[str]) -> Optional[dict]:
+        if command == ControlCommand.SmartFan.SET_ALL_STATUS and parameter is not None:
+            power, fan_mode, fan_speed, shake_range = parameter.split(",")
+            return {
+                "power": power,
+                "mode": int(fan_mode),
+                "speed": int(fan_speed),
+                "shakeRange": int(shake_range),
+            }
+        return super()._optimistic_changes(command, parameter)
+
+    def _reconcile_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Every changed field is set by one setAllStatus command.
+        """
+        setters = dict(changes)
+        fields = {
+            key: setters.pop(key, getattr(current, key))
+            for key in ["power", "mode", "speed", "shake_range"]
+        }
+        super()._reconcile_setter_commands(current, setters)
+        if not changes:
+            return []
+        return [
+            (
+                ControlCommand.SmartFan.SET_ALL_STATUS,
+                f"{fields['power']},{fields['mode']},{fields['speed']},{fields['shake_range']}",
+            )
+        ]
+
 
-class StripLight(SwitchBotPhysicalControllableDevice):
+class StripLight(SwitchBotPhysicalControllableDevice[StripLightDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.STRIP_LIGHT)
@@ -767,8 +975,8 @@ class StripLight(SwitchBotPhysicalControllableDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return StripLight(client, device)
 
-    def status(self) -> StripLightDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> StripLightDeviceStatus:
+        status = super()._parse_status(raw_data)
         colors = [int(i) for i in status.raw_data["color"].split(":")]
         color_hex = f"#{colors[0]:02x}{colors[1]:02x}{colors[2]:02x}"
         return StripLightDeviceStatus(
@@ -804,6 +1012,9 @@ class StripLight(SwitchBotPhysicalControllableDevice):
         """
         brightness: 1 ~ 100
         """
+        skipped = self._skip_if_satisfied(self._known_value("brightness") == brightness)
+        if skipped is not None:
+            return skipped
         return self.command(ControlCommand.StripLight.SET_BRIGHTNESS, parameter=f"{brightness}")
 
     def set_color_by_number(self, red: int, green: int, blue: int) -> SwitchBotCommandResult:
@@ -812,12 +1023,35 @@ class StripLight(SwitchBotPhysicalControllableDevice):
         green: 0 ~ 255
         blue: 0 ~ 255
         """
+        skipped = self._skip_if_satisfied(self._known_value("color") == f"{red}:{green}:{blue}")
+        if skipped is not None:
+            return skipped
         return self.command(ControlCommand.StripLight.SET_COLOR, parameter=f"{red}:{green}:{blue}")
 
     def set_color(self, color_hex: str) -> SwitchBotCommandResult:
         rgb = tuple(int(color_hex.lstrip("#")[i : i + 2], 16) for i in (0, 2, 4))
         return self.set_color_by_number(rgb[0], rgb[1], rgb[2])
 
+    def _optimistic_changes(self, command: str, parameter: Optional[str]) -> Optional[dict]:
+        if command == ControlCommand.StripLight.SET_BRIGHTNESS and parameter is not None:
+            return {"brightness": int(parameter)}
+        if command == ControlCommand.StripLight.SET_COLOR and parameter is not None:
+            return {"color": parameter}
+        return super()._optimistic_changes(command, parameter)
+
+    def _reconcile_setter_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        setters = dict(changes)
+        commands = []
+        if "brightness" in setters:
+            commands.append(
+                (ControlCommand.StripLight.SET_BRIGHTNESS, f"{setters.pop('brightness')}")
+            )
+        if "color_hex" in setters:
+            commands.append((ControlCommand.StripLight.SET_COLOR, _rgb(setters.pop("color_hex"))))
+        return super()._reconcile_setter_commands(current, setters) + commands
+
 
 class IndoorCam(SwitchBotPhysicalDevice):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
@@ -841,7 +1075,7 @@ class Remote(SwitchBotPhysicalDevice):
         return Remote(client, device)
 
 
-class Lock(SwitchBotPhysicalDevice):
+class Lock(SwitchBotPhysicalDevice[LockDeviceStatus]):
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
         self._check_device_type(DeviceType.LOCK)
@@ -851,8 +1085,8 @@ class Lock(SwitchBotPhysicalDevice):
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return Lock(client, device)
 
-    def status(self) -> LockDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> LockDeviceStatus:
+        status = super()._parse_status(raw_data)
         return LockDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -874,18 +1108,21 @@ class Lock(SwitchBotPhysicalDevice):
         return self.status().door_state
 
 
-class RobotVacuumCleanerS1(SwitchBotPhysicalDevice):
+class RobotVacuumCleanerS1(SwitchBotPhysicalDevice[RobotVacuumCleanerDeviceStatus]):
+    # checked by __init__, so that RobotVacuumCleanerS1Plus can reuse it for its own type
+    EXPECTED_DEVICE_TYPE = DeviceType.ROBOT_VACUUM_CLEANER_S1
+
     def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
         super().__init__(client, device)
-        self._check_device_type(DeviceType.ROBOT_VACUUM_CLEANER_S1)
+        self._check_device_type(self.EXPECTED_DEVICE_TYPE)
 
     @staticmethod
     def create_by_id(client: SwitchBotClient, device_id: str) -> RobotVacuumCleanerS1:
         device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
         return RobotVacuumCleanerS1(client, device)
 
-    def status(self) -> RobotVacuumCleanerDeviceStatus:
-        status = super().status()
+    def _parse_status(self, raw_data: dict) -> RobotVacuumCleanerDeviceStatus:
+        status = super()._parse_status(raw_data)
         return RobotVacuumCleanerDeviceStatus(
             device_id=status.device_id,
             device_type=status.device_type,
@@ -920,6 +1157,35 @@ class RobotVacuumCleanerS1(SwitchBotPhysicalDevice):
 
 
 class RobotVacuumCleanerS1Plus(RobotVacuumCleanerS1):
-    def __init__(self, client: SwitchBotClient, device: APIPhysicalDeviceObject):
-        super().__init__(client, device)
-        self._check_device_type(DeviceType.ROBOT_VACUUM_CLEANER_S1_PLUS)
+    EXPECTED_DEVICE_TYPE = DeviceType.ROBOT_VACUUM_CLEANER_S1_PLUS
+
+    @staticmethod
+    def create_by_id(client: SwitchBotClient, device_id: str) -> RobotVacuumCleanerS1Plus:
+        device = SwitchBotPhysicalDevice.get_device_by_id(client, device_id)
+        return RobotVacuumCleanerS1Plus(client, device)
+
+
+for _device_type, _device_class in (
+    (DeviceType.HUB, Hub),
+    (DeviceType.HUB_MINI, HubMini),
+    (DeviceType.HUB_PLUS, HubPlus),
+    (DeviceType.BOT, Bot),
+    (DeviceType.PLUG, Plug),
+    (DeviceType.PLUG_MINI_US, PlugMiniUs),
+    (DeviceType.PLUG_MINI_JP, PlugMiniJp),
+    (DeviceType.CURTAIN, Curtain),
+    (DeviceType.METER, Meter),
+    (DeviceType.METER_PLUS, MeterPlus),
+    (DeviceType.MOTION_SENSOR, MotionSensor),
+    (DeviceType.CONTACT_SENSOR, ContactSensor),
+    (DeviceType.COLOR_BULB, ColorBulb),
+    (DeviceType.HUMIDIFIER, Humidifier),
+    (DeviceType.SMART_FAN, SmartFan),
+    (DeviceType.STRIP_LIGHT, StripLight),
+    (DeviceType.INDOOR_CAM, IndoorCam),
+    (DeviceType.REMOTE, Remote),
+    (DeviceType.LOCK, Lock),
+    (DeviceType.ROBOT_VACUUM_CLEANER_S1, RobotVacuumCleanerS1),
+    (DeviceType.ROBOT_VACUUM_CLEANER_S1_PLUS, RobotVacuumCleanerS1Plus),
+):
+    DEVICE_REGISTRY.register_physical(_device_type, _device_class)
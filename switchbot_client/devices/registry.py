@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    from switchbot_client.devices.base import SwitchBotDevice
+
+DeviceClass = Callable[[Any, Any], "SwitchBotDevice"]
+
+ENTRY_POINT_GROUP = "switchbot_client.devices"
+ASYNC_ENTRY_POINT_GROUP = "switchbot_client.aio.devices"
+
+
+def _entry_points(group: str) -> Iterable[Any]:
+    try:
+        from importlib import metadata  # pylint: disable=import-outside-toplevel
+    except ImportError:  # python 3.7
+        return []
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=group)
+    return entry_points.get(group, [])  # type: ignore[attr-defined]
+
+
+class SwitchBotDeviceRegistry:
+    """
+    Maps the deviceType of physical devices and the remoteType of infrared remote devices
+    to the classes created for them, so the factories find a class with a single lookup.
+    Plugins add classes for new types with register_physical() and register_remote(),
+    or through an entry point in entry_point_group naming a function which takes the registry.
+    The entry points are loaded on the first lookup.
+    entry_point_group: the entry point group of the plugins
+    """
+
+    def __init__(self, entry_point_group: Optional[str] = ENTRY_POINT_GROUP) -> None:
+        self.entry_point_group = entry_point_group
+        self._physical: Dict[str, DeviceClass] = {}
+        self._remote: Dict[str, DeviceClass] = {}
+        self._plugins_loaded = entry_point_group is None
+        self._plugins_loading = False
+        self._lock = threading.RLock()
+
+    def register_physical(self, device_type: str, device_class: DeviceClass, replace: bool = False):
+        """
+        Create device_class(client, api_object) for physical devices of device_type.
+        replace: replace a class already registered for device_type instead of raising an error
+        """
+        self._register(self._physical, device_type, device_class, replace)
+
+    def register_remote(self, remote_type: str, device_class: DeviceClass, replace: bool = False):
+        """
+        Create device_class(client, api_object) for infrared remote devices of remote_type.
+        replace: replace a class already registered for remote_type instead of raising an error
+        """
+        self._register(self._remote, remote_type, device_class, replace)
+
+    def physical_class(self, device_type: str) -> Optional[DeviceClass]:
+        self._load_plugins()
+        return self._physical.get(device_type)
+
+    def remote_class(self, remote_type: str) -> Optional[DeviceClass]:
+        self._load_plugins()
+        return self._remote.get(remote_type)
+
+    def physical_classes(self) -> Dict[str, DeviceClass]:
+        """
+        The classes registered so far by device type, without loading the entry points.
+        """
+        return dict(self._physical)
+
+    def remote_classes(self) -> Dict[str, DeviceClass]:
+        """
+        The classes registered so far by remote type, without loading the entry points.
+        """
+        return dict(self._remote)
+
+    def create_physical(self, client: Any, device: Any) -> Optional[SwitchBotDevice]:
+        device_class = self.physical_class(device["deviceType"])
+        if device_class is None:
+            logging.warning("invalid physical device object %s", device)
+            return None
+        return device_class(client, device)
+
+    def create_remote(self, client: Any, device: Any) -> Optional[SwitchBotDevice]:
+        device_class = self.remote_class(device["remoteType"])
+        if device_class is None:
+            logging.warning("invalid remote device object: %s", device)
+            return None
+        return device_class(client, device)
+
+    def create(self, client: Any, api_object: Any) -> Optional[SwitchBotDevice]:
+        if "deviceType" in api_object:
+            return self.create_physical(client, api_object)
+        if "remoteType" in api_object:
+            return self.create_remote(client, api_object)
+        logging.warning("invalid device object: %s", api_object)
+        return None
+
+    def _register(
+        self, classes: Dict[str, DeviceClass], key: str, device_class: DeviceClass, replace: bool
+    ):
+        with self._lock:
+            if not replace and key in classes and classes[key] is not device_class:
+                raise RuntimeError(f"device type already registered: {key}, {classes[key]}")
+            classes[key] = device_class
+
+    def _load_plugins(self):
+        if self._plugins_loaded:
+            return
+        with self._lock:
+            if self._plugins_loaded or self._plugins_loading:
+                # loaded, or a plugin of this thread is looking up a class while being loaded
+                return
+            self._plugins_loading = True
+            try:
+                for entry_point in _entry_points(self.entry_point_group):  # type: ignore[arg-type]
+                    try:
+                        entry_point.load()(self)
+                    except Exception:  # pylint: disable=broad-except
+                        logging.exception("failed to load device plugin %s", entry_point.name)
+            finally:
+                self._plugins_loading = False
+            # only set after every plugin has registered, lookups of other threads
+            # skip the lock once it is set
+            self._plugins_loaded = True
+
+
+DEVICE_REGISTRY = SwitchBotDeviceRegistry()
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-import logging
-from typing import TYPE_CHECKING, Generic, Optional, TypeVar
+import time
+from typing import TYPE_CHECKING, Any, Dict, Generic, List, Optional, Tuple, TypeVar
 
+from switchbot_client.dispatch import SwitchBotIRDispatcherBase
 from switchbot_client.enums import ControlCommand, RemoteType
 from switchbot_client.types import APIRemoteDeviceObject
 
 from .base import SwitchBotCommandResult, SwitchBotDevice
+from .registry import DEVICE_REGISTRY
 from .status import PseudoAirConditionerStatus, PseudoRemoteDeviceStatus
 
 if TYPE_CHECKING:
@@ -34,56 +36,76 @@ class SwitchBotRemoteDevice(SwitchBotDevice, Generic[AnyRemoteDeviceStatus]):
         self.pseudo_status = pseudo_status
         self._validate_pseudo_status()
 
+    def repeat(
+        self, command: str, times: int, parameter: str = None, command_type: str = None
+    ) -> List[SwitchBotCommandResult]:
+        """
+        Press the same button times times,
+        e.g. repeat(ControlCommand.VirtualInfrared.VOLUME_ADD, 10) raises the volume by 10.
+        With the IR dispatcher of the client the presses are queued at once and paced by it,
+        otherwise they are sent SwitchBotIRDispatcher.DEFAULT_INTERVAL seconds apart.
+        """
+        dispatcher = self.client.ir_dispatcher
+        if dispatcher is not None:
+            futures = [
+                dispatcher.submit(self, command, parameter, command_type) for _ in range(times)
+            ]
+            return [future.result() for future in futures]
+        results = []
+        for i in range(times):
+            if i > 0:
+                time.sleep(SwitchBotIRDispatcherBase.DEFAULT_INTERVAL)
+            results.append(self._post_command(command, parameter, command_type))
+        return results
+
     def turn_on(self) -> SwitchBotCommandResult:
-        response = self.command(ControlCommand.Common.TURN_ON)
-        self.pseudo_status.set_power("on")
-        return response
+        skipped = self._skip_if_satisfied(self.pseudo_status.power == "on")
+        if skipped is not None:
+            return skipped
+        return self.command(ControlCommand.Common.TURN_ON)
 
     def turn_off(self) -> SwitchBotCommandResult:
-        response = self.command(ControlCommand.Common.TURN_OFF)
-        self.pseudo_status.set_power("off")
-        return response
+        skipped = self._skip_if_satisfied(self.pseudo_status.power == "off")
+        if skipped is not None:
+            return skipped
+        return self.command(ControlCommand.Common.TURN_OFF)
 
     def status(self) -> AnyRemoteDeviceStatus:
         return self.pseudo_status
 
+    def _after_command(
+        self, command: str, parameter: Optional[str], result: SwitchBotCommandResult
+    ):
+        """
+        Applies successful commands to the pseudo status,
+        including those sent with command() directly or by execute_many and reconcile.
+        """
+        if result.status_code != 100:
+            return
+        if command == ControlCommand.Common.TURN_ON:
+            self.pseudo_status.set_power("on")
+        elif command == ControlCommand.Common.TURN_OFF:
+            self.pseudo_status.set_power("off")
+
+    def _reconcile_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        setters = dict(changes)
+        power = setters.pop("power", None)
+        commands = super()._reconcile_commands(current, setters)
+        if power is None:
+            return commands
+        if str(power).lower() == "on":
+            return [(ControlCommand.Common.TURN_ON, None)] + commands
+        if str(power).lower() == "off":
+            return commands + [(ControlCommand.Common.TURN_OFF, None)]
+        raise RuntimeError(f"invalid power: {power}")
+
     @staticmethod
-    def create_by_api_object(  # noqa
+    def create_by_api_object(
         client: SwitchBotClient, device: APIRemoteDeviceObject
     ) -> Optional[SwitchBotRemoteDevice]:
-        # pylint: disable=too-many-branches,too-many-return-statements
-        remote_type = device["remoteType"]
-        if remote_type == RemoteType.AIR_CONDITIONER:
-            return AirConditioner(client, device)
-        if remote_type == RemoteType.TV:
-            return TV(client, device)
-        if remote_type == RemoteType.LIGHT:
-            return Light(client, device)
-        if remote_type == RemoteType.IPTV_STREAMER:
-            return IPTVStreamer(client, device)
-        if remote_type == RemoteType.SET_TOP_BOX:
-            return SetTopBox(client, device)
-        if remote_type == RemoteType.DVD:
-            return DVD(client, device)
-        if remote_type == RemoteType.FAN:
-            return Fan(client, device)
-        if remote_type == RemoteType.PROJECTOR:
-            return Projector(client, device)
-        if remote_type == RemoteType.CAMERA:
-            return Camera(client, device)
-        if remote_type == RemoteType.AIR_PURIFIER:
-            return AirPurifier(client, device)
-        if remote_type == RemoteType.SPEAKER:
-            return Speaker(client, device)
-        if remote_type == RemoteType.WATER_HEATER:
-            return WaterHeater(client, device)
-        if remote_type == RemoteType.VACUUM_CLEANER:
-            return VacuumCleaner(client, device)
-        if remote_type == RemoteType.OTHERS:
-            return Others(client, device)
-
-        logging.warning("invalid remote device object: %s", device)
-        return None
+        return DEVICE_REGISTRY.create_remote(client, device)  # type: ignore[return-value]
 
     @staticmethod
     def get_device_by_id(client: SwitchBotClient, device_id: str) -> APIRemoteDeviceObject:
@@ -91,8 +113,7 @@ class SwitchBotRemoteDevice(SwitchBotDevice, Generic[AnyRemoteDeviceStatus]):
             raise TypeError
         if device_id is None:
             raise TypeError
-        response = client.api_client.devices()
-        remote_devices = response.body["infraredRemoteList"]
+        remote_devices = client.inventory()["infraredRemoteList"]
         for device in remote_devices:
             if device["deviceId"] == device_id:
                 return device
@@ -167,6 +188,14 @@ class AirConditioner(SwitchBotRemoteDevice[PseudoAirConditionerStatus]):
         fan_speed(Parameters.FAN_SPEED_XXX): 1(auto), 2(low), 3(medium), 4(high)
         power(Parameters.POWER_XXX): on, off
         """
+        status = self.pseudo_status
+        skipped = self._skip_if_satisfied(
+            status.power is not None
+            and (temperature, mode, fan_speed, power)
+            == (status.temperature, status.mode, status.fan_speed, status.power)
+        )
+        if skipped is not None:
+            return skipped
         if temperature is not None:
             self.pseudo_status.set_temperature(temperature)
         if mode is not None:
@@ -180,6 +209,50 @@ class AirConditioner(SwitchBotRemoteDevice[PseudoAirConditionerStatus]):
             parameter=f"{temperature},{mode},{fan_speed},{power}",
         )
 
+    def _after_command(
+        self, command: str, parameter: Optional[str], result: SwitchBotCommandResult
+    ):
+        super()._after_command(command, parameter, result)
+        if result.status_code != 100 or command != ControlCommand.VirtualInfrared.SET_ALL:
+            return
+        values = (parameter or "").split(",")
+        if len(values) != 4:
+            return
+        temperature, mode, fan_speed, power = values
+        if temperature != "None":
+            self.pseudo_status.set_temperature(float(temperature))
+        if mode != "None":
+            self.pseudo_status.set_mode(int(mode))
+        if fan_speed != "None":
+            self.pseudo_status.set_fan_speed(int(fan_speed))
+        if power != "None":
+            self.pseudo_status.set_power(power)
+
+    def _reconcile_commands(
+        self, current: Any, changes: Dict[str, Any]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Every changed field is set by one setAll command.
+        The pseudo status must know the fields which are not changed.
+        """
+        setters = dict(changes)
+        fields = {
+            key: setters.pop(key, getattr(current, key))
+            for key in ["temperature", "mode", "fan_speed", "power"]
+        }
+        super()._reconcile_commands(current, setters)
+        if not changes:
+            return []
+        unknown = [key for key, value in fields.items() if value is None]
+        if unknown:
+            raise RuntimeError(f"unknown {', '.join(unknown)} of {self.device_id}, specify it")
+        return [
+            (
+                ControlCommand.VirtualInfrared.SET_ALL,
+                f"{fields['temperature']},{fields['mode']},{fields['fan_speed']},{fields['power']}",
+            )
+        ]
+
     def set_temperature(self, temperature: float) -> SwitchBotCommandResult:
         """
         temperature: temperature in celsius
@@ -585,3 +658,22 @@ class Others(SwitchBotRemoteDevice):
     def create_by_id(client: SwitchBotClient, device_id: str) -> Others:
         device = SwitchBotRemoteDevice.get_device_by_id(client, device_id)
         return Others(client, device)
+
+
+for _remote_type, _device_class in (
+    (RemoteType.AIR_CONDITIONER, AirConditioner),
+    (RemoteType.TV, TV),
+    (RemoteType.LIGHT, Light),
+    (RemoteType.IPTV_STREAMER, IPTVStreamer),
+    (RemoteType.SET_TOP_BOX, SetTopBox),
+    (RemoteType.DVD, DVD),
+    (RemoteType.FAN, Fan),
+    (RemoteType.PROJECTOR, Projector),
+    (RemoteType.CAMERA, Camera),
+    (RemoteType.AIR_PURIFIER, AirPurifier),
+    (RemoteType.SPEAKER, Speaker),
+    (RemoteType.WATER_HEATER, WaterHeater),
+    (RemoteType.VACUUM_CLEANER, VacuumCleaner),
+    (RemoteType.OTHERS, Others),
+):
+    DEVICE_REGISTRY.register_remote(_remote_type, _device_class)
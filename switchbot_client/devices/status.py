@@ -162,3 +162,25 @@ class PseudoAirConditionerStatus(PseudoRemoteDeviceStatus):
     def set_fan_speed(self, fan_speed: int):
         self.fan_speed = fan_speed
         self.raw_data["fanSpeed"] = fan_speed
+
+
+@dataclass()
+class DeviceStatusMetadata:
+    """
+    Where the cached status of a device comes from.
+    source: SOURCE_API if it is the last status fetched from the API,
+        SOURCE_COMMAND if successful commands have been applied to it locally since then
+    fetched_at: time.monotonic() when the status was last fetched from the API
+    updated_at: time.monotonic() when the status was last changed by a fetch or a command
+    """
+
+    SOURCE_API = "api"
+    SOURCE_COMMAND = "command"
+
+    source: str
+    fetched_at: float
+    updated_at: float
+
+    @property
+    def is_optimistic(self) -> bool:
+        return self.source == self.SOURCE_COMMAND
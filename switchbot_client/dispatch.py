@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, ContextManager, Deque, Dict, Optional
+
+if TYPE_CHECKING:
+    from switchbot_client.devices.base import SwitchBotDevice
+
+
+@dataclass
+class SwitchBotDispatchStats:
+    """
+    The state of the IR command queue of one hub.
+    depth: commands waiting to be sent
+    sent: commands sent so far
+    mean_latency, max_latency: seconds between queueing and sending a command,
+        over the last SwitchBotIRDispatcherBase.LATENCY_SAMPLES commands
+    """
+
+    hub_id: str
+    depth: int
+    sent: int
+    mean_latency: float
+    max_latency: float
+
+
+class _QueuedCommand:
+    def __init__(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: Optional[str],
+        command_type: Optional[str],
+        future: Any,
+    ) -> None:
+        self.device = device
+        self.command = command
+        self.parameter = parameter
+        self.command_type = command_type
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class _HubState:
+    def __init__(self) -> None:
+        self.depth = 0
+        self.sent = 0
+        self.latencies: Deque[float] = deque(maxlen=SwitchBotIRDispatcherBase.LATENCY_SAMPLES)
+
+
+class SwitchBotIRDispatcherBase:
+    """
+    Sends the commands of infrared remote devices one hub at a time, in the order they were
+    given, at least interval seconds apart, so that the hub does not drop them.
+    Different hubs are served independently.
+
+    interval: minimum seconds between two commands relayed by the same hub
+    """
+
+    DEFAULT_INTERVAL = 0.5
+    LATENCY_SAMPLES = 1000
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self._hubs: Dict[str, _HubState] = {}
+        # guards _hubs, the dispatcher serving the hubs from threads replaces it with a lock
+        self._state_lock: ContextManager[Any] = nullcontext()
+
+    def stats(self) -> Dict[str, SwitchBotDispatchStats]:
+        """
+        Returns the queue statistics of every hub which has been used, keyed by hub id.
+        """
+        result = {}
+        with self._state_lock:
+            for hub_id, state in self._hubs.items():
+                latencies = list(state.latencies)
+                result[hub_id] = SwitchBotDispatchStats(
+                    hub_id,
+                    state.depth,
+                    state.sent,
+                    sum(latencies) / len(latencies) if latencies else 0.0,
+                    max(latencies, default=0.0),
+                )
+        return result
+
+    @staticmethod
+    def _hub_id(device: SwitchBotDevice) -> str:
+        return device.hub_device_id or device.device_id
+
+    def _record(self, hub_id: str, item: _QueuedCommand):
+        state = self._hubs[hub_id]
+        state.depth -= 1
+        state.sent += 1
+        state.latencies.append(time.monotonic() - item.queued_at)
+
+
+class SwitchBotIRDispatcher(SwitchBotIRDispatcherBase):
+    """
+    The thread-based dispatcher used by SwitchBotClient, with one worker thread per hub,
+    stopped by close().
+    """
+
+    def __init__(self, interval: float = SwitchBotIRDispatcherBase.DEFAULT_INTERVAL) -> None:
+        super().__init__(interval)
+        self._lock = threading.Lock()
+        self._state_lock = self._lock
+        self._queues: Dict[str, queue.Queue] = {}
+        self._workers: Dict[str, threading.Thread] = {}
+
+    def submit(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> Future:
+        """
+        Queue a command and return a Future of its SwitchBotCommandResult.
+        """
+        future: Future = Future()
+        hub_id = self._hub_id(device)
+        with self._lock:
+            hub_queue = self._queues.get(hub_id)
+            if hub_queue is None:
+                hub_queue = self._queues[hub_id] = queue.Queue()
+                self._hubs[hub_id] = _HubState()
+                worker = self._workers[hub_id] = threading.Thread(
+                    target=self._work, args=[hub_id, hub_queue], daemon=True
+                )
+                worker.start()
+            self._hubs[hub_id].depth += 1
+            hub_queue.put(_QueuedCommand(device, command, parameter, command_type, future))
+        return future
+
+    def close(self):
+        """
+        Stop the worker threads after they sent the commands already queued.
+        """
+        with self._lock:
+            queues = list(self._queues.values())
+            workers = list(self._workers.values())
+            self._queues.clear()
+            self._workers.clear()
+        for hub_queue in queues:
+            hub_queue.put(None)
+        for worker in workers:
+            worker.join()
+
+    def _work(self, hub_id: str, hub_queue: queue.Queue):
+        next_at = 0.0
+        while True:
+            item = hub_queue.get()
+            if item is None:
+                return
+            wait = next_at - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            with self._lock:
+                self._record(hub_id, item)
+            try:
+                result = item.device._post_command(  # pylint: disable=protected-access
+                    item.command, item.parameter, item.command_type
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                item.future.set_exception(e)
+            else:
+                item.future.set_result(result)
+            next_at = time.monotonic() + self.interval
@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from switchbot_client.exceptions import (
+    SwitchBotDeadLetterError,
+    SwitchBotQueueClosedError,
+    SwitchBotQueueWriteError,
+)
+from switchbot_client.retry import SwitchBotRetryPolicy
+
+if TYPE_CHECKING:
+    from switchbot_client import SwitchBotClient
+    from switchbot_client.devices.base import SwitchBotCommandResult, SwitchBotDevice
+    from switchbot_client.scenes import SwitchBotScene
+
+
+@dataclass
+class SwitchBotQueuedItem:
+    """
+    A device command or scene execution stored in a SwitchBotCommandQueue.
+    kind: KIND_DEVICE or KIND_SCENE
+    target_id: the device id or the scene id
+    attempts: number of attempts made so far
+    error: the reason of the last failed attempt
+    """
+
+    KIND_DEVICE = "device"
+    KIND_SCENE = "scene"
+
+    item_id: str
+    kind: str
+    target_id: str
+    command: Optional[str]
+    parameter: Optional[str]
+    command_type: Optional[str]
+    created_at: float
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class SwitchBotQueueHandle:
+    """
+    Returned by SwitchBotCommandQueue.enqueue() to follow a queued item.
+    result() returns the SwitchBotCommandResult once the item has been sent successfully,
+    or raises SwitchBotDeadLetterError if it was dead-lettered, SwitchBotQueueWriteError
+    if it could not be written to the queue file and SwitchBotQueueClosedError
+    if the queue was closed before it was sent.
+    """
+
+    def __init__(self, item: SwitchBotQueuedItem) -> None:
+        self.item = item
+        self.future: Future = Future()
+        self._written = threading.Event()
+        self._write_error: Optional[SwitchBotQueueWriteError] = None
+
+    @property
+    def item_id(self) -> str:
+        return self.item.item_id
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: float = None) -> SwitchBotCommandResult:
+        return self.future.result(timeout)
+
+    def wait_persisted(self, timeout: float = None) -> bool:
+        """
+        Wait until the item has been committed to the queue file.
+        Returns False if the write did not finish within timeout seconds,
+        raises SwitchBotQueueWriteError if it failed.
+        """
+        if not self._written.wait(timeout):
+            return False
+        if self._write_error is not None:
+            raise self._write_error
+        return True
+
+
+class _QueueEntry:
+    def __init__(
+        self, item: SwitchBotQueuedItem, target: Any, handle: Optional[SwitchBotQueueHandle]
+    ) -> None:
+        self.item = item
+        self.target = target
+        self.handle = handle
+
+
+class SwitchBotCommandQueue:
+    """
+    A persistent queue in front of SwitchBotDevice.command and SwitchBotScene.execute.
+    Queued items are stored in an SQLite file and sent by a pool of worker threads,
+    failed attempts are retried with backoff and items which keep failing are dead-lettered.
+    Items which were not sent before the process stopped are sent when the queue is opened again,
+    so an item may be sent more than once (at-least-once delivery).
+
+    enqueue() only hands the item to a writer thread, which stores the items queued in the
+    meantime in one transaction. Use wait_persisted() of the handle to wait for the write.
+    An item is only sent once it is committed. A transaction which fails is retried
+    COMMIT_ATTEMPTS times, then the handles of its new items fail with SwitchBotQueueWriteError.
+
+    client: the SwitchBotClient used to look up the devices and scenes of stored items
+    path: the SQLite file, created if it does not exist
+    workers: number of worker threads sending items concurrently
+    retry_policy: the number of attempts and the backoff between them.
+        Exceptions and the API status codes in retry_api_status_codes are retried,
+        any other status code than 100 dead-letters the item at once.
+
+    enqueued, sent, retried, dead: number of items queued, sent successfully,
+        retried and dead-lettered since the queue was opened
+    """
+
+    DEFAULT_WORKERS = 4
+    DEFAULT_RETRY_POLICY = SwitchBotRetryPolicy(
+        max_attempts=5, backoff=1.0, max_backoff=60.0, retry_commands=True
+    )
+    STATE_PENDING = "pending"
+    STATE_DEAD = "dead"
+    COMMIT_ATTEMPTS = 3
+    COMMIT_RETRY_DELAY = 0.05
+
+    def __init__(
+        self,
+        client: SwitchBotClient,
+        path: str,
+        workers: int = DEFAULT_WORKERS,
+        retry_policy: SwitchBotRetryPolicy = DEFAULT_RETRY_POLICY,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.client = client
+        self.path = path
+        self.retry_policy = retry_policy
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self._condition = threading.Condition()
+        self._writes: List[Tuple[str, Tuple[Any, ...], Optional[_QueueEntry]]] = []
+        self._delayed: List[Tuple[float, int, _QueueEntry]] = []
+        # handles which are neither resolved nor failed yet, by item id
+        self._handles: Dict[str, SwitchBotQueueHandle] = {}
+        self._sequence = itertools.count()
+        self._ready: queue.Queue = queue.Queue()
+        self._outstanding = 0
+        self._closed = False
+        self._stopped = False
+        self._committing = False
+        self._db_lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._create_schema()
+        self._recover()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def enqueue(
+        self,
+        device: SwitchBotDevice,
+        command: str,
+        parameter: str = None,
+        command_type: str = None,
+    ) -> SwitchBotQueueHandle:
+        """
+        Queue a device command, it is sent by device.command().
+        """
+        item = self._new_item(
+            SwitchBotQueuedItem.KIND_DEVICE, device.device_id, command, parameter, command_type
+        )
+        return self._add(item, device)
+
+    def enqueue_scene(self, scene: SwitchBotScene) -> SwitchBotQueueHandle:
+        """
+        Queue a scene execution, it is sent by scene.execute().
+        """
+        item = self._new_item(SwitchBotQueuedItem.KIND_SCENE, scene.scene_id, None, None, None)
+        return self._add(item, scene)
+
+    @property
+    def pending_count(self) -> int:
+        """
+        Number of items which have been neither sent nor dead-lettered yet.
+        """
+        return self._outstanding
+
+    def drain(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued item has been sent or dead-lettered and the queue file is updated.
+        Returns False if that did not happen within timeout seconds.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._outstanding == 0 and not self._writes and not self._committing,
+                timeout,
+            )
+
+    def dead_letters(self) -> List[SwitchBotQueuedItem]:
+        """
+        Returns the dead-lettered items stored in the queue file, oldest first.
+        """
+        with self._db_lock:
+            rows = self._connection.execute(
+                "SELECT id, kind, target_id, command, parameter, command_type, created_at, "
+                "attempts, error FROM items WHERE state = ? ORDER BY created_at",
+                (self.STATE_DEAD,),
+            ).fetchall()
+        return [SwitchBotQueuedItem(*row) for row in rows]
+
+    def close(self):
+        """
+        Stop the workers once they have sent the items already handed to them,
+        write the pending changes and stop the writer.
+        It does not wait for the other items: their handles fail with SwitchBotQueueClosedError
+        and the items are sent when the queue file is opened again.
+        Use drain() before close() to wait for every item.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        for _ in self._workers:
+            self._ready.put(None)
+        for worker in self._workers:
+            worker.join()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._writer.join()
+        with self._db_lock:
+            self._connection.close()
+        with self._condition:
+            handles, self._handles = list(self._handles.values()), {}
+        for handle in handles:
+            handle.future.set_exception(
+                SwitchBotQueueClosedError(
+                    f"the command queue was closed before {handle.item_id} was sent, "
+                    f"it is sent when {self.path} is opened again"
+                )
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def _new_item(
+        kind: str,
+        target_id: str,
+        command: Optional[str],
+        parameter: Optional[str],
+        command_type: Optional[str],
+    ) -> SwitchBotQueuedItem:
+        return SwitchBotQueuedItem(
+            uuid.uuid4().hex, kind, target_id, command, parameter, command_type, time.time()
+        )
+
+    def _add(self, item: SwitchBotQueuedItem, target: Any) -> SwitchBotQueueHandle:
+        handle = SwitchBotQueueHandle(item)
+        entry = _QueueEntry(item, target, handle)
+        row = (
+            item.item_id,
+            item.kind,
+            item.target_id,
+            item.command,
+            item.parameter,
+            item.command_type,
+            item.created_at,
+            item.attempts,
+            item.error,
+            self.STATE_PENDING,
+            item.created_at,
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the command queue is closed")
+            self.enqueued += 1
+            self._outstanding += 1
+            self._handles[item.item_id] = handle
+            self._writes.append(("insert", row, entry))
+            self._condition.notify_all()
+        return handle
+
+    def _create_schema(self):
+        with self._db_lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, target_id TEXT NOT NULL, "
+                "command TEXT, parameter TEXT, command_type TEXT, created_at REAL NOT NULL, "
+                "attempts INTEGER NOT NULL, error TEXT, state TEXT NOT NULL, "
+                "available_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS items_state ON items (state, available_at)"
+            )
+
+    def _recover(self):
+        with self._db_lock:
+            rows = self._connection.execute(
+                "SELECT id, kind, target_id, command, parameter, command_type, created_at, "
+                "attempts, error, available_at FROM items WHERE state = ? ORDER BY created_at",
+                (self.STATE_PENDING,),
+            ).fetchall()
+        for row in rows:
+            entry = _QueueEntry(SwitchBotQueuedItem(*row[:-1]), None, None)
+            heapq.heappush(self._delayed, (row[-1], next(self._sequence), entry))
+            self._outstanding += 1
+        if rows:
+            logging.info("resuming %d queued items from %s", len(rows), self.path)
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(self._has_work, self._next_due())
+                writes, self._writes = self._writes, []
+                due = self._pop_due()
+                closed = self._closed
+                self._committing = True
+            try:
+                error = self._commit_with_retries(writes)
+            finally:
+                with self._condition:
+                    self._committing = False
+                    self._condition.notify_all()
+            if error is not None:
+                self._fail_inserts(writes, error)
+            for operation, _, entry in writes:
+                if error is None and operation == "insert" and entry is not None:
+                    if entry.handle is not None:
+                        entry.handle._written.set()  # pylint: disable=protected-access
+                    if not closed:
+                        self._ready.put(entry)
+            for entry in due:
+                self._ready.put(entry)
+            with self._condition:
+                if self._stopped and not self._writes:
+                    return
+
+    def _has_work(self) -> bool:
+        if self._writes or self._stopped:
+            return True
+        return not self._closed and bool(self._delayed) and self._delayed[0][0] <= time.time()
+
+    def _next_due(self) -> Optional[float]:
+        if self._closed or not self._delayed:
+            return None
+        return max(self._delayed[0][0] - time.time(), 0.0)
+
+    def _pop_due(self) -> List[_QueueEntry]:
+        due: List[_QueueEntry] = []
+        if self._closed:
+            return due
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            due.append(heapq.heappop(self._delayed)[2])
+        return due
+
+    def _commit_with_retries(
+        self, writes: List[Tuple[str, Tuple[Any, ...], Optional[_QueueEntry]]]
+    ) -> Optional[sqlite3.Error]:
+        """
+        Commits writes in one transaction, retried up to COMMIT_ATTEMPTS times.
+        Returns the error of the last attempt if none succeeded.
+        """
+        for attempt in range(1, self.COMMIT_ATTEMPTS + 1):
+            try:
+                self._commit(writes)
+                return None
+            except sqlite3.Error as e:
+                logging.warning(
+                    "failed to write %d changes to %s (attempt %d): %s",
+                    len(writes),
+                    self.path,
+                    attempt,
+                    e,
+                )
+                if attempt == self.COMMIT_ATTEMPTS:
+                    return e
+                time.sleep(self.COMMIT_RETRY_DELAY * 2 ** (attempt - 1))
+        return None
+
+    def _fail_inserts(
+        self,
+        writes: List[Tuple[str, Tuple[Any, ...], Optional[_QueueEntry]]],
+        error: sqlite3.Error,
+    ):
+        """
+        Fails the new items of a transaction which could not be committed, they are not sent.
+        The updates and deletions of items already sent are lost, so these items
+        may be sent again or stay pending when the queue file is opened again.
+        """
+        logging.error("dropping %d changes not written to %s: %s", len(writes), self.path, error)
+        entries = [e for operation, _, e in writes if operation == "insert" and e is not None]
+        with self._condition:
+            self._outstanding -= len(entries)
+            for entry in entries:
+                self._handles.pop(entry.item.item_id, None)
+            self._condition.notify_all()
+        for entry in entries:
+            if entry.handle is None:
+                continue
+            write_error = SwitchBotQueueWriteError(
+                f"failed to write {entry.item.item_id} to {self.path}: {error}"
+            )
+            write_error.__cause__ = error
+            entry.handle._write_error = write_error  # pylint: disable=protected-access
+            entry.handle._written.set()  # pylint: disable=protected-access
+            entry.handle.future.set_exception(write_error)
+
+    def _commit(self, writes: List[Tuple[str, Tuple[Any, ...], Optional[_QueueEntry]]]):
+        if not writes:
+            return
+        statements = {
+            "insert": "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            "delete": "DELETE FROM items WHERE id = ?",
+            "update": "UPDATE items SET attempts = ?, error = ?, state = ?, available_at = ? "
+            "WHERE id = ?",
+        }
+        with self._db_lock:
+            self._connection.execute("BEGIN")
+            try:
+                for operation, parameters, _ in writes:
+                    self._connection.execute(statements[operation], parameters)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _work(self):
+        while True:
+            entry = self._ready.get()
+            if entry is None:
+                return
+            self._attempt(entry)
+
+    def _attempt(self, entry: _QueueEntry):
+        item = entry.item
+        item.attempts += 1
+        result = None
+        try:
+            result = self._execute(entry)
+        except Exception as e:  # pylint: disable=broad-except
+            item.error = repr(e)
+            retryable = True
+        else:
+            if result.status_code == 100:
+                self._finish(entry, ("delete", (item.item_id,), None), result=result)
+                return
+            item.error = f"statusCode {result.status_code}: {result.message}"
+            retryable = self.retry_policy.is_retryable_api_status(result.status_code)
+
+        delay = self.retry_policy.retry_delay(item.attempts, True) if retryable else None
+        if delay is None:
+            logging.warning("dead-lettering queued item %s: %s", item.item_id, item.error)
+            error = SwitchBotDeadLetterError(
+                f"{item.kind} {item.target_id} failed after {item.attempts} attempts: "
+                f"{item.error}",
+                item,
+                result,
+            )
+            update = (item.attempts, item.error, self.STATE_DEAD, time.time(), item.item_id)
+            self._finish(entry, ("update", update, None), error=error)
+            return
+
+        logging.info("retrying queued item %s in %.2f seconds: %s", item.item_id, delay, item.error)
+        available_at = time.time() + delay
+        update = (item.attempts, item.error, self.STATE_PENDING, available_at, item.item_id)
+        with self._condition:
+            self.retried += 1
+            self._writes.append(("update", update, None))
+            heapq.heappush(self._delayed, (available_at, next(self._sequence), entry))
+            self._condition.notify_all()
+
+    def _execute(self, entry: _QueueEntry) -> SwitchBotCommandResult:
+        item = entry.item
+        if entry.target is None:
+            if item.kind == SwitchBotQueuedItem.KIND_SCENE:
+                entry.target = self.client.scene(item.target_id)
+            else:
+                entry.target = self.client.device(item.target_id)
+            if entry.target is None:
+                raise RuntimeError(f"{item.kind} {item.target_id} not found")
+        if item.kind == SwitchBotQueuedItem.KIND_SCENE:
+            return entry.target.execute()
+        return entry.target.command(item.command, item.parameter, item.command_type)
+
+    def _finish(
+        self,
+        entry: _QueueEntry,
+        write: Tuple[str, Tuple[Any, ...], None],
+        result: SwitchBotCommandResult = None,
+        error: SwitchBotDeadLetterError = None,
+    ):
+        with self._condition:
+            if error is None:
+                self.sent += 1
+            else:
+                self.dead += 1
+            self._outstanding -= 1
+            self._handles.pop(entry.item.item_id, None)
+            self._writes.append(write)
+            self._condition.notify_all()
+        if entry.handle is not None:
+            if error is None:
+                entry.handle.future.set_result(result)
+            else:
+                entry.handle.future.set_exception(error)
@@ -0,0 +1,49 @@
+class SwitchBotClientError(RuntimeError):
+    """
+    Base class of the errors raised by switchbot-client itself.
+    It inherits RuntimeError, which was raised for every error in the earlier versions.
+    """
+
+
+class SwitchBotRateLimitError(SwitchBotClientError):
+    """
+    Raised when a request would exceed the configured request rate or the daily API budget.
+    """
+
+
+class SwitchBotAPIError(SwitchBotClientError):
+    """
+    Raised when the API keeps answering with an HTTP error after all retries.
+    """
+
+    def __init__(self, message: str, status_code: int = None, body: str = None):
+        super().__init__(message, status_code, body)
+        self.status_code = status_code
+        self.body = body
+
+
+class SwitchBotDeadLetterError(SwitchBotClientError):
+    """
+    Raised by the handle of a SwitchBotCommandQueue item which kept failing and was dead-lettered.
+    """
+
+    def __init__(self, message: str, item=None, result=None):
+        super().__init__(message)
+        self.item = item
+        self.result = result
+
+
+class SwitchBotQueueWriteError(SwitchBotClientError):
+    """
+    Raised by the handle of a SwitchBotCommandQueue item which could not be written
+    to the queue file.
+    The item is not sent.
+    """
+
+
+class SwitchBotQueueClosedError(SwitchBotClientError):
+    """
+    Raised by the handle of a SwitchBotCommandQueue item which was not sent
+    before the queue was closed.
+    The item stays in the queue file and is sent when the queue is opened again.
+    """
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from switchbot_client.exceptions import SwitchBotRateLimitError
+
+
+class SwitchBotRateLimiter:
+    """
+    A client side token bucket which also tracks the daily API call budget.
+
+    The SwitchBot API allows a limited number of calls per token and day,
+    so a limiter should be shared by every client using the same token.
+    https://github.com/OpenWonderLabs/SwitchBotAPI
+    """
+
+    DEFAULT_DAILY_BUDGET = 10000
+    SECONDS_PER_DAY = 86400
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        daily_budget: int = DEFAULT_DAILY_BUDGET,
+        blocking: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        """
+        rate: requests per second the bucket is refilled with
+        burst: maximum number of requests which can be sent at once
+        daily_budget: number of requests allowed per day (UTC)
+        blocking: wait for a token when the bucket is empty instead of raising
+            SwitchBotRateLimitError. An exhausted daily budget always raises.
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.daily_budget = daily_budget
+        self.blocking = blocking
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._day = self._current_day()
+        self._used_today = 0
+
+    @property
+    def used_today(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._used_today
+
+    @property
+    def remaining_daily_budget(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return max(self.daily_budget - self._used_today, 0)
+
+    @property
+    def available_tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    @property
+    def resets_at(self) -> datetime:
+        """
+        The time when the daily budget is reset.
+        """
+        next_day = (self._current_day() + 1) * self.SECONDS_PER_DAY
+        return datetime.fromtimestamp(next_day, tz=timezone.utc)
+
+    def acquire(self) -> None:
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """
+        Take one token and one unit of the daily budget without waiting.
+        Returns 0 on success, or the seconds to wait until a token is available.
+        """
+        with self._lock:
+            self._roll_day()
+            if self._used_today >= self.daily_budget:
+                raise SwitchBotRateLimitError(
+                    f"daily API budget of {self.daily_budget} requests is exhausted "
+                    f"until {self.resets_at.isoformat()}"
+                )
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._used_today += 1
+                return 0
+            wait = (1 - self._tokens) / self.rate
+            if not self.blocking:
+                raise SwitchBotRateLimitError(
+                    f"request rate of {self.rate}/s exceeded, retry after {wait:.3f} seconds"
+                )
+            return wait
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _roll_day(self):
+        day = self._current_day()
+        if day != self._day:
+            self._day = day
+            self._used_today = 0
+
+    def _current_day(self) -> int:
+        return int(self._wall_clock() // self.SECONDS_PER_DAY)
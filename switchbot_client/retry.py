@@ -0,0 +1,49 @@
+import random
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+
+@dataclass
+class SwitchBotRetryPolicy:
+    """
+    Decides which failed API calls are sent again and how long to wait in between.
+
+    max_attempts: number of attempts including the first one, 1 disables retrying
+    backoff: wait in seconds before the second attempt, doubled for each following attempt
+    max_backoff: upper bound of the wait in seconds
+    jitter: wait a random time between 0 and the backoff ("full jitter"),
+        so that clients failing at the same time do not retry at the same time
+    retry_http_status_codes: HTTP status codes treated as transient
+    retry_api_status_codes: statusCode values of the API response body treated as transient,
+        161 (device offline) and 171 (hub offline) by default
+    retry_commands: also retry device commands, scene executions and webhook changes.
+        Only enable it if the commands you send are idempotent (turnOn, setPosition, ...),
+        since a command whose response was lost may have been executed already.
+    """
+
+    max_attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 8.0
+    jitter: bool = True
+    retry_http_status_codes: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    retry_api_status_codes: FrozenSet[int] = frozenset({161, 171})
+    retry_commands: bool = False
+
+    def retry_delay(self, attempt: int, idempotent: bool) -> Optional[float]:
+        """
+        attempt: number of attempts already made
+        idempotent: whether the request can be sent again without side effects
+        Returns the seconds to wait before the next attempt, or None if it must not be retried.
+        """
+        if attempt >= self.max_attempts or not (idempotent or self.retry_commands):
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+    def is_retryable_http_status(self, status_code: int) -> bool:
+        return status_code in self.retry_http_status_codes
+
+    def is_retryable_api_status(self, status_code: int) -> bool:
+        return status_code in self.retry_api_status_codes
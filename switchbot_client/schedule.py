@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Deque, List, Optional, Union
+
+from switchbot_client.client import SwitchBotClient
+from switchbot_client.scenes import SwitchBotScene
+from switchbot_client.scheduler import percentile
+from switchbot_client.timerwheel import TimerWheel
+
+if TYPE_CHECKING:
+    from switchbot_client.devices.base import SwitchBotCommandResult, SwitchBotDevice
+
+
+@dataclass
+class SwitchBotScheduleStats:
+    """
+    scheduled: schedules waiting for their next run, cancelled ones are not counted
+    fired: runs dispatched so far
+    batches: dispatches, runs due at the same tick are dispatched together
+    missed: runs of repeating schedules skipped because the previous one was too late
+    failed: runs which raised an error or returned another status code than 100
+    mean_lateness, p99_lateness, max_lateness: seconds between the time a run was due
+        and its dispatch, over the last SwitchBotScheduleEngine.LATENESS_SAMPLES runs
+    """
+
+    scheduled: int
+    fired: int
+    batches: int
+    missed: int
+    failed: int
+    mean_lateness: float
+    p99_lateness: float
+    max_lateness: float
+
+
+class SwitchBotSchedule:
+    """
+    A device command or scene execution scheduled with SwitchBotScheduleEngine.at().
+    next_run: the time (seconds since the epoch) of the next run, None once it is done
+    due_at: the time the last dispatched run was due
+    runs: number of runs so far
+    last_result, last_error: the outcome of the last run
+    """
+
+    def __init__(
+        self,
+        target: Union[SwitchBotDevice, SwitchBotScene],
+        command: Optional[str],
+        parameter: Optional[str],
+        command_type: Optional[str],
+        next_run: float,
+        every: Optional[float],
+        on_cancel: Callable[[SwitchBotSchedule], None] = None,
+    ) -> None:
+        self.target = target
+        self.command = command
+        self.parameter = parameter
+        self.command_type = command_type
+        self.next_run: Optional[float] = next_run
+        self.due_at: Optional[float] = None
+        self.every = every
+        self.runs = 0
+        self.last_result: Optional[SwitchBotCommandResult] = None
+        self.last_error: Optional[BaseException] = None
+        self.cancelled = False
+        self._on_cancel = on_cancel
+
+    @property
+    def is_scene(self) -> bool:
+        return isinstance(self.target, SwitchBotScene)
+
+    def cancel(self):
+        """
+        Do not run the schedule anymore, a run already dispatched is not stopped.
+        """
+        if self._on_cancel is None:
+            self.cancelled = True
+        else:
+            self._on_cancel(self)
+
+    def __repr__(self):
+        data = {
+            "target": getattr(self.target, "device_id", None)
+            or getattr(self.target, "scene_id", None),
+            "command": self.command,
+            "parameter": self.parameter,
+            "next_run": self.next_run,
+            "every": self.every,
+        }
+        return self.__class__.__qualname__ + f"({data})"
+
+
+class SwitchBotScheduleEngine:
+    """
+    Runs device commands and scene executions at given times, once or repeatedly,
+    from one timer thread instead of a thread or sleep per action.
+    Schedules are kept in a hierarchical TimerWheel, so that adding and expiring one takes
+    constant time with tens of thousands of schedules.
+
+    Every resolution seconds the timer thread collects the runs which became due and dispatches
+    them together: device commands as SwitchBotClient.execute_many() sends them, serialized per
+    hub and parallel across hubs, and scene executions in parallel.
+    A run never starts before its time and is at most resolution seconds late plus the time the
+    dispatch waits for a free thread. Repeating schedules keep their phase,
+    runs which could not be dispatched before the next one was due are skipped.
+
+    client: the SwitchBotClient sending the commands
+    resolution: seconds per tick of the timer wheel
+    concurrency: maximum number of dispatches and of hubs commanded at the same time
+    hub_interval: seconds between two commands sent through the same hub
+    """
+
+    DEFAULT_RESOLUTION = 0.1
+    LATENESS_SAMPLES = 1000
+
+    def __init__(
+        self,
+        client: SwitchBotClient,
+        resolution: float = DEFAULT_RESOLUTION,
+        concurrency: int = SwitchBotClient.DEFAULT_CONCURRENCY,
+        hub_interval: float = SwitchBotClient.DEFAULT_HUB_INTERVAL,
+    ) -> None:
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self.client = client
+        self.resolution = resolution
+        self.concurrency = concurrency
+        self.hub_interval = hub_interval
+        self.fired = 0
+        self.batches = 0
+        self.missed = 0
+        self.failed = 0
+        self._scheduled = 0
+        self._lateness: Deque[float] = deque(maxlen=self.LATENESS_SAMPLES)
+        self._condition = threading.Condition()
+        self._origin = time.time()
+        self._wheel = TimerWheel()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def at(
+        self,
+        when: Union[datetime, float],
+        target: Union[SwitchBotDevice, SwitchBotScene],
+        command: str = None,
+        parameter: str = None,
+        command_type: str = None,
+        every: float = None,
+    ) -> SwitchBotSchedule:
+        """
+        Send a device command or execute a scene at a given time.
+        when: a datetime, naive ones are local time, or seconds since the epoch
+        target: a device object, or a SwitchBotScene which is executed without a command
+        every: repeat the run every this many seconds after when
+        """
+        if isinstance(target, SwitchBotScene) != (command is None):
+            raise ValueError("give a command for a device and no command for a scene")
+        if every is not None and every <= 0:
+            raise ValueError("every must be positive")
+        next_run = when.timestamp() if isinstance(when, datetime) else float(when)
+        schedule = SwitchBotSchedule(
+            target, command, parameter, command_type, next_run, every, self._cancel
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the schedule engine is closed")
+            self._add(schedule, next_run)
+            self._condition.notify_all()
+        return schedule
+
+    def after(
+        self,
+        delay: float,
+        target: Union[SwitchBotDevice, SwitchBotScene],
+        command: str = None,
+        parameter: str = None,
+        command_type: str = None,
+        every: float = None,
+    ) -> SwitchBotSchedule:
+        """
+        Like at(), delay seconds from now.
+        """
+        return self.at(time.time() + delay, target, command, parameter, command_type, every)
+
+    def stats(self) -> SwitchBotScheduleStats:
+        with self._condition:
+            lateness = sorted(self._lateness)
+            return SwitchBotScheduleStats(
+                self._scheduled,
+                self.fired,
+                self.batches,
+                self.missed,
+                self.failed,
+                sum(lateness) / len(lateness) if lateness else 0.0,
+                percentile(lateness, 0.99),
+                lateness[-1] if lateness else 0.0,
+            )
+
+    def close(self, wait: bool = True):
+        """
+        Stop the timer thread, wait: wait until the dispatched runs are finished.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _add(self, schedule: SwitchBotSchedule, next_run: float):
+        self._scheduled += 1
+        self._wheel.add(math.ceil((next_run - self._origin) / self.resolution), schedule)
+
+    def _cancel(self, schedule: SwitchBotSchedule):
+        with self._condition:
+            # a cancelled schedule stays in the wheel until it expires, but is not counted
+            if not schedule.cancelled and schedule.next_run is not None:
+                self._scheduled -= 1
+            schedule.cancelled = True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                now = time.time()
+                expired = self._wheel.advance(math.floor((now - self._origin) / self.resolution))
+                due = [schedule for schedule in expired if not schedule.cancelled]
+                self._scheduled -= len(due)
+                for schedule in due:
+                    self._lateness.append(max(now - self._reschedule(schedule, now), 0.0))
+                if due:
+                    self.batches += 1
+                    self.fired += len(due)
+                    self._executor.submit(self._dispatch, due)
+                next_tick = self._origin + (self._wheel.current + 1) * self.resolution
+                timeout = None if len(self._wheel) == 0 else max(next_tick - time.time(), 0.0)
+                self._condition.wait(timeout)
+
+    def _reschedule(self, schedule: SwitchBotSchedule, now: float) -> float:
+        """
+        Moves a due schedule to its next run and returns the time it was due.
+        """
+        due_at = schedule.due_at = schedule.next_run or now
+        if schedule.every is None:
+            schedule.next_run = None
+            return due_at
+        next_run = due_at + schedule.every
+        if next_run <= now:
+            skipped = math.floor((now - next_run) / schedule.every) + 1
+            self.missed += skipped
+            next_run += skipped * schedule.every
+        schedule.next_run = next_run
+        self._add(schedule, next_run)
+        return due_at
+
+    def _dispatch(self, due: List[SwitchBotSchedule]):
+        scenes = [schedule for schedule in due if schedule.is_scene]
+        commands = [schedule for schedule in due if not schedule.is_scene]
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                scene_results = executor.map(self._execute_scene, scenes)
+                if commands:
+                    bulk = self.client.execute_many(
+                        [(s.target, s.command, s.parameter, s.command_type) for s in commands],
+                        self.concurrency,
+                        self.hub_interval,
+                    )
+                    for schedule, item in zip(commands, bulk.items):
+                        self._record(schedule, item.result, item.error)
+                for schedule, (result, error) in zip(scenes, scene_results):
+                    self._record(schedule, result, error)
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("failed to dispatch %d scheduled runs", len(due))
+
+    @staticmethod
+    def _execute_scene(schedule: SwitchBotSchedule) -> tuple:
+        try:
+            return schedule.target.execute(), None  # type: ignore[union-attr]
+        except Exception as e:  # pylint: disable=broad-except
+            return None, e
+
+    def _record(
+        self,
+        schedule: SwitchBotSchedule,
+        result: Optional[SwitchBotCommandResult],
+        error: Optional[BaseException],
+    ):
+        schedule.runs += 1
+        schedule.last_result = result
+        schedule.last_error = error
+        if error is not None or result is None or result.status_code != 100:
+            with self._condition:
+                self.failed += 1
+            logging.warning("scheduled run of %s failed: %s", schedule, error or result)
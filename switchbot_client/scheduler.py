@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, ContextManager, Deque, Dict, Iterator, List, Optional, Tuple
+
+from switchbot_client.exceptions import SwitchBotRateLimitError
+from switchbot_client.ratelimit import SwitchBotRateLimiter
+
+
+class SwitchBotPriority(IntEnum):
+    """
+    Priority classes of API requests, a lower value is served first.
+    By default commands, scene executions and webhook changes are INTERACTIVE
+    and reads are BACKGROUND, use request_priority() to override it.
+    """
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_current_priority: contextvars.ContextVar[Optional[SwitchBotPriority]] = contextvars.ContextVar(
+    "switchbot_client_request_priority", default=None
+)
+
+
+@contextmanager
+def request_priority(priority: SwitchBotPriority) -> Iterator[None]:
+    """
+    Send the API requests made in this block with the given priority,
+    e.g. a status read triggered by a user as INTERACTIVE or a scheduled job as BACKGROUND.
+    The priority applies to the current thread or asyncio task.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_request_priority() -> Optional[SwitchBotPriority]:
+    return _current_priority.get()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Returns the nearest-rank percentile of sorted values, 0.0 if there are none.
+    fraction: the percentile between 0 and 1, e.g. 0.99
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+@dataclass
+class SwitchBotSchedulerStats:
+    """
+    The queue state of one priority class.
+    waiting: requests waiting for a free slot
+    started: requests started so far
+    shed: background requests rejected because the daily budget ran low
+    mean_wait, p50_wait, p99_wait, max_wait: seconds requests waited for a slot,
+        over the last SwitchBotRequestSchedulerBase.WAIT_SAMPLES requests
+    """
+
+    priority: SwitchBotPriority
+    waiting: int
+    started: int
+    shed: int
+    mean_wait: float
+    p50_wait: float
+    p99_wait: float
+    max_wait: float
+
+
+class _Waiter:
+    def __init__(self, priority: SwitchBotPriority, signal: Any = None) -> None:
+        self.priority = priority
+        self.signal = signal
+        self.queued_at = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+
+
+class _PriorityState:
+    def __init__(self) -> None:
+        self.waiting = 0
+        self.started = 0
+        self.shed = 0
+        self.waits: Deque[float] = deque(maxlen=SwitchBotRequestSchedulerBase.WAIT_SAMPLES)
+
+
+class SwitchBotRequestSchedulerBase:
+    """
+    Limits the number of API requests in flight and serves the waiting ones by priority,
+    so that interactive commands jump ahead of queued background reads.
+    Requests of the same priority are served in the order they arrived.
+    The tokens of the rate limiter of the client are handed out in the same order,
+    before a request waits for a slot, so requests waiting for a token do not hold a slot.
+
+    max_concurrency: maximum number of requests in flight, usually the pool_size of the client
+    background_reserve: BACKGROUND requests are rejected with SwitchBotRateLimitError
+        once the remaining daily budget of the rate limiter of the client is this low,
+        keeping the rest of the budget for INTERACTIVE requests
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 10
+    DEFAULT_BACKGROUND_RESERVE = 500
+    WAIT_SAMPLES = 1000
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        background_reserve: int = DEFAULT_BACKGROUND_RESERVE,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self.background_reserve = background_reserve
+        self._active = 0
+        self._sequence = itertools.count()
+        self._waiting: List[Tuple[int, int, _Waiter]] = []
+        self._token_waiting: List[Tuple[int, int, _Waiter]] = []
+        self._priorities = {priority: _PriorityState() for priority in SwitchBotPriority}
+        # guards the state above, the thread-based scheduler replaces it with its condition
+        self._state_lock: ContextManager[Any] = nullcontext()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def stats(self) -> Dict[SwitchBotPriority, SwitchBotSchedulerStats]:
+        """
+        Returns the queue statistics of every priority class.
+        """
+        with self._state_lock:
+            states = {
+                priority: (state.waiting, state.started, state.shed, sorted(state.waits))
+                for priority, state in self._priorities.items()
+            }
+        result = {}
+        for priority, (waiting, started, shed, waits) in states.items():
+            result[priority] = SwitchBotSchedulerStats(
+                priority,
+                waiting,
+                started,
+                shed,
+                sum(waits) / len(waits) if waits else 0.0,
+                percentile(waits, 0.5),
+                percentile(waits, 0.99),
+                waits[-1] if waits else 0.0,
+            )
+        return result
+
+    def _check_budget(
+        self, priority: SwitchBotPriority, rate_limiter: Optional[SwitchBotRateLimiter]
+    ):
+        if priority < SwitchBotPriority.BACKGROUND or rate_limiter is None:
+            return
+        remaining = rate_limiter.remaining_daily_budget
+        if remaining <= self.background_reserve:
+            with self._state_lock:
+                self._priorities[priority].shed += 1
+            raise SwitchBotRateLimitError(
+                f"background request shed, {remaining} requests of the daily budget are left "
+                f"and {self.background_reserve} are reserved for interactive requests"
+            )
+
+    def _enqueue(self, priority: SwitchBotPriority, signal: Any = None) -> Optional[_Waiter]:
+        """
+        Takes a slot if one is free and nobody is waiting and returns None,
+        otherwise queues and returns a waiter which is granted a slot by _release_slot().
+        """
+        waiting = sum(state.waiting for state in self._priorities.values())
+        if self._active < self.max_concurrency and waiting == 0:
+            self._start(priority, 0.0)
+            return None
+        waiter = _Waiter(priority, signal)
+        heapq.heappush(self._waiting, (priority, next(self._sequence), waiter))
+        self._priorities[priority].waiting += 1
+        return waiter
+
+    def _cancel(self, waiter: _Waiter):
+        waiter.cancelled = True
+        self._priorities[waiter.priority].waiting -= 1
+
+    def _queue_for_token(self, priority: SwitchBotPriority) -> _Waiter:
+        """
+        Queues a waiter for a rate limiter token, only the head of the queue may take one.
+        """
+        waiter = _Waiter(priority)
+        heapq.heappush(self._token_waiting, (priority, next(self._sequence), waiter))
+        return waiter
+
+    def _token_head(self) -> Optional[_Waiter]:
+        while self._token_waiting and self._token_waiting[0][2].cancelled:
+            heapq.heappop(self._token_waiting)
+        return self._token_waiting[0][2] if self._token_waiting else None
+
+    def _leave_token_queue(self, waiter: _Waiter) -> Optional[_Waiter]:
+        """
+        Removes a waiter which got its token or gave up and returns the new head.
+        """
+        waiter.cancelled = True
+        return self._token_head()
+
+    def _release_slot(self) -> List[_Waiter]:
+        """
+        Frees a slot and returns the waiters which have been granted one.
+        """
+        self._active -= 1
+        granted = []
+        while self._active < self.max_concurrency and self._waiting:
+            _, _, waiter = heapq.heappop(self._waiting)
+            if waiter.cancelled:
+                continue
+            self._priorities[waiter.priority].waiting -= 1
+            self._start(waiter.priority, time.monotonic() - waiter.queued_at)
+            waiter.granted = True
+            granted.append(waiter)
+        return granted
+
+    def _start(self, priority: SwitchBotPriority, wait: float):
+        self._active += 1
+        state = self._priorities[priority]
+        state.started += 1
+        state.waits.append(wait)
+
+
+class SwitchBotRequestScheduler(SwitchBotRequestSchedulerBase):
+    """
+    The thread-based scheduler used by SwitchBotAPIClient.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SwitchBotRequestSchedulerBase.DEFAULT_MAX_CONCURRENCY,
+        background_reserve: int = SwitchBotRequestSchedulerBase.DEFAULT_BACKGROUND_RESERVE,
+    ) -> None:
+        super().__init__(max_concurrency, background_reserve)
+        self._condition = threading.Condition()
+        self._state_lock = self._condition
+
+    @contextmanager
+    def slot(
+        self, priority: SwitchBotPriority, rate_limiter: SwitchBotRateLimiter = None
+    ) -> Iterator[None]:
+        """
+        Take a token of rate_limiter, then wait for a free slot,
+        hold it while the block runs and pass it on to the next waiter.
+        """
+        self._check_budget(priority, rate_limiter)
+        if rate_limiter is not None:
+            self._acquire_token(priority, rate_limiter)
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, priority: SwitchBotPriority):
+        with self._condition:
+            waiter = self._enqueue(priority)
+            if waiter is not None:
+                self._condition.wait_for(lambda: waiter.granted)
+
+    def release(self):
+        with self._condition:
+            if self._release_slot():
+                self._condition.notify_all()
+
+    def _acquire_token(self, priority: SwitchBotPriority, rate_limiter: SwitchBotRateLimiter):
+        with self._condition:
+            waiter = self._queue_for_token(priority)
+            try:
+                while True:
+                    if self._token_head() is not waiter:
+                        self._condition.wait()
+                        continue
+                    wait = rate_limiter.try_acquire()
+                    if wait <= 0:
+                        return
+                    # a request of higher priority arriving meanwhile takes the next token
+                    self._condition.wait(wait)
+            finally:
+                self._leave_token_queue(waiter)
+                self._condition.notify_all()
@@ -0,0 +1,654 @@
+from __future__ import annotations
+
+import base64
+import copy
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from switchbot_client.enums import ControlCommand, DeviceType, RemoteType
+
+
+class SimulatedDevice:
+    """
+    The state of one device of a SwitchBotSimulator.
+    status: the fields returned by the status endpoint besides deviceId, deviceType and hubDeviceId,
+        updated by the commands like the real device would
+    lock: held by the simulator while it reads or changes status
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        device_name: str,
+        hub_device_id: str,
+        device_type: str = None,
+        remote_type: str = None,
+        status: dict = None,
+    ) -> None:
+        if (device_type is None) == (remote_type is None):
+            raise ValueError("give either device_type or remote_type")
+        self.device_id = device_id
+        self.device_name = device_name
+        self.hub_device_id = hub_device_id
+        self.device_type = device_type
+        self.remote_type = remote_type
+        self.status: Dict[str, Any] = copy.deepcopy(
+            _INITIAL_STATUS.get(device_type or "", {}) if status is None else status
+        )
+        self.lock = threading.Lock()
+
+    @property
+    def is_virtual_infrared(self) -> bool:
+        return self.remote_type is not None
+
+    def api_object(self) -> dict:
+        if self.is_virtual_infrared:
+            return {
+                "deviceId": self.device_id,
+                "deviceName": self.device_name,
+                "remoteType": self.remote_type,
+                "hubDeviceId": self.hub_device_id,
+            }
+        return {
+            "deviceId": self.device_id,
+            "deviceName": self.device_name,
+            "deviceType": self.device_type,
+            "enableCloudService": True,
+            "hubDeviceId": self.hub_device_id,
+        }
+
+    def status_body(self) -> dict:
+        return {
+            "deviceId": self.device_id,
+            "deviceType": self.device_type,
+            "hubDeviceId": self.hub_device_id,
+            **self.status,
+        }
+
+    def apply(self, command: str, parameter: Optional[str], command_type: Optional[str]) -> int:
+        """
+        Applies a command to the state and returns the statusCode of the response.
+        """
+        if command_type == "customize":
+            return 100
+        if self.is_virtual_infrared:
+            return self._apply_infrared(command, parameter)
+        handler = _COMMAND_HANDLERS.get(self.device_type or "")
+        try:
+            if handler is None or not handler(self.status, command, parameter):
+                return 160
+        except (ValueError, IndexError, TypeError):
+            return 190
+        return 100
+
+    def _apply_infrared(self, command: str, parameter: Optional[str]) -> int:
+        if command == ControlCommand.Common.TURN_ON:
+            self.status["power"] = "on"
+        elif command == ControlCommand.Common.TURN_OFF:
+            self.status["power"] = "off"
+        elif command == ControlCommand.VirtualInfrared.SET_ALL:
+            if self.remote_type != RemoteType.AIR_CONDITIONER:
+                return 160
+            try:
+                temperature, mode, fan_speed, power = (parameter or "").split(",")
+                changes = {
+                    "temperature": _optional(temperature, float),
+                    "mode": _optional(mode, int),
+                    "fanSpeed": _optional(fan_speed, int),
+                    "power": _optional(power, str),
+                }
+            except ValueError:
+                return 190
+            self.status.update({k: v for k, v in changes.items() if v is not None})
+        return 100
+
+
+def _optional(value: str, parse: Callable[[str], Any]) -> Any:
+    """
+    Parses one field of setAll, None or an empty field keeps the current value.
+    """
+    if value.strip() in ("", "None"):
+        return None
+    return parse(value.strip())
+
+
+def _power(  # pylint: disable=unused-argument
+    status: dict, command: str, parameter: Optional[str]
+) -> bool:
+    if command == ControlCommand.Common.TURN_ON:
+        status["power"] = "on"
+    elif command == ControlCommand.Common.TURN_OFF:
+        status["power"] = "off"
+    elif command == "toggle" and "power" in status:
+        status["power"] = "off" if status["power"] == "on" else "on"
+    else:
+        return False
+    return True
+
+
+def _percentage(parameter: Optional[str], low: int = 0, high: int = 100) -> int:
+    value = int(parameter or "")
+    if not low <= value <= high:
+        raise ValueError(value)
+    return value
+
+
+def _color(parameter: Optional[str]) -> str:
+    colors = [_percentage(value, 0, 255) for value in (parameter or "").split(":")]
+    if len(colors) != 3:
+        raise ValueError(parameter)
+    return ":".join(str(color) for color in colors)
+
+
+def _bot(status: dict, command: str, parameter: Optional[str]) -> bool:
+    return command == ControlCommand.Bot.PRESS or _power(status, command, parameter)
+
+
+def _plug_mini(status: dict, command: str, parameter: Optional[str]) -> bool:
+    if not _power(status, command, parameter):
+        return False
+    status["weight"] = 10 if status["power"] == "on" else 0
+    status["electricCurrent"] = 1 if status["power"] == "on" else 0
+    return True
+
+
+def _curtain(status: dict, command: str, parameter: Optional[str]) -> bool:
+    if command == ControlCommand.Common.TURN_ON:
+        status["slide_position"] = 0
+    elif command == ControlCommand.Common.TURN_OFF:
+        status["slide_position"] = 100
+    elif command == ControlCommand.Curtain.SET_POSITION:
+        status["slide_position"] = _percentage((parameter or "").split(",")[2])
+    else:
+        return False
+    return True
+
+
+def _light(status: dict, command: str, parameter: Optional[str]) -> bool:
+    if command == ControlCommand.ColorBulb.SET_BRIGHTNESS:
+        status["brightness"] = _percentage(parameter, 1)
+    elif command == ControlCommand.ColorBulb.SET_COLOR and "color" in status:
+        status["color"] = _color(parameter)
+    elif command == ControlCommand.ColorBulb.SET_COLOR_TEMPERATURE and "colorTemperature" in status:
+        status["colorTemperature"] = _percentage(parameter, 2700, 6500)
+    else:
+        return _power(status, command, parameter)
+    return True
+
+
+def _humidifier(status: dict, command: str, parameter: Optional[str]) -> bool:
+    if command != ControlCommand.Humidifier.SET_MODE:
+        return _power(status, command, parameter)
+    if parameter == "auto":
+        status["auto"] = True
+    else:
+        efficiency = {"101": 34, "102": 67, "103": 100}.get(parameter or "")
+        status["nebulizationEfficiency"] = efficiency or _percentage(parameter)
+        status["auto"] = False
+    return True
+
+
+def _smart_fan(status: dict, command: str, parameter: Optional[str]) -> bool:
+    if command != ControlCommand.SmartFan.SET_ALL_STATUS:
+        return _power(status, command, parameter)
+    power, mode, speed, shake_range = (parameter or "").split(",")
+    if power not in ("on", "off"):
+        raise ValueError(power)
+    status.update(
+        power=power,
+        mode=_percentage(mode, 1, 2),
+        speed=_percentage(speed, 1, 4),
+        shakeRange=_percentage(shake_range, 0, 120),
+    )
+    return True
+
+
+def _lock(  # pylint: disable=unused-argument
+    status: dict, command: str, parameter: Optional[str]
+) -> bool:
+    states = {"lock": "locked", "unlock": "unlocked"}
+    if command not in states:
+        return False
+    status["lock_state"] = states[command]
+    return True
+
+
+def _robot_vacuum(status: dict, command: str, parameter: Optional[str]) -> bool:
+    states = {
+        ControlCommand.RobotVacuumCleaner.START: "Clearing",
+        ControlCommand.RobotVacuumCleaner.STOP: "Paused",
+        ControlCommand.RobotVacuumCleaner.DOCK: "Charging",
+    }
+    if command in states:
+        status["working_status"] = states[command]
+    elif command == ControlCommand.RobotVacuumCleaner.POW_LEVEL:
+        _percentage(parameter, 0, 3)
+    else:
+        return False
+    return True
+
+
+_COMMAND_HANDLERS: Dict[str, Callable[[dict, str, Optional[str]], bool]] = {
+    DeviceType.BOT: _bot,
+    DeviceType.PLUG: _power,
+    DeviceType.PLUG_MINI_US: _plug_mini,
+    DeviceType.PLUG_MINI_JP: _plug_mini,
+    DeviceType.CURTAIN: _curtain,
+    DeviceType.COLOR_BULB: _light,
+    DeviceType.STRIP_LIGHT: _light,
+    DeviceType.CEILING_LIGHT: _light,
+    DeviceType.CEILING_LIGHT_PRO: _light,
+    DeviceType.HUMIDIFIER: _humidifier,
+    DeviceType.SMART_FAN: _smart_fan,
+    DeviceType.LOCK: _lock,
+    DeviceType.ROBOT_VACUUM_CLEANER_S1: _robot_vacuum,
+    DeviceType.ROBOT_VACUUM_CLEANER_S1_PLUS: _robot_vacuum,
+}
+
+_INITIAL_STATUS: Dict[str, dict] = {
+    DeviceType.BOT: {"power": "off"},
+    DeviceType.PLUG: {"power": "off"},
+    DeviceType.PLUG_MINI_US: {
+        "power": "off",
+        "voltage": 120,
+        "weight": 0,
+        "electricityOfDay": 0,
+        "electricCurrent": 0,
+    },
+    DeviceType.PLUG_MINI_JP: {
+        "power": "off",
+        "voltage": 100,
+        "weight": 0,
+        "electricityOfDay": 0,
+        "electricCurrent": 0,
+    },
+    DeviceType.CURTAIN: {"calibrate": True, "group": False, "moving": False, "slide_position": 0},
+    DeviceType.METER: {"humidity": 50, "temperature": 25.0},
+    DeviceType.METER_PLUS: {"humidity": 50, "temperature": 25.0},
+    DeviceType.MOTION_SENSOR: {"moveDetected": False, "brightness": "bright"},
+    DeviceType.CONTACT_SENSOR: {
+        "moveDetected": False,
+        "brightness": "bright",
+        "openState": "close",
+    },
+    DeviceType.COLOR_BULB: {
+        "power": "off",
+        "brightness": 100,
+        "color": "255:255:255",
+        "colorTemperature": 4000,
+    },
+    DeviceType.STRIP_LIGHT: {"power": "off", "brightness": 100, "color": "255:255:255"},
+    DeviceType.CEILING_LIGHT: {"power": "off", "brightness": 100, "colorTemperature": 4000},
+    DeviceType.CEILING_LIGHT_PRO: {"power": "off", "brightness": 100, "colorTemperature": 4000},
+    DeviceType.HUMIDIFIER: {
+        "power": "off",
+        "humidity": 40,
+        "temperature": 22.0,
+        "nebulizationEfficiency": 0,
+        "auto": False,
+        "childLock": False,
+        "sound": True,
+        "lackWater": False,
+    },
+    DeviceType.SMART_FAN: {
+        "power": "off",
+        "mode": 1,
+        "speed": 1,
+        "shaking": False,
+        "shakeCenter": 60,
+        "shakeRange": 60,
+    },
+    DeviceType.LOCK: {"calibrate": True, "lock_state": "locked", "door_state": "closed"},
+    DeviceType.ROBOT_VACUUM_CLEANER_S1: {
+        "working_status": "Charging",
+        "online_status": "online",
+        "battery": 100,
+    },
+    DeviceType.ROBOT_VACUUM_CLEANER_S1_PLUS: {
+        "working_status": "Charging",
+        "online_status": "online",
+        "battery": 100,
+    },
+}
+
+_HUB_TYPES = (DeviceType.HUB, DeviceType.HUB_PLUS, DeviceType.HUB_MINI)
+
+
+class SwitchBotSimulator:
+    """
+    A local HTTP server implementing the SwitchBot API v1.1 for integration and load tests,
+    point a client at it with api_host_domain=simulator.url.
+    It verifies the sign header, keeps the state of every device and applies the commands
+    to it, and can inject latency, errors, offline devices and an exhausted daily quota.
+
+    token, secret_key: the credentials the clients must sign their requests with
+    latency: seconds every response is delayed, plus a random jitter of up to latency_jitter
+    error_rate: fraction of requests answered with HTTP 500
+    daily_quota: number of requests answered before every further one gets HTTP 429
+    host, port: the address to listen on, port 0 picks a free port
+    seed: seed of the random numbers used for jitter and errors
+
+    request_count: number of requests received
+    command_log: the last COMMAND_LOG_SIZE (device_id, command, parameter) commands received
+    """
+
+    COMMAND_LOG_SIZE = 10000
+    DEVICES_PER_HUB = 16
+
+    def __init__(
+        self,
+        token: str = "token",
+        secret_key: str = "secret",
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        daily_quota: int = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = None,
+    ) -> None:
+        self.token = token
+        self.secret_key = secret_key
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.daily_quota = daily_quota
+        self.devices: Dict[str, SimulatedDevice] = {}
+        self.scenes: Dict[str, str] = {}
+        self.webhooks: Dict[str, dict] = {}
+        self.offline: set = set()
+        self.request_count = 0
+        self.command_log: Deque[Tuple[str, str, Optional[str]]] = deque(
+            maxlen=self.COMMAND_LOG_SIZE
+        )
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._server = ThreadingHTTPServer((host, port), _SimulatorRequestHandler)
+        self._server.daemon_threads = True
+        self._server.simulator = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def add_device(
+        self,
+        device_type: str = None,
+        remote_type: str = None,
+        device_id: str = None,
+        device_name: str = None,
+        hub_device_id: str = "000000000000",
+        status: dict = None,
+    ) -> SimulatedDevice:
+        """
+        Add a physical device (device_type) or an infrared remote device (remote_type).
+        status: the initial status, by default a typical one for the device type
+        """
+        device_id = device_id or f"{next(self._ids):012X}"
+        device = SimulatedDevice(
+            device_id,
+            device_name or f"{device_type or remote_type} {device_id}",
+            hub_device_id,
+            device_type,
+            remote_type,
+            status,
+        )
+        with self._lock:
+            self.devices[device_id] = device
+        return device
+
+    def add_scene(self, scene_name: str, scene_id: str = None) -> str:
+        scene_id = scene_id or f"scene-{next(self._ids)}"
+        with self._lock:
+            self.scenes[scene_id] = scene_name
+        return scene_id
+
+    def populate(self, size: int) -> List[SimulatedDevice]:
+        """
+        Add size devices cycling through every DeviceType and RemoteType,
+        with a Hub Mini for every DEVICES_PER_HUB of them.
+        """
+        device_types = [
+            value
+            for name, value in vars(DeviceType).items()
+            if not name.startswith("_") and value not in _HUB_TYPES
+        ]
+        remote_types = [
+            value for name, value in vars(RemoteType).items() if not name.startswith("_")
+        ]
+        kinds = [(t, None) for t in device_types] + [(None, t) for t in remote_types]
+        added = []
+        hub_id = ""
+        for i in range(size):
+            if i % self.DEVICES_PER_HUB == 0:
+                hub_id = self.add_device(DeviceType.HUB_MINI).device_id
+            device_type, remote_type = kinds[i % len(kinds)]
+            added.append(self.add_device(device_type, remote_type, hub_device_id=hub_id))
+        return added
+
+    def set_offline(self, device_id: str, offline: bool = True):
+        """
+        Make a device answer with statusCode 161, or a hub make its devices answer with 171.
+        """
+        with self._lock:
+            if offline:
+                self.offline.add(device_id)
+            else:
+                self.offline.discard(device_id)
+
+    def reset_quota(self):
+        with self._lock:
+            self.request_count = 0
+
+    def start(self) -> SwitchBotSimulator:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _verify(self, headers) -> bool:
+        token = headers.get("Authorization", "")
+        string_to_sign = f"{token}{headers.get('t', '')}{headers.get('nonce', '')}"
+        expected = base64.b64encode(
+            hmac.new(
+                self.secret_key.encode("utf-8"),
+                msg=string_to_sign.encode("utf-8"),
+                digestmod=hashlib.sha256,
+            ).digest()
+        ).decode("utf-8")
+        return hmac.compare_digest(token, self.token) and hmac.compare_digest(
+            headers.get("sign", ""), expected
+        )
+
+    def _handle(self, method: str, path: str, headers, body: bytes) -> Tuple[int, dict]:
+        """
+        Returns the HTTP status and the JSON body of the response.
+        """
+        delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if not self._verify(headers):
+            return 401, {"message": "Unauthorized"}
+        with self._lock:
+            self.request_count += 1
+            over_quota = self.daily_quota is not None and self.request_count > self.daily_quota
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if over_quota:
+            return 429, {"message": "Too Many Requests"}
+        if failed:
+            return 500, {"message": "Internal Server Error"}
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {"message": "Bad Request"}
+        return 200, self._route(method, path, payload)
+
+    def _route(  # pylint: disable=too-many-return-statements
+        self, method: str, path: str, payload: dict
+    ) -> dict:
+        """
+        Answers a request. The simulator lock is only held to read or change its tables
+        and the lock of a device to apply a command to it, so requests run concurrently.
+        """
+        match = re.fullmatch(r"/v1\.1/(devices|scenes|webhook)(?:/([^/]+))?(?:/([^/]+))?", path)
+        if match is None:
+            return _response(190, "unknown endpoint")
+        resource, resource_id, action = match.groups()
+        if resource == "devices" and method == "GET" and resource_id is None:
+            return _response(100, body=self._devices_body())
+        if resource == "devices" and method == "GET" and action == "status":
+            return self._device_status(resource_id)
+        if resource == "devices" and method == "POST" and action == "commands":
+            return self._device_command(resource_id, payload)
+        if resource == "scenes" and method == "GET" and resource_id is None:
+            with self._lock:
+                scenes = [{"sceneId": i, "sceneName": name} for i, name in self.scenes.items()]
+            return _response(100, body=scenes)
+        if resource == "scenes" and method == "POST" and action == "execute":
+            with self._lock:
+                found = resource_id in self.scenes
+            return _response(100) if found else _response(190, "scene not found")
+        if resource == "webhook" and method == "POST" and action is None:
+            with self._lock:
+                return self._webhook(resource_id, payload)
+        return _response(190, "unknown endpoint")
+
+    def _devices_body(self) -> dict:
+        with self._lock:
+            devices = [device.api_object() for device in self.devices.values()]
+        return {
+            "deviceList": [d for d in devices if "deviceType" in d],
+            "infraredRemoteList": [d for d in devices if "remoteType" in d],
+        }
+
+    def _lookup(self, device_id: str) -> Tuple[Optional[SimulatedDevice], Optional[int]]:
+        """
+        Returns the device and the statusCode of its offline device (161) or hub (171), if any.
+        """
+        with self._lock:
+            device = self.devices.get(device_id)
+            if device is None:
+                return None, None
+            if device.device_id in self.offline:
+                return device, 161
+            if device.hub_device_id in self.offline:
+                return device, 171
+            return device, None
+
+    def _device_status(self, device_id: str) -> dict:
+        device, offline = self._lookup(device_id)
+        if device is None or device.is_virtual_infrared:
+            return _response(190, "wrong deviceId")
+        if offline is not None:
+            return _response(offline, "device offline")
+        with device.lock:
+            body = device.status_body()
+        return _response(100, body=body)
+
+    def _device_command(self, device_id: str, payload: dict) -> dict:
+        device, offline = self._lookup(device_id)
+        if device is None:
+            return _response(152, "device not found")
+        if offline is not None:
+            return _response(offline, "device offline")
+        command = payload.get("command", "")
+        parameter = payload.get("parameter")
+        self.command_log.append((device_id, command, parameter))
+        with device.lock:
+            status_code = device.apply(command, parameter, payload.get("command_type"))
+        return _response(status_code, "success" if status_code == 100 else "command failed")
+
+    def _webhook(  # pylint: disable=too-many-return-statements
+        self, action: str, payload: dict
+    ) -> dict:
+        now = int(time.time() * 1000)
+        if action == "setupWebhook":
+            self.webhooks[payload["url"]] = {
+                "url": payload["url"],
+                "createTime": now,
+                "lastUpdateTime": now,
+                "deviceList": payload.get("deviceList", "ALL"),
+                "enable": True,
+            }
+            return _response(100)
+        if action == "queryWebhook" and payload.get("action") == "queryUrl":
+            return _response(100, body={"urls": list(self.webhooks)})
+        if action == "queryWebhook" and payload.get("action") == "queryDetails":
+            details = [
+                self.webhooks[url] for url in payload.get("urls", []) if url in self.webhooks
+            ]
+            return _response(100, body=details)
+        if action == "updateWebhook":
+            config = payload.get("config", {})
+            webhook = self.webhooks.get(config.get("url"))
+            if webhook is None:
+                return _response(190, "webhook not found")
+            webhook.update(enable=config.get("enable", webhook["enable"]), lastUpdateTime=now)
+            return _response(100)
+        if action == "deleteWebhook":
+            self.webhooks.pop(payload.get("url", ""), None)
+            return _response(100)
+        return _response(190, "unknown webhook action")
+
+
+def _response(status_code: int, message: str = "success", body: Any = None) -> dict:
+    return {"statusCode": status_code, "message": message, "body": {} if body is None else body}
+
+
+class _SimulatorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._respond("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._respond("POST")
+
+    def do_HEAD(self):  # pylint: disable=invalid-name
+        self.send_response(200)
+        self.send_header("content-length", "0")
+        self.end_headers()
+
+    def _respond(self, method: str):
+        length = int(self.headers.get("content-length") or 0)
+        body = self.rfile.read(length) if length else b""
+        simulator: SwitchBotSimulator = self.server.simulator  # type: ignore[attr-defined]
+        status, response = simulator._handle(  # pylint: disable=protected-access
+            method, self.path, self.headers, body
+        )
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        logging.debug("simulator: " + format, *args)
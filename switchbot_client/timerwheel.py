@@ -0,0 +1,94 @@
+import heapq
+import itertools
+from typing import Any, List, Sequence, Tuple
+
+
+class TimerWheel:
+    """
+    A hierarchical timer wheel storing items by integer tick.
+    Adding an item and expiring a tick take constant time independent of the number of items,
+    items of the outer wheels are moved inwards once their slot comes up.
+    It is not thread-safe.
+    """
+
+    DEFAULT_SLOTS = (256, 64, 64, 64)
+
+    def __init__(self, slots: Sequence[int] = DEFAULT_SLOTS, start: int = 0):
+        """
+        slots: number of slots of each wheel, the innermost first.
+            Items further in the future than all wheels cover wait in an overflow heap.
+        start: the current tick
+        """
+        if not slots or min(slots) < 2:
+            raise ValueError("every wheel needs at least 2 slots")
+        self.current = start
+        self._sizes = list(slots)
+        self._slot_ticks = [1]
+        for size in self._sizes[:-1]:
+            self._slot_ticks.append(self._slot_ticks[-1] * size)
+        self._spans = [ticks * size for ticks, size in zip(self._slot_ticks, self._sizes)]
+        self._wheels: List[List[List[Tuple[int, Any]]]] = [
+            [[] for _ in range(size)] for size in self._sizes
+        ]
+        self._overflow: List[Tuple[int, int, Any]] = []
+        self._sequence = itertools.count()
+        self._due: List[Any] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, tick: int, item: Any):
+        """
+        Store an item which expires at tick, items of past ticks expire with the next advance().
+        """
+        self._count += 1
+        self._place(tick, item)
+
+    def advance(self, tick: int) -> List[Any]:
+        """
+        Move the wheel forward to tick and return the items which expired on the way,
+        in the order of their ticks.
+        """
+        expired, self._due = self._due, []
+        while self.current < tick:
+            self.current += 1
+            self._cascade()
+            if self._due:
+                expired.extend(self._due)
+                self._due = []
+            slot = self._wheels[0][self.current % self._sizes[0]]
+            if slot:
+                expired.extend(item for _, item in slot)
+                slot.clear()
+        self._count -= len(expired)
+        return expired
+
+    def _place(self, tick: int, item: Any):
+        delta = tick - self.current
+        if delta <= 0:
+            self._due.append(item)
+            return
+        for level, span in enumerate(self._spans):
+            if delta < span:
+                index = (tick // self._slot_ticks[level]) % self._sizes[level]
+                self._wheels[level][index].append((tick, item))
+                return
+        heapq.heappush(self._overflow, (tick, next(self._sequence), item))
+
+    def _cascade(self):
+        for level in range(1, len(self._sizes)):
+            if self.current % self._slot_ticks[level] != 0:
+                break
+            index = (self.current // self._slot_ticks[level]) % self._sizes[level]
+            slot = self._wheels[level][index]
+            if slot:
+                entries = list(slot)
+                slot.clear()
+                for tick, item in entries:
+                    self._place(tick, item)
+        if self.current % self._spans[-1] == 0:
+            limit = self.current + self._spans[-1]
+            while self._overflow and self._overflow[0][0] < limit:
+                tick, _, item = heapq.heappop(self._overflow)
+                self._place(tick, item)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Type, Union
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from typing_extensions import Protocol
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+class SwitchBotHTTPResponse(Protocol):
+    """
+    The HTTP response returned by a transport, a requests.Response fits it.
+    """
+
+    status_code: int
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        """
+        The response headers.
+        """
+
+    @property
+    def content(self) -> bytes:
+        """
+        The response body.
+        """
+
+    @property
+    def text(self) -> str:
+        """
+        The response body decoded as UTF-8.
+        """
+
+    def json(self) -> Any:
+        """
+        The response body parsed as JSON.
+        """
+
+
+class SwitchBotRawResponse:
+    """
+    A SwitchBotHTTPResponse built from the status, headers and body bytes,
+    returned by the transports which do not use requests.
+    """
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", "replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class SwitchBotTransport(Protocol):
+    """
+    Sends the signed requests of SwitchBotAPIClient.
+    The client builds the url, the headers including the signature and the JSON body,
+    the transport only moves them over the wire.
+    retryable_errors: exceptions raised by send() after which the client may retry the request
+    """
+
+    retryable_errors: Tuple[Type[BaseException], ...]
+
+    def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> SwitchBotHTTPResponse:
+        """
+        Send a request and return its response, raise an error if no response arrived.
+        """
+
+    def prewarm(self, url: str):
+        """
+        Open a pooled connection to url ahead of the first request, errors are only logged.
+        """
+
+    def close(self):
+        """
+        Close the pooled connections.
+        """
+
+
+class SwitchBotRequestsTransport(SwitchBotTransport):
+    """
+    The default transport, a pooled requests.Session.
+    session: a requests.Session to share with other clients instead of creating a new one
+    pool_size: maximum number of connections kept open to a host
+    keep_alive: reuse connections between requests, set False to close them after each call
+    connect_timeout, read_timeout: timeouts in seconds passed to every request
+    """
+
+    retryable_errors = (requests.ConnectionError, requests.Timeout)
+
+    def __init__(
+        self,
+        session: requests.Session = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ) -> None:
+        self.session = session if session is not None else create_session(pool_size, keep_alive)
+        self.timeout = (connect_timeout, read_timeout)
+
+    def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> requests.Response:
+        if method == "GET":
+            return self.session.get(url, headers=headers, timeout=self.timeout)
+        return self.session.post(url, headers=headers, data=body, timeout=self.timeout)
+
+    def prewarm(self, url: str):
+        try:
+            self.session.head(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.warning("failed to prewarm connection to %s: %s", url, e)
+
+    def close(self):
+        self.session.close()
+
+
+def create_session(pool_size: int, keep_alive: bool) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+class SwitchBotUrllib3Transport(SwitchBotTransport):
+    """
+    A transport on a urllib3.PoolManager, skipping the session, hook and adapter layers
+    of requests. urllib3 is installed with requests.
+    pool_size, keep_alive, connect_timeout, read_timeout: as for SwitchBotRequestsTransport
+    """
+
+    retryable_errors = (
+        urllib3.exceptions.NewConnectionError,
+        urllib3.exceptions.ProtocolError,
+        urllib3.exceptions.TimeoutError,
+    )
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ) -> None:
+        self.keep_alive = keep_alive
+        self.pool = urllib3.PoolManager(
+            maxsize=pool_size,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            retries=False,
+        )
+
+    def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> SwitchBotRawResponse:
+        if not self.keep_alive:
+            headers = {**headers, "Connection": "close"}
+        response = self.pool.request(method, url, body=body, headers=headers, redirect=False)
+        return SwitchBotRawResponse(response.status, response.headers, response.data)
+
+    def prewarm(self, url: str):
+        try:
+            self.pool.request("HEAD", url, redirect=False)
+        except urllib3.exceptions.HTTPError as e:
+            logging.warning("failed to prewarm connection to %s: %s", url, e)
+
+    def close(self):
+        self.pool.clear()
+
+
+class SwitchBotFakeTransport(SwitchBotTransport):
+    """
+    An in-process transport which answers without any I/O,
+    to measure the overhead of the client apart from the network.
+    handler: returns the HTTP status and the JSON body, a dict or bytes, for the method,
+        the url and the request body. By default every request succeeds with an empty body.
+    requests: number of requests sent so far
+    """
+
+    retryable_errors: Tuple[Type[BaseException], ...] = ()
+    DEFAULT_RESPONSE = b'{"statusCode":100,"message":"success","body":{}}'
+    HEADERS = {"content-type": "application/json"}
+
+    def __init__(
+        self,
+        handler: Callable[[str, str, Optional[bytes]], Tuple[int, Union[dict, bytes]]] = None,
+    ) -> None:
+        self.handler = handler
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def send(
+        self, method: str, url: str, headers: Dict[str, str], body: Optional[bytes]
+    ) -> SwitchBotRawResponse:
+        with self._lock:
+            self.requests += 1
+        if self.handler is None:
+            return SwitchBotRawResponse(200, self.HEADERS, self.DEFAULT_RESPONSE)
+        status, content = self.handler(method, url, body)
+        if not isinstance(content, bytes):
+            content = json.dumps(content).encode("utf-8")
+        return SwitchBotRawResponse(status, self.HEADERS, content)
+
+    def prewarm(self, url: str):
+        pass
+
+    def close(self):
+        pass
@@ -11,3 +11,13 @@ class SwitchBotWebhook:
     device_list: str
     create_time: datetime
     last_update_time: datetime
+
+    @staticmethod
+    def create_by_api_object(webhook: dict) -> SwitchBotWebhook:
+        return SwitchBotWebhook(
+            webhook["url"],
+            webhook["enable"],
+            webhook["deviceList"],
+            datetime.fromtimestamp(webhook["createTime"] / 1000),
+            datetime.fromtimestamp(webhook["lastUpdateTime"] / 1000),
+        )
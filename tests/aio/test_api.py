@@ -0,0 +1,225 @@
+import asyncio
+import json
+
+import pytest
+
+from switchbot_client import ControlCommand, SwitchBotPriority, SwitchBotRateLimiter
+from switchbot_client.constants import AppConstants
+
+pytest.importorskip("aiohttp")
+
+from switchbot_client.aio import (  # noqa: E402
+    AsyncSwitchBotAPIClient,
+    AsyncSwitchBotFakeTransport,
+    AsyncSwitchBotRequestScheduler,
+)
+
+
+class MockResponse:
+    headers = {"content-type": "application/json"}
+
+    def __init__(self, body, status=200):
+        self.body = body
+        self.status = status
+
+    async def read(self):
+        return json.dumps(self.body).encode("utf-8")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class MockSession:
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+        self.closed = False
+
+    def get(self, url, **kwargs):
+        assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
+        self.requests.append(("GET", url, kwargs))
+        return MockResponse(self.body)
+
+    def post(self, url, **kwargs):
+        assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
+        self.requests.append(("POST", url, kwargs))
+        return MockResponse(self.body)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_devices_status():
+    expected = {
+        "statusCode": 100,
+        "message": "success",
+        "body": {
+            "deviceId": "device_foo",
+            "deviceType": "Meter",
+            "hubDeviceId": "ABCDE",
+            "humidity": 50,
+            "temperature": 25.0,
+        },
+    }
+    session = MockSession(expected)
+    client = AsyncSwitchBotAPIClient("token", "key", session=session)
+    sut = asyncio.run(client.devices_status("device_foo"))
+    assert sut.status_code == expected.get("statusCode")
+    assert sut.message == expected.get("message")
+    assert sut.body == expected.get("body")
+    assert session.requests[0][1] == "https://api.switch-bot.com/v1.1/devices/device_foo/status"
+    assert session.requests[0][2]["headers"]["Authorization"] == "token"
+
+
+def test_devices_status_wrong_device_error():
+    session = MockSession({"statusCode": 190, "message": "error message", "body": {}})
+    client = AsyncSwitchBotAPIClient("token", "key", session=session)
+    with pytest.raises(RuntimeError) as e:
+        asyncio.run(client.devices_status("device_foo"))
+    assert "Wrong device ID or trying to get infrared virtual device status" in str(e.value)
+
+
+def test_devices_status_broken_response():
+    session = MockSession({"someInvalidResponse": "panic"})
+    client = AsyncSwitchBotAPIClient("token", "key", session=session)
+    with pytest.raises(RuntimeError) as e:
+        asyncio.run(client.devices_status("device_foo"))
+    assert "format error" in str(e.value)
+
+
+def test_devices_status_unauthorized():
+    session = MockSession({"message": "Unauthorized"})
+    client = AsyncSwitchBotAPIClient("token", "key", session=session)
+    with pytest.raises(RuntimeError) as e:
+        asyncio.run(client.devices_status("device_foo"))
+    assert "Http 401 Error. User permission is denied due to invalid token." in str(e.value)
+
+
+def test_devices_commands():
+    session = MockSession({"statusCode": 100, "message": "success", "body": {}})
+    client = AsyncSwitchBotAPIClient("token", "key", session=session)
+    sut = asyncio.run(
+        client.devices_commands(
+            "device_foo",
+            ControlCommand.ColorBulb.SET_BRIGHTNESS,
+            parameter="50",
+            command_type="command",
+        )
+    )
+    assert sut.message == "success"
+    method, url, kwargs = session.requests[0]
+    assert method == "POST"
+    assert url == "https://api.switch-bot.com/v1.1/devices/device_foo/commands"
+    assert json.loads(kwargs["data"]) == {
+        "command": "setBrightness",
+        "parameter": "50",
+        "command_type": "command",
+    }
+
+
+def test_concurrent_requests_share_session():
+    session = MockSession({"statusCode": 100, "message": "success", "body": {}})
+
+    async def run():
+        async with AsyncSwitchBotAPIClient("token", "key", session=session) as client:
+            return await asyncio.gather(*[client.devices_status(f"d{i}") for i in range(50)])
+
+    results = asyncio.run(run())
+    assert len(results) == 50
+    assert len(session.requests) == 50
+    assert session.closed
+
+
+def test_scenes_and_webhooks():
+    session = MockSession({"statusCode": 100, "message": "success", "body": []})
+    client = AsyncSwitchBotAPIClient("token", "key", session=session)
+
+    async def run():
+        await client.scenes()
+        await client.scenes_execute("scene_foo")
+        await client.webhook_setup("https://example.com")
+        await client.webhook_query_url()
+        await client.webhook_query_details(["https://example.com"])
+        await client.webhook_update({"url": "https://example.com", "enable": True})
+        await client.webhook_delete("https://example.com")
+
+    asyncio.run(run())
+    assert [(m, u.split("/v1.1/")[1]) for m, u, _ in session.requests] == [
+        ("GET", "scenes"),
+        ("POST", "scenes/scene_foo/execute"),
+        ("POST", "webhook/setupWebhook"),
+        ("POST", "webhook/queryWebhook"),
+        ("POST", "webhook/queryWebhook"),
+        ("POST", "webhook/updateWebhook"),
+        ("POST", "webhook/deleteWebhook"),
+    ]
+
+
+def test_scheduler_serves_interactive_first():
+    order = []
+
+    async def run():
+        scheduler = AsyncSwitchBotRequestScheduler(max_concurrency=1)
+
+        async def request(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+
+        await scheduler.acquire(SwitchBotPriority.BACKGROUND)
+        tasks = [
+            asyncio.create_task(request("read", SwitchBotPriority.BACKGROUND)),
+            asyncio.create_task(request("cancelled", SwitchBotPriority.BACKGROUND)),
+            asyncio.create_task(request("command", SwitchBotPriority.INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert scheduler.active == 0
+        assert scheduler.stats()[SwitchBotPriority.BACKGROUND].waiting == 0
+
+        sut = AsyncSwitchBotAPIClient(
+            "token",
+            "key",
+            session=MockSession({"statusCode": 100, "message": "success", "body": {}}),
+            scheduler=scheduler,
+        )
+        await sut.devices()
+        await sut.devices_commands("device_foo", "turnOn")
+        stats = scheduler.stats()
+        assert stats[SwitchBotPriority.BACKGROUND].started == 3
+        assert stats[SwitchBotPriority.INTERACTIVE].started == 2
+
+    asyncio.run(run())
+    assert order == ["command", "read"]
+
+
+def test_fake_transport():
+    transport = AsyncSwitchBotFakeTransport()
+    client = AsyncSwitchBotAPIClient("token", "key", transport=transport)
+    assert asyncio.run(client.devices()).status_code == 100
+    assert transport.requests == 1
+
+
+def test_interactive_requests_take_the_next_rate_token():
+    async def run():
+        limiter = SwitchBotRateLimiter(rate=10.0, burst=1)
+        scheduler = AsyncSwitchBotRequestScheduler(max_concurrency=4)
+        session = MockSession({"statusCode": 100, "message": "success", "body": {}})
+        sut = AsyncSwitchBotAPIClient(
+            "token", "key", session=session, rate_limiter=limiter, scheduler=scheduler
+        )
+        assert limiter.try_acquire() == 0
+        reads = [asyncio.create_task(sut.devices_status(f"device_{i}")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        await sut.devices_commands("device_foo", "turnOn")
+        await asyncio.gather(*reads)
+        return session.requests
+
+    requests = asyncio.run(run())
+    assert len(requests) == 4
+    assert requests[0][1].endswith("devices/device_foo/commands")
@@ -0,0 +1,378 @@
+import asyncio
+
+import pytest
+
+from switchbot_client import ControlCommand
+from switchbot_client.api import SwitchBotAPIResponse
+from switchbot_client.devices import MeterDeviceStatus, PseudoAirConditionerStatus
+
+pytest.importorskip("aiohttp")
+
+from switchbot_client.aio import (  # noqa: E402
+    AsyncAirConditioner,
+    AsyncBot,
+    AsyncHubMini,
+    AsyncLight,
+    AsyncMeter,
+    AsyncSwitchBotAPIClient,
+    AsyncSwitchBotClient,
+    AsyncSwitchBotCommandCoalescer,
+    AsyncSwitchBotIRDispatcher,
+)
+from switchbot_client.aio.devices import (  # noqa: E402
+    ASYNC_DEVICE_CLASSES,
+    ASYNC_DEVICE_REGISTRY,
+)
+from switchbot_client.devices import DEVICE_REGISTRY  # noqa: E402
+
+DEVICES = {
+    "deviceList": [
+        {
+            "deviceId": "METER",
+            "deviceName": "Meter 0A",
+            "deviceType": "Meter",
+            "enableCloudService": True,
+            "hubDeviceId": "HUB",
+        },
+        {
+            "deviceId": "BOT",
+            "deviceName": "Bot 0A",
+            "deviceType": "Bot",
+            "enableCloudService": True,
+            "hubDeviceId": "HUB",
+        },
+        {
+            "deviceId": "HUB",
+            "deviceName": "Hub Mini 0",
+            "deviceType": "Hub Mini",
+            "hubDeviceId": "000000000000",
+        },
+    ],
+    "infraredRemoteList": [
+        {
+            "deviceId": "LIGHT",
+            "deviceName": "My Light",
+            "remoteType": "Light",
+            "hubDeviceId": "HUB",
+        },
+        {
+            "deviceId": "AC",
+            "deviceName": "My Air Conditioner",
+            "remoteType": "Air Conditioner",
+            "hubDeviceId": "HUB",
+        },
+    ],
+}
+
+STATUSES = {
+    "METER": {"deviceId": "METER", "deviceType": "Meter", "humidity": 50, "temperature": 25},
+    "BOT": {"deviceId": "BOT", "deviceType": "Bot", "power": "on"},
+}
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    sent = []
+
+    async def mock_devices(self):
+        return SwitchBotAPIResponse(100, "success", {k: list(v) for k, v in DEVICES.items()})
+
+    async def mock_devices_status(self, device_id):
+        return SwitchBotAPIResponse(100, "success", STATUSES[device_id])
+
+    async def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        await asyncio.sleep(0)
+        sent.append((device_id, command, parameter))
+        return SwitchBotAPIResponse(100, "success", {})
+
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "devices", mock_devices)
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "devices_status", mock_devices_status)
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    return sent
+
+
+def test_devices(commands):
+    client = AsyncSwitchBotClient("token", "key")
+    sut = asyncio.run(client.devices())
+    assert sorted([type(e) for e in sut], key=lambda e: e.__name__) == [
+        AsyncAirConditioner,
+        AsyncBot,
+        AsyncHubMini,
+        AsyncLight,
+        AsyncMeter,
+    ]
+    assert asyncio.run(client.device("HUB")).hub_device_id is None
+    assert asyncio.run(client.device("some_not_exists_id")) is None
+
+
+def test_device_registry():
+    for device_type, device_class in DEVICE_REGISTRY.physical_classes().items():
+        assert (
+            ASYNC_DEVICE_REGISTRY.physical_class(device_type) is ASYNC_DEVICE_CLASSES[device_class]
+        )
+    for remote_type, device_class in DEVICE_REGISTRY.remote_classes().items():
+        assert ASYNC_DEVICE_REGISTRY.remote_class(remote_type) is ASYNC_DEVICE_CLASSES[device_class]
+    assert ASYNC_DEVICE_REGISTRY.entry_point_group == "switchbot_client.aio.devices"
+
+
+def test_physical_device(commands):
+    client = AsyncSwitchBotClient("token", "key")
+
+    async def run():
+        meter = await AsyncMeter.create_by_id(client, "METER")
+        bot = await client.device("BOT")
+        return await meter.status(), await meter.temperature(), await bot.press()
+
+    status, temperature, result = asyncio.run(run())
+    assert isinstance(status, MeterDeviceStatus)
+    assert status.humidity == 50
+    assert temperature == 25.0
+    assert result.message == "success"
+    assert commands == [("BOT", ControlCommand.Bot.PRESS, None)]
+
+
+def test_toggle(commands):
+    client = AsyncSwitchBotClient("token", "key")
+
+    async def run():
+        bot = await AsyncBot.create_by_id(client, "BOT")
+        return await bot.is_turned_on(), await bot.toggle()
+
+    is_turned_on, _ = asyncio.run(run())
+    assert is_turned_on
+    assert commands == [("BOT", ControlCommand.Common.TURN_OFF, None)]
+
+
+def test_remote_device(commands):
+    client = AsyncSwitchBotClient("token", "key")
+
+    async def run():
+        ac = await AsyncAirConditioner.create_by_id(client, "AC")
+        await ac.set_all(
+            temperature=20.0,
+            mode=AsyncAirConditioner.Parameters.MODE_COOL,
+            fan_speed=AsyncAirConditioner.Parameters.FAN_SPEED_HIGH,
+            power=AsyncAirConditioner.Parameters.POWER_ON,
+        )
+        await ac.set_temperature(22.0)
+        await ac.turn_off()
+        return await ac.status()
+
+    status = asyncio.run(run())
+    assert isinstance(status, PseudoAirConditionerStatus)
+    assert status.temperature == 22.0
+    assert status.power == "off"
+    assert commands == [
+        ("AC", ControlCommand.VirtualInfrared.SET_ALL, "20.0,2,4,on"),
+        ("AC", ControlCommand.VirtualInfrared.SET_ALL, "22.0,2,4,on"),
+        ("AC", ControlCommand.Common.TURN_OFF, None),
+    ]
+
+
+def test_gather(commands):
+    client = AsyncSwitchBotClient("token", "key")
+
+    async def run():
+        devices = await client.devices()
+        return await asyncio.gather(*[d.turn_off() for d in devices if hasattr(d, "turn_off")])
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert sorted(c[0] for c in commands) == ["AC", "BOT", "LIGHT"]
+
+
+def test_scenes(monkeypatch):
+    executed = []
+
+    async def mock_scenes(self):
+        return SwitchBotAPIResponse(100, "success", [{"sceneId": "S1", "sceneName": "Scene 1"}])
+
+    async def mock_scenes_execute(self, scene_id):
+        executed.append(scene_id)
+        return SwitchBotAPIResponse(100, "success", {})
+
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "scenes", mock_scenes)
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "scenes_execute", mock_scenes_execute)
+    client = AsyncSwitchBotClient("token", "key")
+
+    async def run():
+        scene = await client.scene("S1")
+        return await scene.execute(), await client.scene("some_not_exists_id")
+
+    result, not_found = asyncio.run(run())
+    assert result.message == "success"
+    assert not_found is None
+    assert executed == ["S1"]
+
+
+def test_inventory_is_shared(commands, monkeypatch):
+    calls = []
+
+    async def mock_devices(self):
+        calls.append(1)
+        return SwitchBotAPIResponse(100, "success", DEVICES)
+
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "devices", mock_devices)
+
+    async def run():
+        client = AsyncSwitchBotClient("token", "key")
+        await client.devices()
+        await client.device("BOT")
+        await AsyncMeter.create_by_id(client, "METER")
+        await AsyncLight.create_by_id(client, "LIGHT")
+        assert len(calls) == 1
+        client.invalidate_inventory()
+        await client.devices()
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_snapshot(commands, monkeypatch):
+    calls = []
+
+    async def mock_devices_status(self, device_id):
+        calls.append(device_id)
+        return SwitchBotAPIResponse(100, "success", STATUSES[device_id])
+
+    monkeypatch.setattr(AsyncSwitchBotAPIClient, "devices_status", mock_devices_status)
+
+    async def run():
+        client = AsyncSwitchBotClient("token", "key", status_ttl=0)
+        meter = await AsyncMeter.create_by_id(client, "METER")
+        async with meter.snapshot() as status:
+            assert status.temperature == 25
+            assert await meter.temperature() == 25
+            assert await meter.humidity() == 50
+        assert len(calls) == 1
+        assert await meter.read(["temperature", "humidity"]) == {"temperature": 25, "humidity": 50}
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_statuses(commands):
+    async def run():
+        client = AsyncSwitchBotClient("token", "key")
+        meter = await client.device("METER")
+        results = {}
+        async for result in client.statuses([meter, "BOT", "HUB", "UNKNOWN"], concurrency=2):
+            results[result.device_id] = result
+        return results
+
+    results = asyncio.run(run())
+    assert results["METER"].status.humidity == 50
+    assert results["BOT"].status.power == "on"
+    assert isinstance(results["HUB"].error, KeyError)
+    assert isinstance(results["UNKNOWN"].error, RuntimeError)
+
+
+def test_execute_many(commands):
+    async def run():
+        client = AsyncSwitchBotClient("token", "key")
+        bot = await client.device("BOT")
+        return await client.execute_many(
+            [(bot, ControlCommand.Bot.PRESS), ("LIGHT", "turnOff"), ("UNKNOWN", "turnOff")],
+            hub_interval=0,
+        )
+
+    sut = asyncio.run(run())
+    assert [item.ok for item in sut.items] == [True, True, False]
+    assert commands == [
+        ("BOT", ControlCommand.Bot.PRESS, None),
+        ("LIGHT", "turnOff", None),
+    ]
+    assert sut.hub_count == 1
+
+
+def test_skip_satisfied_commands(commands):
+    async def run():
+        client = AsyncSwitchBotClient("token", "key", skip_satisfied_commands=True)
+        bot = await client.device("BOT")
+        light = await client.device("LIGHT")
+        await bot.status()
+        skipped_bot = await bot.turn_on()
+        await light.turn_on()
+        skipped_light = await light.turn_on()
+        return client, skipped_bot, skipped_light
+
+    client, skipped_bot, skipped_light = asyncio.run(run())
+    assert skipped_bot.skipped
+    assert skipped_light.skipped
+    assert client.saved_calls == 2
+    assert commands == [("LIGHT", "turnOn", None)]
+
+
+def test_optimistic_updates(commands):
+    async def run():
+        client = AsyncSwitchBotClient("token", "key", optimistic_updates=True, reconcile_delay=0)
+        bot = await client.device("BOT")
+        await bot.toggle()
+        power = await bot.power()
+        metadata = client.status_metadata("BOT")
+        await bot.toggle()
+        await asyncio.sleep(0.01)
+        return power, metadata, client.status_metadata("BOT"), await bot.power()
+
+    power, metadata, reconciled, reconciled_power = asyncio.run(run())
+    assert power == "off"
+    assert metadata.is_optimistic
+    assert not reconciled.is_optimistic
+    assert reconciled_power == "on"
+    assert commands == [("BOT", "turnOff", None), ("BOT", "turnOn", None)]
+
+
+def test_reconcile(commands):
+    async def run():
+        client = AsyncSwitchBotClient("token", "key")
+        ac = await client.device("AC")
+        first = await client.reconcile(
+            [("BOT", {"power": "off"}), (ac, {"temperature": 22, "power": "on"})], hub_interval=0
+        )
+        second = await client.reconcile([(ac, {"temperature": 22})], hub_interval=0)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.ok
+    assert first.items[0].changes == {"power": ("on", "off")}
+    assert not second.changed
+    assert commands == [("BOT", "turnOff", None), ("AC", "setAll", "22,1,1,on")]
+
+
+def test_command_coalescer(commands):
+    async def run():
+        coalescer = AsyncSwitchBotCommandCoalescer(window=0.01)
+        client = AsyncSwitchBotClient("token", "key", command_coalescer=coalescer)
+        ac = await client.device("AC")
+        results = await asyncio.gather(
+            ac.set_temperature(22), ac.set_temperature(23), ac.set_temperature(24)
+        )
+        await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [result.coalesced for result in results] == [True, True, False]
+    assert commands == [("AC", "setAll", "24,1,1,on")]
+
+
+def test_ir_dispatcher(commands):
+    async def run():
+        dispatcher = AsyncSwitchBotIRDispatcher(interval=0.01)
+        client = AsyncSwitchBotClient("token", "key", ir_dispatcher=dispatcher)
+        light = await client.device("LIGHT")
+        ac = await client.device("AC")
+        await asyncio.gather(
+            light.repeat(ControlCommand.VirtualInfrared.BRIGHTNESS_UP, 2), ac.turn_on()
+        )
+        stats = dispatcher.stats()
+        await client.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["HUB"].sent == 3
+    assert stats["HUB"].depth == 0
+    assert commands == [
+        ("LIGHT", "brightnessUp", None),
+        ("LIGHT", "brightnessUp", None),
+        ("AC", "turnOn", None),
+    ]
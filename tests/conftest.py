@@ -1,7 +1,56 @@
+import threading
+import time
+
 import pytest
 
+from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
+from switchbot_client.devices import SwitchBotRemoteDevice
+
 
 @pytest.fixture(autouse=True)
 def no_requests(monkeypatch):
     """Remove requests.sessions.Session.request for all tests."""
     monkeypatch.delattr("requests.sessions.Session.request")
+
+
+class SentCommands(list):
+    """(device_id, command, parameter) of the commands sent, times: when each one was sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Record device commands and scene executions instead of sending them."""
+    calls = SentCommands()
+    lock = threading.Lock()
+
+    def record(device_id, command, parameter):
+        with lock:
+            calls.append((device_id, command, parameter))
+            calls.times.append(time.monotonic())
+        return SwitchBotAPIResponse(100, "success", {})
+
+    def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        return record(device_id, command, parameter)
+
+    def mock_scenes_execute(self, scene_id):
+        return record(scene_id, "execute", None)
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    monkeypatch.setattr(SwitchBotAPIClient, "scenes_execute", mock_scenes_execute)
+    return calls
+
+
+@pytest.fixture
+def create_device():
+    """Create device objects from an api object without fetching the device list."""
+
+    def create(client, device_class, device_id, device_type, hub_id="HUB"):
+        type_key = "remoteType" if issubclass(device_class, SwitchBotRemoteDevice) else "deviceType"
+        api_object = {"deviceId": device_id, "deviceName": "", type_key: device_type}
+        return device_class(client, {**api_object, "hubDeviceId": hub_id})
+
+    return create
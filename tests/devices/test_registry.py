@@ -0,0 +1,108 @@
+import pytest
+
+from switchbot_client import DeviceType, RemoteType, SwitchBotClient
+from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
+from switchbot_client.devices import (
+    DEVICE_REGISTRY,
+    TV,
+    Meter,
+    SwitchBotDeviceFactory,
+    SwitchBotDeviceRegistry,
+    SwitchBotPhysicalDevice,
+)
+from switchbot_client.devices import registry as registry_module
+
+CEILING_LIGHT = {
+    "deviceId": "LIGHT",
+    "deviceName": "My Ceiling Light",
+    "deviceType": DeviceType.CEILING_LIGHT,
+    "hubDeviceId": "HUB",
+    "enableCloudService": True,
+}
+
+
+class CeilingLight(SwitchBotPhysicalDevice):
+    pass
+
+
+class FakeEntryPoint:
+    name = "ceiling_light"
+
+    def __init__(self):
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return lambda registry: registry.register_physical(DeviceType.CEILING_LIGHT, CeilingLight)
+
+
+def test_builtin_classes():
+    assert DEVICE_REGISTRY.physical_class(DeviceType.METER) is Meter
+    assert DEVICE_REGISTRY.remote_class(RemoteType.TV) is TV
+    assert DEVICE_REGISTRY.physical_class(DeviceType.CEILING_LIGHT) is None
+    assert SwitchBotDeviceFactory.create(None, CEILING_LIGHT) is None
+    assert SwitchBotDeviceFactory.create(None, {"deviceId": "X"}) is None
+
+
+def test_register():
+    sut = SwitchBotDeviceRegistry(entry_point_group=None)
+    sut.register_physical(DeviceType.CEILING_LIGHT, CeilingLight)
+    sut.register_physical(DeviceType.CEILING_LIGHT, CeilingLight)
+    with pytest.raises(RuntimeError):
+        sut.register_physical(DeviceType.CEILING_LIGHT, Meter)
+    client = SwitchBotClient("token", "key")
+    assert isinstance(sut.create(client, CEILING_LIGHT), CeilingLight)
+    sut.register_physical(DeviceType.CEILING_LIGHT, Meter, replace=True)
+    assert sut.physical_class(DeviceType.CEILING_LIGHT) is Meter
+    assert sut.create(client, {**CEILING_LIGHT, "deviceType": DeviceType.METER}) is None
+
+
+def test_entry_points(monkeypatch):
+    entry_point = FakeEntryPoint()
+    groups = []
+
+    def entry_points(group):
+        groups.append(group)
+        return [entry_point]
+
+    monkeypatch.setattr(registry_module, "_entry_points", entry_points)
+    sut = SwitchBotDeviceRegistry()
+    assert entry_point.loads == 0
+    assert sut.physical_class(DeviceType.CEILING_LIGHT) is CeilingLight
+    assert sut.remote_class(RemoteType.TV) is None
+    assert entry_point.loads == 1
+    assert groups == ["switchbot_client.devices"]
+
+
+def test_client_devices(monkeypatch):
+    def mock_devices(*args, **kwargs):
+        return SwitchBotAPIResponse(
+            100, "success", {"deviceList": [CEILING_LIGHT], "infraredRemoteList": []}
+        )
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices", mock_devices)
+    monkeypatch.setattr(DEVICE_REGISTRY, "_physical", DEVICE_REGISTRY.physical_classes())
+    client = SwitchBotClient("token", "key")
+    assert client.devices() == []
+
+    DEVICE_REGISTRY.register_physical(DeviceType.CEILING_LIGHT, CeilingLight)
+    client.invalidate_inventory()
+    assert [type(e) for e in client.devices()] == [CeilingLight]
+
+
+def test_entry_point_looks_up(monkeypatch):
+    class LookingUpEntryPoint(FakeEntryPoint):
+        def load(self):
+            def plugin(registry):
+                assert registry.physical_class(DeviceType.METER) is None
+                registry.register_physical(DeviceType.CEILING_LIGHT, CeilingLight)
+
+            self.loads += 1
+            return plugin
+
+    entry_point = LookingUpEntryPoint()
+    monkeypatch.setattr(registry_module, "_entry_points", lambda group: [entry_point])
+    sut = SwitchBotDeviceRegistry()
+    assert sut.physical_class(DeviceType.CEILING_LIGHT) is CeilingLight
+    assert sut.physical_class(DeviceType.CEILING_LIGHT) is CeilingLight
+    assert entry_point.loads == 1
@@ -1,3 +1,7 @@
+import base64
+import hashlib
+import hmac
+import json
 from unittest.mock import patch
 
 import pytest
@@ -130,10 +134,16 @@ def test_devices(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -142,7 +152,7 @@ def test_devices(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotAPIClient("token", "key")
     sut = client.devices()
     assert sut.status_code == expected.get("statusCode")
@@ -164,15 +174,21 @@ def test_devices_status(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotAPIClient("token", "key")
     sut = client.devices_status("device_foo")
     assert sut.status_code == expected.get("statusCode")
@@ -188,15 +204,21 @@ def test_devices_status_wrong_device_error(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotAPIClient("token", "key")
 
     with pytest.raises(RuntimeError) as e:
@@ -210,6 +232,8 @@ def test_devices_status_broken_response(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         def __init__(self):
             self.text = """{
                 "someInvalidResponse": "panic",
@@ -219,11 +243,15 @@ def test_devices_status_broken_response(monkeypatch):
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotAPIClient("token", "key")
 
     with pytest.raises(RuntimeError) as e:
@@ -237,15 +265,21 @@ def test_devices_status_unauthorized(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotAPIClient("token", "key")
 
     with pytest.raises(RuntimeError) as e:
@@ -261,15 +295,21 @@ def test_devices_commands(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_post(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     client = SwitchBotAPIClient("token", "key")
     sut = client.devices_commands(
         "device_foo",
@@ -293,15 +333,21 @@ def test_scenes(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotAPIClient("token", "key")
     sut = client.scenes()
     assert sut.status_code == expected.get("statusCode")
@@ -317,15 +363,21 @@ def test_scenes_execute(monkeypatch):
     }
 
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return expected
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_post(*args, **kwargs):
         assert kwargs["headers"]["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
         return MockResponse()
 
-    monkeypatch.setattr(requests, "post", mock_post)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
     client = SwitchBotAPIClient("token", "key")
     sut = client.scenes_execute(
         "scene_foo",
@@ -333,3 +385,111 @@ def test_scenes_execute(monkeypatch):
     assert sut.status_code == expected.get("statusCode")
     assert sut.message == expected.get("message")
     assert sut.body == expected.get("body")
+
+
+def test_session_is_reused(monkeypatch):
+    expected = {
+        "statusCode": 100,
+        "message": "success",
+        "body": {},
+    }
+
+    class MockResponse:
+        status_code = 200
+
+        @staticmethod
+        def json():
+            return expected
+
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
+    sessions = []
+
+    def mock_get(self, *args, **kwargs):
+        sessions.append(self)
+        assert kwargs["timeout"] == (3.0, 7.0)
+        return MockResponse()
+
+    def mock_post(self, *args, **kwargs):
+        sessions.append(self)
+        return MockResponse()
+
+    monkeypatch.setattr(requests.Session, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "post", mock_post)
+    client = SwitchBotAPIClient("token", "key", connect_timeout=3.0, read_timeout=7.0)
+    client.devices_status("device_foo")
+    client.devices_commands("device_foo", ControlCommand.Common.TURN_ON)
+    client.scenes()
+    assert len(sessions) == 3
+    assert all(s is client.session for s in sessions)
+
+
+def test_session_pool_size():
+    client = SwitchBotAPIClient("token", "key", pool_size=32)
+    adapter = client.session.get_adapter("https://api.switch-bot.com")
+    assert adapter._pool_maxsize == 32
+    assert client.session.headers["Connection"] == "keep-alive"
+
+
+def test_session_no_keep_alive():
+    client = SwitchBotAPIClient("token", "key", keep_alive=False)
+    assert client.session.headers["Connection"] == "close"
+
+
+def test_shared_session():
+    session = requests.Session()
+    client = SwitchBotAPIClient("token", "key", session=session)
+    assert client.session is session
+
+
+def test_prewarm(monkeypatch):
+    called = []
+
+    def mock_head(self, url, **kwargs):
+        called.append(url)
+
+    monkeypatch.setattr(requests.Session, "head", mock_head)
+    SwitchBotAPIClient("token", "key", api_host_domain="https://new-api.example.com", prewarm=True)
+    assert called == ["https://new-api.example.com"]
+
+
+def test_prewarm_failure(monkeypatch):
+    def mock_head(self, url, **kwargs):
+        raise requests.ConnectionError("unreachable")
+
+    monkeypatch.setattr(requests.Session, "head", mock_head)
+    client = SwitchBotAPIClient("token", "key", prewarm=True)
+    assert client.session is not None
+
+
+def test_auth_header_matches_signature(monkeypatch):
+    monkeypatch.setattr("time.time_ns", lambda: 1667000000123456789)
+    client = SwitchBotAPIClient("token", "key")
+    expected = base64.b64encode(
+        hmac.new(b"key", msg=b"token1667000000123", digestmod=hashlib.sha256).digest()
+    ).decode("utf-8")
+    headers = client._headers()
+    assert (headers["Authorization"], headers["t"], headers["sign"]) == (
+        "token",
+        "1667000000123",
+        expected,
+    )
+    assert headers["user-agent"] == f"switchbot-client/{AppConstants.VERSION}"
+
+    client.token = "other"
+    client.api_host_domain = "https://new-api.example.com"
+    assert client._headers()["Authorization"] == "other"
+    assert client._uri("devices") == "https://new-api.example.com/v1.1/devices"
+
+
+def test_fixed_command_bodies_are_reused():
+    client = SwitchBotAPIClient("token", "key")
+    body = client._devices_commands_body(ControlCommand.Common.TURN_ON)
+    assert json.loads(body) == {"command": "turnOn"}
+    assert client._devices_commands_body(ControlCommand.Common.TURN_ON) is body
+    assert client._devices_commands_body("setBrightness", "30") == {
+        "command": "setBrightness",
+        "parameter": "30",
+    }
@@ -0,0 +1,72 @@
+import pytest
+
+from switchbot_client import (
+    DeviceType,
+    SwitchBotAPIClient,
+    SwitchBotCassette,
+    SwitchBotRecordingSession,
+    SwitchBotReplaySession,
+)
+from switchbot_client.simulator import SwitchBotSimulator
+
+
+@pytest.fixture(autouse=True)
+def no_requests():
+    """Allow requests for these tests, they are recorded from a local SwitchBotSimulator."""
+
+
+def record(path: str) -> SwitchBotCassette:
+    cassette = SwitchBotCassette(path)
+    with SwitchBotSimulator(token="secret-token", secret_key="secret") as simulator:
+        simulator.add_device(DeviceType.HUB_MINI, device_id="HUB")
+        simulator.add_device(DeviceType.PLUG, device_id="PLUG", hub_device_id="HUB")
+        session = SwitchBotRecordingSession(cassette, redact=["https://example.com/private"])
+        with SwitchBotAPIClient(
+            "secret-token", "secret", api_host_domain=simulator.url, session=session
+        ) as client:
+            client.devices()
+            client.devices_status("PLUG")
+            client.devices_commands("PLUG", "turnOn")
+            client.devices_status("PLUG")
+            client.webhook_setup("https://example.com/private")
+    return cassette
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "day.jsonl.gz")
+    recorded = record(path)
+    assert len(recorded) == 5
+
+    cassette = SwitchBotCassette.load(path)
+    assert [(i.method, i.endpoint) for i in cassette][:3] == [
+        ("GET", "devices"),
+        ("GET", "devices/PLUG/status"),
+        ("POST", "devices/PLUG/commands"),
+    ]
+    assert cassette.interactions[2].payload == {"command": "turnOn"}
+    assert cassette.interactions[4].payload["url"] == "REDACTED"
+    cassette.save(str(tmp_path / "plain.jsonl"))
+    text = (tmp_path / "plain.jsonl").read_text(encoding="utf-8")
+    assert "secret-token" not in text
+    assert "example.com/private" not in text
+
+    session = SwitchBotReplaySession(cassette, speed=None, redact=["https://example.com/private"])
+    client = SwitchBotAPIClient("other", "other", session=session)
+    assert client.devices_status("PLUG").body["power"] == "off"
+    assert client.devices_commands("PLUG", "turnOn").status_code == 100
+    assert client.devices_status("PLUG").body["power"] == "on"
+    assert client.devices_status("PLUG").body["power"] == "on"
+    assert client.webhook_setup("https://example.com/private").status_code == 100
+    with pytest.raises(RuntimeError, match="no recorded response"):
+        client.devices_commands("PLUG", "turnOff")
+
+
+def test_play(tmp_path):
+    cassette = record(str(tmp_path / "day.jsonl"))
+    client = SwitchBotAPIClient(
+        "other", "other", session=SwitchBotReplaySession(cassette, speed=None)
+    )
+    stats = cassette.play(client)
+    assert (stats.requests, stats.errors) == (5, 0)
+    assert stats.max_latency >= stats.p99_latency >= 0
+    assert client.session.served == 5
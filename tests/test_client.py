@@ -1,13 +1,21 @@
+import json
+import threading
+import time
+
 import pytest
 import requests
 
+from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
+from switchbot_client.cache import TTLCache
 from switchbot_client.client import SwitchBotClient
 from switchbot_client.devices import (
     AirConditioner,
+    ColorBulb,
     HubMini,
     Light,
     Meter,
     MeterPlus,
+    SmartFan,
     SwitchBotPhysicalDevice,
     SwitchBotRemoteDevice,
 )
@@ -15,6 +23,8 @@ from switchbot_client.devices import (
 
 def test_devices(monkeypatch):
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return {
@@ -60,6 +70,10 @@ def test_devices(monkeypatch):
                 },
             }
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -68,7 +82,7 @@ def test_devices(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotClient("token", "key")
     sut = client.devices()
     assert sorted([type(e) for e in sut], key=lambda e: e.__name__) == [
@@ -82,6 +96,8 @@ def test_devices(monkeypatch):
 
 def test_device(monkeypatch):
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return {
@@ -120,6 +136,10 @@ def test_device(monkeypatch):
                 },
             }
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -128,7 +148,7 @@ def test_device(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotClient("token", "key")
     sut = client.device("12345")
     assert sut.device_name == "My Light"
@@ -138,6 +158,8 @@ def test_device(monkeypatch):
 
 def test_device_error_dups(monkeypatch):
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return {
@@ -163,6 +185,10 @@ def test_device_error_dups(monkeypatch):
                 },
             }
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -171,7 +197,7 @@ def test_device_error_dups(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotClient("token", "key")
     with pytest.raises(RuntimeError):
         sut = client.device("ABCDEFG")
@@ -179,6 +205,8 @@ def test_device_error_dups(monkeypatch):
 
 def test_scenes(monkeypatch):
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return {
@@ -191,6 +219,10 @@ def test_scenes(monkeypatch):
                 ],
             }
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -199,7 +231,7 @@ def test_scenes(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotClient("token", "key")
     sut = client.scenes()
     assert [e.scene_id for e in sut] == [
@@ -211,6 +243,8 @@ def test_scenes(monkeypatch):
 
 def test_scene(monkeypatch):
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return {
@@ -223,6 +257,10 @@ def test_scene(monkeypatch):
                 ],
             }
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -231,7 +269,7 @@ def test_scene(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotClient("token", "key")
     sut = client.scene("T02-202009221414-48924101")
     assert sut.scene_name == "Set Office AC to 25"
@@ -241,6 +279,8 @@ def test_scene(monkeypatch):
 
 def test_scene_error_dups(monkeypatch):
     class MockResponse:
+        status_code = 200
+
         @staticmethod
         def json():
             return {
@@ -253,6 +293,10 @@ def test_scene_error_dups(monkeypatch):
                 ],
             }
 
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
     def mock_get(*args, **kwargs):
         return MockResponse()
 
@@ -261,7 +305,275 @@ def test_scene_error_dups(monkeypatch):
 
     monkeypatch.setattr(SwitchBotPhysicalDevice, "_check_device_type", dummy_method)
     monkeypatch.setattr(SwitchBotRemoteDevice, "_check_remote_type", dummy_method)
-    monkeypatch.setattr(requests, "get", mock_get)
+    monkeypatch.setattr(requests.Session, "get", mock_get)
     client = SwitchBotClient("token", "key")
     with pytest.raises(RuntimeError):
         sut = client.scene("T02-20200804130110")
+
+
+def test_shared_api_client():
+    api_client = SwitchBotAPIClient("token", "key")
+    client1 = SwitchBotClient(api_client=api_client)
+    client2 = SwitchBotClient(api_client=api_client)
+    assert client1.api_client is api_client
+    assert client2.api_client.session is api_client.session
+
+
+def mock_inventory(monkeypatch) -> list:
+    calls = []
+
+    def mock_devices(self):
+        calls.append(1)
+        return SwitchBotAPIResponse(
+            100,
+            "success",
+            {
+                "deviceList": [
+                    {
+                        "deviceId": "METER",
+                        "deviceName": "Meter",
+                        "deviceType": "Meter",
+                        "hubDeviceId": "HUB",
+                    },
+                    {
+                        "deviceId": "HUB",
+                        "deviceName": "Hub Mini",
+                        "deviceType": "Hub Mini",
+                        "hubDeviceId": "000000000000",
+                    },
+                ],
+                "infraredRemoteList": [
+                    {
+                        "deviceId": "LIGHT",
+                        "deviceName": "My Light",
+                        "remoteType": "Light",
+                        "hubDeviceId": "HUB",
+                    },
+                ],
+            },
+        )
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices", mock_devices)
+    return calls
+
+
+def test_inventory_is_shared(monkeypatch):
+    calls = mock_inventory(monkeypatch)
+    client = SwitchBotClient("token", "key")
+    assert len(client.devices()) == 3
+    assert len(client.devices()) == 3
+    assert isinstance(client.device("METER"), Meter)
+    assert isinstance(client.device("LIGHT"), Light)
+    assert client.device("UNKNOWN") is None
+    assert isinstance(Meter.create_by_id(client, "METER"), Meter)
+    assert isinstance(HubMini.create_by_id(client, "HUB"), HubMini)
+    assert isinstance(Light.create_by_id(client, "LIGHT"), Light)
+    assert len(calls) == 1
+
+    client.invalidate_inventory()
+    client.device("METER")
+    assert len(calls) == 2
+
+
+def test_inventory_ttl(monkeypatch):
+    calls = mock_inventory(monkeypatch)
+    client = SwitchBotClient("token", "key", inventory_ttl=0)
+    client.devices()
+    Meter.create_by_id(client, "METER")
+    assert len(calls) == 2
+
+
+def test_inventory_refresh_ahead(monkeypatch):
+    calls = mock_inventory(monkeypatch)
+    now = [0.0]
+    client = SwitchBotClient("token", "key", inventory_ttl=10, inventory_refresh_ahead=0.5)
+    client.inventory_cache = TTLCache(10, clock=lambda: now[0])
+    client.inventory()
+    now[0] = 4.0
+    client.inventory()
+    assert len(calls) == 1
+
+    now[0] = 6.0
+    client.inventory()
+    deadline = time.monotonic() + 5
+    while client.inventory_cache.age(client.INVENTORY_KEY) != 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert len(calls) == 2
+    assert client.inventory_cache.age(client.INVENTORY_KEY) == 0
+
+
+def test_statuses(monkeypatch):
+    mock_inventory(monkeypatch)
+    release = threading.Event()
+
+    def mock_devices_status(self, device_id):
+        if device_id == "SLOW":
+            release.wait(5)
+        if device_id == "HUB":
+            raise RuntimeError("hub offline")
+        return SwitchBotAPIResponse(
+            100,
+            "success",
+            {"deviceId": device_id, "deviceType": "Meter", "humidity": 50, "temperature": 25},
+        )
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_status", mock_devices_status)
+    client = SwitchBotClient("token", "key")
+    meter = client.device("METER")
+    results = {
+        r.device_id: r for r in client.statuses([meter, "HUB", "LIGHT", "UNKNOWN"], concurrency=2)
+    }
+    assert results["METER"].ok
+    assert results["METER"].status.temperature == 25
+    assert results["METER"].device is meter
+    assert isinstance(results["HUB"].error, RuntimeError)
+    assert isinstance(results["LIGHT"].device, Light)
+    assert results["LIGHT"].ok
+    assert not results["UNKNOWN"].ok
+
+    slow = Meter(
+        client,
+        {"deviceId": "SLOW", "deviceName": "Slow", "deviceType": "Meter", "hubDeviceId": "HUB"},
+    )
+    started = time.monotonic()
+    results = list(client.statuses([slow, meter], deadline=0.1))
+    release.set()
+    assert time.monotonic() - started < 2
+    assert [r.device_id for r in results] == ["METER", "SLOW"]
+    assert isinstance(results[1].error, TimeoutError)
+
+
+def test_execute_many(monkeypatch):
+    mock_inventory(monkeypatch)
+    lock = threading.Lock()
+    in_flight = {"HUB": 0}
+    max_in_flight = {"HUB": 0}
+    sent = []
+
+    def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        hub = "OTHER" if device_id == "OTHER_METER" else "HUB"
+        with lock:
+            in_flight[hub] = in_flight.get(hub, 0) + 1
+            max_in_flight[hub] = max(max_in_flight.get(hub, 0), in_flight[hub])
+        time.sleep(0.01)
+        with lock:
+            in_flight[hub] -= 1
+            sent.append((device_id, command, parameter))
+        if command == "broken":
+            raise RuntimeError("failed")
+        return SwitchBotAPIResponse(100, "success", {})
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    client = SwitchBotClient("token", "key")
+    light = client.device("LIGHT")
+    other = Meter(
+        client,
+        {
+            "deviceId": "OTHER_METER",
+            "deviceName": "",
+            "deviceType": "Meter",
+            "hubDeviceId": "OTHER",
+        },
+    )
+    sut = client.execute_many(
+        [
+            (other, "turnOff"),
+            (light, "turnOff"),
+            ("METER", "turnOff"),
+            ("HUB", "broken"),
+            (light, "setBrightness", "10", "command"),
+            ("UNKNOWN", "turnOff"),
+        ],
+        hub_interval=0,
+    )
+    assert [item.device_id for item in sut.items] == [
+        "OTHER_METER",
+        "LIGHT",
+        "METER",
+        "HUB",
+        "LIGHT",
+        "UNKNOWN",
+    ]
+    assert [item.ok for item in sut.items] == [True, True, True, False, True, False]
+    assert sut.items[4].result.status_code == 100
+    assert len(sut.failed) == 2
+    assert sut.hub_count == 2
+    assert max_in_flight["HUB"] == 1
+    assert [s for s in sent if s[0] != "OTHER_METER"] == [
+        ("LIGHT", "turnOff", None),
+        ("METER", "turnOff", None),
+        ("HUB", "broken", None),
+        ("LIGHT", "setBrightness", "10"),
+    ]
+
+
+def test_reconcile(monkeypatch):
+    mock_inventory(monkeypatch)
+    statuses = {
+        "FAN": {
+            "power": "on",
+            "mode": 1,
+            "speed": 1,
+            "shaking": False,
+            "shakeCenter": 60,
+            "shakeRange": 60,
+        },
+        "BULB": {
+            "power": "off",
+            "brightness": 10,
+            "color": "255:255:255",
+            "colorTemperature": 3000,
+        },
+    }
+    sent = []
+
+    def mock_devices_status(self, device_id):
+        return SwitchBotAPIResponse(100, "success", statuses[device_id])
+
+    def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        sent.append((device_id, command, parameter))
+        return SwitchBotAPIResponse(100, "success", {})
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_status", mock_devices_status)
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    client = SwitchBotClient("token", "key")
+    fan = SmartFan(
+        client,
+        {"deviceId": "FAN", "deviceName": "", "deviceType": "Smart Fan", "hubDeviceId": "HUB"},
+    )
+    bulb = ColorBulb(
+        client,
+        {"deviceId": "BULB", "deviceName": "", "deviceType": "Color Bulb", "hubDeviceId": "HUB2"},
+    )
+    ac = AirConditioner(
+        client,
+        {"deviceId": "AC", "deviceName": "", "remoteType": "Air Conditioner", "hubDeviceId": "HUB"},
+    )
+    sut = client.reconcile(
+        [
+            (fan, {"power": "ON", "mode": 2, "speed": 3}),
+            (bulb, {"power": "on", "brightness": 50, "color_hex": "#ffffff"}),
+            (ac, {"temperature": 26, "power": "on"}),
+            ("METER", {"power": "on"}),
+        ],
+        hub_interval=0,
+    )
+    assert [item.ok for item in sut.items] == [True, True, True, False]
+    assert sut.items[0].changes == {"mode": (1, 2), "speed": (1, 3)}
+    assert sut.items[1].changes == {"power": ("off", "on"), "brightness": (10, 50)}
+    assert sut.command_count == 4
+    assert sorted(sent) == [
+        ("AC", "setAll", "26,1,1,on"),
+        ("BULB", "setBrightness", "50"),
+        ("BULB", "turnOn", None),
+        ("FAN", "setAllStatus", "on,2,3,60"),
+    ]
+    assert sent.index(("BULB", "turnOn", None)) < sent.index(("BULB", "setBrightness", "50"))
+    assert ac.pseudo_status.temperature == 26
+    assert ac.pseudo_status.power == "on"
+
+    sent.clear()
+    sut = client.reconcile([(ac, {"temperature": 26, "power": "on"})], hub_interval=0)
+    assert sut.ok
+    assert not sut.changed
+    assert sent == []
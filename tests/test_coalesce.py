@@ -0,0 +1,71 @@
+import threading
+import time
+
+from switchbot_client import ControlCommand, SwitchBotClient, SwitchBotCommandCoalescer
+from switchbot_client.devices import AirConditioner, Bot, ColorBulb
+
+
+def create_client(**kwargs) -> SwitchBotClient:
+    return SwitchBotClient("token", "key", command_coalescer=SwitchBotCommandCoalescer(**kwargs))
+
+
+def test_latest_command_wins(sent, create_device):
+    client = create_client(window=0.05)
+    bulb = create_device(client, ColorBulb, "BULB", "Color Bulb")
+    coalescer = client.command_coalescer
+    futures = [
+        coalescer.submit(bulb, ControlCommand.ColorBulb.SET_BRIGHTNESS, f"{brightness}")
+        for brightness in [10, 20, 30]
+    ]
+    futures.append(coalescer.submit(bulb, ControlCommand.ColorBulb.SET_COLOR, "1:2:3"))
+    results = [future.result(timeout=5) for future in futures]
+    assert sorted(sent) == [("BULB", "setBrightness", "30"), ("BULB", "setColor", "1:2:3")]
+    assert [result.coalesced for result in results] == [True, True, False, False]
+    assert (coalescer.submitted, coalescer.sent, coalescer.coalesced) == (4, 2, 2)
+
+
+def test_device_commands_block_until_sent(sent, create_device):
+    client = create_client(window=0.05)
+    bulb = create_device(client, ColorBulb, "BULB", "Color Bulb")
+    results = []
+    threads = [
+        threading.Thread(target=lambda b=brightness: results.append(bulb.set_brightness(b)))
+        for brightness in [10, 20, 30]
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+    assert sent == [("BULB", "setBrightness", "30")]
+    assert sorted(result.coalesced for result in results) == [False, True, True]
+
+
+def test_partial_set_all_is_merged(sent, create_device):
+    client = create_client(window=60)
+    ac = create_device(client, AirConditioner, "AC", "Air Conditioner")
+    coalescer = client.command_coalescer
+    coalescer.submit(ac, ControlCommand.VirtualInfrared.SET_ALL, "26,None,None,None")
+    coalescer.submit(ac, ControlCommand.VirtualInfrared.SET_ALL, "None,2,None,on")
+    assert coalescer.pending_count == 1
+    coalescer.flush()
+    assert sent == [("AC", "setAll", "26,2,None,on")]
+    assert ac.pseudo_status.temperature == 26
+    assert ac.pseudo_status.mode == 2
+
+
+def test_other_commands_are_sent_immediately(sent, create_device):
+    client = create_client(window=60)
+    bot = create_device(client, Bot, "BOT", "Bot")
+    assert bot.press().status_code == 100
+    assert sent == [("BOT", "press", None)]
+
+
+def test_debounce_max_delay(sent, create_device):
+    client = create_client(window=60, debounce=True, max_delay=0.05)
+    bulb = create_device(client, ColorBulb, "BULB", "Color Bulb")
+    coalescer = client.command_coalescer
+    coalescer.submit(bulb, ControlCommand.ColorBulb.SET_BRIGHTNESS, "10")
+    future = coalescer.submit(bulb, ControlCommand.ColorBulb.SET_BRIGHTNESS, "20")
+    assert not future.result(timeout=5).coalesced
+    assert sent == [("BULB", "setBrightness", "20")]
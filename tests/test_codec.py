@@ -0,0 +1,56 @@
+import pytest
+
+from switchbot_client import SwitchBotAPIClient, SwitchBotFakeTransport
+from switchbot_client.codec import (
+    STDLIB_CODEC,
+    SwitchBotJSONCodec,
+    default_codec,
+    msgspec_codec,
+    orjson_codec,
+)
+
+
+def available_codecs():
+    codecs = [STDLIB_CODEC]
+    for factory in (orjson_codec, msgspec_codec):
+        try:
+            codecs.append(factory())
+        except ImportError:
+            pass
+    return codecs
+
+
+@pytest.mark.parametrize("codec", available_codecs(), ids=lambda codec: codec.name)
+def test_codec_round_trip(codec: SwitchBotJSONCodec):
+    payload = {"command": "setAll", "parameter": "26,2,3,on", "name": "居間", "urls": ["a", "b"]}
+    assert codec.loads(codec.dumps(payload)) == payload
+    assert codec.loads(b'{"statusCode":100,"body":{"temperature":25.5}}')["body"] == {
+        "temperature": 25.5
+    }
+    with pytest.raises(ValueError):
+        codec.loads(b"<html>Bad Gateway</html>")
+
+
+def test_default_codec_prefers_fast_libraries():
+    names = [codec.name for codec in available_codecs()]
+    assert default_codec().name == (names[1] if len(names) > 1 else "json")
+
+
+def test_client_uses_codec():
+    bodies = []
+    decoded = []
+
+    def loads(data):
+        decoded.append(data)
+        return STDLIB_CODEC.loads(data)
+
+    def dumps(obj):
+        data = STDLIB_CODEC.dumps(obj)
+        bodies.append(data)
+        return data
+
+    codec = SwitchBotJSONCodec("custom", dumps, loads)
+    client = SwitchBotAPIClient("token", "key", transport=SwitchBotFakeTransport(), codec=codec)
+    assert client.devices_commands("ABC", "turnOn").status_code == 100
+    assert bodies == [b'{"command":"turnOn"}']
+    assert decoded == [SwitchBotFakeTransport.DEFAULT_RESPONSE]
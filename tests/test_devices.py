@@ -1,9 +1,11 @@
+import time
+
 import pytest
 
 from switchbot_client import ControlCommand, SwitchBotClient
 from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
-from switchbot_client.devices import AirConditioner, Bot, Light
-from switchbot_client.types import APIPhysicalDeviceObject
+from switchbot_client.devices import AirConditioner, Bot, Humidifier, Light, PlugMiniJp
+from switchbot_client.types import APIPhysicalDeviceObject, APIRemoteDeviceObject
 
 
 def test_init_no_client():
@@ -58,3 +60,222 @@ def test_illegal_device_type(monkeypatch):
     with pytest.raises(RuntimeError):
         client = SwitchBotClient("token", "key")
         Bot.create_by_id(client, "device_id")
+
+
+def create_humidifier(monkeypatch, **kwargs):
+    calls = []
+
+    def mock_devices_status(self, device_id):
+        calls.append(("status", device_id))
+        return SwitchBotAPIResponse(
+            100,
+            "success",
+            {
+                "deviceId": device_id,
+                "deviceType": "Humidifier",
+                "power": "on",
+                "humidity": 40,
+                "temperature": 22.5,
+                "nebulizationEfficiency": 50,
+                "auto": False,
+                "childLock": False,
+                "sound": True,
+                "lackWater": False,
+            },
+        )
+
+    def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        calls.append(("command", device_id))
+        return SwitchBotAPIResponse(100, "success", {})
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_status", mock_devices_status)
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    client = SwitchBotClient("token", "key", **kwargs)
+    device = APIPhysicalDeviceObject(
+        deviceId="HUMIDIFIER",
+        deviceName="Humidifier",
+        hubDeviceId="000000000000",
+        deviceType="Humidifier",
+        enableCloudService=True,
+    )
+    return Humidifier(client, device), calls
+
+
+def test_status_cache(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch)
+    assert sut.is_turned_on()
+    assert sut.humidity() == 40
+    assert sut.temperature() == 22.5
+    assert sut.atomization_efficiency() == 50
+    sut.is_lack_water()
+    assert calls == [("status", "HUMIDIFIER")]
+
+    sut.status(max_age=0)
+    assert len(calls) == 2
+
+    sut.turn_off()
+    sut.power()
+    assert calls[2:] == [("command", "HUMIDIFIER"), ("status", "HUMIDIFIER")]
+
+
+def test_status_cache_disabled(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch, status_ttl=0)
+    sut.humidity()
+    sut.temperature()
+    assert len(calls) == 2
+
+
+def test_optimistic_updates(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch, optimistic_updates=True, reconcile_delay=None)
+    sut.status()
+    metadata = sut.client.status_metadata("HUMIDIFIER")
+    assert metadata is not None
+    assert not metadata.is_optimistic
+
+    sut.toggle()
+    assert not sut.is_turned_on()
+    sut.set_atomization_efficiency(80)
+    assert sut.atomization_efficiency() == 80
+    sut.set_mode("103")
+    assert sut.atomization_efficiency() == 100
+    assert calls == [("status", "HUMIDIFIER")] + [("command", "HUMIDIFIER")] * 3
+
+    metadata = sut.client.status_metadata("HUMIDIFIER")
+    assert metadata.is_optimistic
+    assert metadata.updated_at > metadata.fetched_at
+
+    sut.client.refresh_status("HUMIDIFIER")
+    assert sut.is_turned_on()
+    assert not sut.client.status_metadata("HUMIDIFIER").is_optimistic
+
+
+def test_optimistic_updates_without_cached_status(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch, optimistic_updates=True, reconcile_delay=None)
+    sut.turn_off()
+    assert sut.client.status_metadata("HUMIDIFIER") is None
+    sut.power()
+    assert calls == [("command", "HUMIDIFIER"), ("status", "HUMIDIFIER")]
+
+
+def test_optimistic_updates_reconcile(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch, optimistic_updates=True, reconcile_delay=0.01)
+    sut.status()
+    sut.turn_off()
+    sut.turn_off()
+    assert sut.power() == "off"
+    for _ in range(100):
+        if not sut.client.status_metadata("HUMIDIFIER").is_optimistic:
+            break
+        time.sleep(0.01)
+    assert calls[3:] == [("status", "HUMIDIFIER")]
+    assert sut.power() == "on"
+
+
+def create_plug(monkeypatch):
+    samples = []
+
+    def mock_devices_status(self, device_id):
+        samples.append(device_id)
+        return SwitchBotAPIResponse(
+            100,
+            "success",
+            {
+                "deviceId": device_id,
+                "deviceType": "Plug Mini (JP)",
+                "power": "on",
+                "voltage": 100 + len(samples),
+                "weight": 10,
+                "electricityOfDay": 30,
+                "electricCurrent": len(samples),
+            },
+        )
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_status", mock_devices_status)
+    client = SwitchBotClient("token", "key", status_ttl=0)
+    device = APIPhysicalDeviceObject(
+        deviceId="PLUG",
+        deviceName="Plug Mini",
+        hubDeviceId="000000000000",
+        deviceType="Plug Mini (JP)",
+        enableCloudService=True,
+    )
+    return PlugMiniJp(client, device), samples
+
+
+def test_snapshot(monkeypatch):
+    sut, samples = create_plug(monkeypatch)
+    with sut.snapshot() as status:
+        assert status.voltage == 101
+        assert sut.voltage() == 101
+        assert sut.electric_current() == 1
+        assert sut.is_turned_on()
+    assert len(samples) == 1
+
+    assert sut.voltage() == 102
+    assert len(samples) == 2
+
+
+def test_read(monkeypatch):
+    sut, samples = create_plug(monkeypatch)
+    assert sut.read(["voltage", "electric_current", "power"]) == {
+        "voltage": 101,
+        "electric_current": 1,
+        "power": "on",
+    }
+    assert len(samples) == 1
+
+
+def test_skip_satisfied_commands(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch, skip_satisfied_commands=True)
+    assert sut.turn_on().status_code == 100
+    assert calls == [("command", "HUMIDIFIER")]
+
+    sut.status()
+    result = sut.turn_on()
+    assert result.skipped
+    assert result.status_code == 100
+    assert sut.client.saved_calls == 1
+    assert calls == [("command", "HUMIDIFIER"), ("status", "HUMIDIFIER")]
+
+    assert not sut.turn_off().skipped
+    assert len(calls) == 3
+
+
+def test_skip_satisfied_commands_disabled(monkeypatch):
+    sut, calls = create_humidifier(monkeypatch)
+    sut.status()
+    assert not sut.turn_on().skipped
+    assert sut.client.saved_calls == 0
+    assert len(calls) == 2
+
+
+def test_skip_satisfied_remote_commands(monkeypatch):
+    sent = []
+
+    def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        sent.append((command, parameter))
+        return SwitchBotAPIResponse(100, "success", {})
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    client = SwitchBotClient("token", "key", skip_satisfied_commands=True)
+    device = APIRemoteDeviceObject(
+        deviceId="AC", deviceName="AC", remoteType="Air Conditioner", hubDeviceId="HUB"
+    )
+    sut = AirConditioner(client, device)
+    sut.set_all(
+        26, AirConditioner.Parameters.MODE_COOL, AirConditioner.Parameters.FAN_SPEED_AUTO, "on"
+    )
+    assert sut.set_all(
+        26, AirConditioner.Parameters.MODE_COOL, AirConditioner.Parameters.FAN_SPEED_AUTO, "on"
+    ).skipped
+    assert sut.turn_on().skipped
+    assert sut.set_temperature(26).skipped
+    assert not sut.set_temperature(27).skipped
+    sut.turn_off()
+    assert sut.turn_off().skipped
+    assert client.saved_calls == 4
+    assert sent == [
+        (ControlCommand.VirtualInfrared.SET_ALL, "26,2,1,on"),
+        (ControlCommand.VirtualInfrared.SET_ALL, "27,2,1,on"),
+        (ControlCommand.Common.TURN_OFF, None),
+    ]
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from switchbot_client import ControlCommand, SwitchBotClient, SwitchBotIRDispatcher
+from switchbot_client.devices import TV, Light
+
+
+def test_repeat_is_paced(sent, create_device):
+    dispatcher = SwitchBotIRDispatcher(interval=0.02)
+    tv = create_device(SwitchBotClient("token", "key", ir_dispatcher=dispatcher), TV, "TV", "TV")
+    results = tv.repeat(ControlCommand.VirtualInfrared.VOLUME_ADD, 3)
+    assert [result.status_code for result in results] == [100, 100, 100]
+    assert [command for _, command, _ in sent] == ["volumeAdd"] * 3
+    gaps = [b - a for a, b in zip(sent.times, sent.times[1:])]
+    assert min(gaps) >= 0.02
+    stats = dispatcher.stats()["HUB"]
+    assert (stats.depth, stats.sent) == (0, 3)
+    assert stats.max_latency >= 0.04
+
+
+def test_commands_of_one_hub_are_serialized(sent, create_device):
+    dispatcher = SwitchBotIRDispatcher(interval=0.01)
+    client = SwitchBotClient("token", "key", ir_dispatcher=dispatcher)
+    tv = create_device(client, TV, "TV", "TV")
+    light = create_device(client, Light, "LIGHT", "Light")
+    other = create_device(client, TV, "TV", "TV", hub_id="OTHER")
+    threads = [
+        threading.Thread(target=tv.volume_add),
+        threading.Thread(target=light.turn_on),
+        threading.Thread(target=other.volume_sub),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert light.pseudo_status.power == "on"
+    hub = [t for t, (_, command, _) in zip(sent.times, sent) if command != "volumeSub"]
+    assert hub[1] - hub[0] >= 0.01
+    assert sorted(dispatcher.stats()) == ["HUB", "OTHER"]
+
+
+def test_repeat_without_dispatcher(sent, create_device, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    tv = create_device(SwitchBotClient("token", "key"), TV, "TV", "TV")
+    tv.repeat(ControlCommand.VirtualInfrared.CHANNEL_ADD, 3)
+    assert len(sent) == 3
+    assert sleeps == [SwitchBotIRDispatcher.DEFAULT_INTERVAL] * 2
+
+
+def test_close_stops_the_workers(sent, create_device):
+    dispatcher = SwitchBotIRDispatcher(interval=0.01)
+    with SwitchBotClient("token", "key", ir_dispatcher=dispatcher) as client:
+        tv = create_device(client, TV, "TV", "TV")
+        futures = [dispatcher.submit(tv, "volumeAdd") for _ in range(3)]
+        workers = list(dispatcher._workers.values())
+    assert all(future.done() for future in futures)
+    assert len(sent) == 3
+    assert not any(worker.is_alive() for worker in workers)
+    assert dispatcher.stats()["HUB"].sent == 3
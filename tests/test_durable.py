@@ -0,0 +1,139 @@
+import sqlite3
+
+import pytest
+import requests
+
+from switchbot_client import (
+    SwitchBotClient,
+    SwitchBotCommandQueue,
+    SwitchBotDeadLetterError,
+    SwitchBotQueueClosedError,
+    SwitchBotQueueWriteError,
+    SwitchBotRetryPolicy,
+)
+from switchbot_client.api import SwitchBotAPIClient, SwitchBotAPIResponse
+from switchbot_client.devices import Bot
+from switchbot_client.scenes import SwitchBotScene
+
+NO_BACKOFF = SwitchBotRetryPolicy(max_attempts=3, backoff=0, jitter=False, retry_commands=True)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    calls = []
+    responses = []
+
+    def mock_devices_commands(self, device_id, command, parameter=None, command_type=None):
+        calls.append((device_id, command))
+        response = responses.pop(0) if responses else 100
+        if isinstance(response, Exception):
+            raise response
+        return SwitchBotAPIResponse(response, "success" if response == 100 else "error", {})
+
+    def mock_scenes_execute(self, scene_id):
+        calls.append((scene_id, "execute"))
+        return SwitchBotAPIResponse(100, "success", {})
+
+    def mock_devices(self):
+        device = {"deviceId": "BOT", "deviceName": "", "deviceType": "Bot", "hubDeviceId": "HUB"}
+        return SwitchBotAPIResponse(
+            100, "success", {"deviceList": [device], "infraredRemoteList": []}
+        )
+
+    monkeypatch.setattr(SwitchBotAPIClient, "devices_commands", mock_devices_commands)
+    monkeypatch.setattr(SwitchBotAPIClient, "scenes_execute", mock_scenes_execute)
+    monkeypatch.setattr(SwitchBotAPIClient, "devices", mock_devices)
+    return calls, responses
+
+
+def test_enqueue_and_send(api, tmp_path, create_device):
+    calls, _ = api
+    client = SwitchBotClient("token", "key")
+    with SwitchBotCommandQueue(client, str(tmp_path / "queue.db")) as sut:
+        handle = sut.enqueue(create_device(client, Bot, "BOT", "Bot"), "press")
+        scene_handle = sut.enqueue_scene(SwitchBotScene(client, "SCENE", "scene"))
+        assert handle.result(timeout=5).status_code == 100
+        assert scene_handle.result(timeout=5).status_code == 100
+        assert handle.wait_persisted(timeout=5)
+        assert sut.drain(timeout=5)
+        assert (sut.enqueued, sut.sent, sut.pending_count) == (2, 2, 0)
+    assert sorted(calls) == [("BOT", "press"), ("SCENE", "execute")]
+    with sqlite3.connect(str(tmp_path / "queue.db")) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM items").fetchone() == (0,)
+
+
+def test_retry_and_dead_letter(api, tmp_path, create_device):
+    calls, responses = api
+    responses.extend([requests.ConnectionError(), 100, 161, 161, 161, 152])
+    client = SwitchBotClient("token", "key")
+    with SwitchBotCommandQueue(
+        client, str(tmp_path / "queue.db"), workers=1, retry_policy=NO_BACKOFF
+    ) as sut:
+        bot = create_device(client, Bot, "BOT", "Bot")
+        assert sut.enqueue(bot, "turnOn").result(timeout=5).status_code == 100
+        offline = sut.enqueue(bot, "turnOff")
+        with pytest.raises(SwitchBotDeadLetterError) as e:
+            offline.result(timeout=5)
+        assert e.value.result.status_code == 161
+        with pytest.raises(SwitchBotDeadLetterError):
+            sut.enqueue(bot, "press").result(timeout=5)
+        assert sut.drain(timeout=5)
+        assert (sut.sent, sut.retried, sut.dead) == (1, 3, 2)
+        dead_letters = sut.dead_letters()
+        assert [(item.command, item.attempts) for item in dead_letters] == [
+            ("turnOff", 3),
+            ("press", 1),
+        ]
+        assert dead_letters[0].error == "statusCode 161: error"
+    assert len(calls) == 6
+
+
+def test_unsent_items_are_resumed(api, tmp_path, create_device):
+    calls, responses = api
+    path = str(tmp_path / "queue.db")
+    responses.append(161)
+    policy = SwitchBotRetryPolicy(max_attempts=3, backoff=60, jitter=False, retry_commands=True)
+    client = SwitchBotClient("token", "key")
+    with SwitchBotCommandQueue(client, path, retry_policy=policy) as sut:
+        handle = sut.enqueue(
+            create_device(client, Bot, "BOT", "Bot"), "turnOn", "default", "command"
+        )
+        handle.wait_persisted(timeout=5)
+        assert sut.drain(timeout=0.5) is False
+    with pytest.raises(SwitchBotQueueClosedError):
+        handle.result(timeout=0)
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE items SET available_at = 0")
+
+    with SwitchBotCommandQueue(SwitchBotClient("token", "key"), path, retry_policy=policy) as sut:
+        assert sut.drain(timeout=5)
+        assert sut.sent == 1
+    assert calls == [("BOT", "turnOn"), ("BOT", "turnOn")]
+
+
+def test_failed_commits(api, monkeypatch, tmp_path, create_device):
+    calls, _ = api
+    commit = SwitchBotCommandQueue._commit
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_commit(self, writes):
+        if failures:
+            raise failures.pop(0)
+        return commit(self, writes)
+
+    monkeypatch.setattr(SwitchBotCommandQueue, "_commit", flaky_commit)
+    monkeypatch.setattr(SwitchBotCommandQueue, "COMMIT_RETRY_DELAY", 0)
+    client = SwitchBotClient("token", "key")
+    with SwitchBotCommandQueue(client, str(tmp_path / "queue.db")) as sut:
+        handle = sut.enqueue(create_device(client, Bot, "BOT", "Bot"), "turnOn")
+        assert handle.wait_persisted(timeout=5)
+        assert handle.result(timeout=5).status_code == 100
+
+        failures.extend([sqlite3.OperationalError("disk I/O error")] * sut.COMMIT_ATTEMPTS)
+        handle = sut.enqueue(create_device(client, Bot, "BOT", "Bot"), "turnOff")
+        with pytest.raises(SwitchBotQueueWriteError):
+            handle.wait_persisted(timeout=5)
+        with pytest.raises(SwitchBotQueueWriteError):
+            handle.result(timeout=5)
+        assert sut.drain(timeout=5)
+    assert calls == [("BOT", "turnOn")]
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from switchbot_client import SwitchBotRateLimiter, SwitchBotRateLimitError
+from switchbot_client.api import SwitchBotAPIClient
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def create_limiter(clock: FakeClock, **kwargs) -> SwitchBotRateLimiter:
+    return SwitchBotRateLimiter(clock=clock, wall_clock=clock, **kwargs)
+
+
+def test_burst_then_fail_fast():
+    clock = FakeClock()
+    sut = create_limiter(clock, rate=1.0, burst=3, blocking=False)
+    for _ in range(3):
+        sut.acquire()
+    with pytest.raises(SwitchBotRateLimitError):
+        sut.acquire()
+    assert sut.used_today == 3
+
+
+def test_refill():
+    clock = FakeClock()
+    sut = create_limiter(clock, rate=2.0, burst=2, blocking=False)
+    sut.acquire()
+    sut.acquire()
+    clock.sleep(0.5)
+    assert sut.available_tokens == pytest.approx(1.0)
+    sut.acquire()
+    clock.sleep(10)
+    assert sut.available_tokens == pytest.approx(2.0)
+
+
+def test_blocking_waits(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("time.sleep", clock.sleep)
+    sut = create_limiter(clock, rate=4.0, burst=1)
+    sut.acquire()
+    sut.acquire()
+    assert clock.now == pytest.approx(0.25)
+
+
+def test_blocking_waits_async(monkeypatch):
+    clock = FakeClock()
+
+    async def fake_sleep(seconds):
+        clock.sleep(seconds)
+
+    monkeypatch.setattr("asyncio.sleep", fake_sleep)
+    sut = create_limiter(clock, rate=4.0, burst=1)
+
+    async def run():
+        await sut.acquire_async()
+        await sut.acquire_async()
+
+    asyncio.run(run())
+    assert clock.now == pytest.approx(0.25)
+
+
+def test_daily_budget_and_rollover():
+    clock = FakeClock(SwitchBotRateLimiter.SECONDS_PER_DAY * 100 + 3600)
+    sut = create_limiter(clock, rate=100.0, burst=100, daily_budget=5)
+    for _ in range(5):
+        sut.acquire()
+    assert sut.remaining_daily_budget == 0
+    with pytest.raises(SwitchBotRateLimitError):
+        sut.acquire()
+    assert sut.resets_at.timestamp() == SwitchBotRateLimiter.SECONDS_PER_DAY * 101
+
+    clock.sleep(SwitchBotRateLimiter.SECONDS_PER_DAY)
+    assert sut.remaining_daily_budget == 5
+    sut.acquire()
+    assert sut.used_today == 1
+
+
+def test_api_client_uses_limiter(monkeypatch):
+    class MockResponse:
+        status_code = 200
+
+        @staticmethod
+        def json():
+            return {"statusCode": 100, "message": "success", "body": {}}
+
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
+    monkeypatch.setattr(requests.Session, "get", lambda self, *args, **kwargs: MockResponse())
+    monkeypatch.setattr(requests.Session, "post", lambda self, *args, **kwargs: MockResponse())
+    clock = FakeClock()
+    limiter = create_limiter(clock, rate=1.0, burst=2, blocking=False)
+    client = SwitchBotAPIClient("token", "key", rate_limiter=limiter)
+    client.devices()
+    client.devices_commands("ABCDE", "turnOn")
+    with pytest.raises(SwitchBotRateLimitError):
+        client.scenes()
+    assert limiter.used_today == 2
@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from switchbot_client import SwitchBotAPIError, SwitchBotRetryPolicy
+from switchbot_client.api import SwitchBotAPIClient
+
+
+class MockResponse:
+    def __init__(self, status_code: int, body: dict = None):
+        self.status_code = status_code
+        self.body = body
+        self.text = json.dumps(body) if body is not None else "<html>Bad Gateway</html>"
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("not json")
+        return self.body
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+
+def success(status_code: int = 100) -> MockResponse:
+    return MockResponse(200, {"statusCode": status_code, "message": "success", "body": {}})
+
+
+def mock_session(monkeypatch, method: str, responses: list) -> list:
+    calls = []
+
+    def mock_request(self, *args, **kwargs):
+        calls.append(args[0])
+        response = responses[len(calls) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(requests.Session, method, mock_request)
+    return calls
+
+
+def create_client(**kwargs) -> SwitchBotAPIClient:
+    return SwitchBotAPIClient(
+        "token", "key", retry_policy=SwitchBotRetryPolicy(backoff=0, **kwargs)
+    )
+
+
+def test_retry_delay():
+    sut = SwitchBotRetryPolicy(max_attempts=5, backoff=1.0, max_backoff=3.0, jitter=False)
+    assert [sut.retry_delay(attempt, True) for attempt in range(1, 6)] == [1.0, 2.0, 3.0, 3.0, None]
+    assert sut.retry_delay(1, False) is None
+
+    jittered = SwitchBotRetryPolicy(backoff=1.0)
+    assert all(0 <= jittered.retry_delay(2, True) <= 2.0 for _ in range(100))
+
+
+def test_read_is_retried_on_http_error(monkeypatch):
+    calls = mock_session(monkeypatch, "get", [MockResponse(503), MockResponse(502), success()])
+    sut = create_client()
+    assert sut.devices().status_code == 100
+    assert len(calls) == 3
+
+
+def test_read_is_retried_on_connection_error(monkeypatch):
+    calls = mock_session(monkeypatch, "get", [requests.ConnectionError("reset"), success()])
+    sut = create_client()
+    assert sut.scenes().status_code == 100
+    assert len(calls) == 2
+
+
+def test_read_is_retried_on_device_offline(monkeypatch):
+    calls = mock_session(monkeypatch, "get", [success(161), success(171), success(100)])
+    sut = create_client()
+    assert sut.devices_status("ABCDE").status_code == 100
+    assert len(calls) == 3
+
+
+def test_retries_are_exhausted(monkeypatch):
+    mock_session(monkeypatch, "get", [MockResponse(503)] * 2)
+    sut = create_client(max_attempts=2)
+    with pytest.raises(SwitchBotAPIError) as e:
+        sut.devices()
+    assert e.value.status_code == 503
+    assert isinstance(e.value, RuntimeError)
+
+    mock_session(monkeypatch, "get", [success(161)] * 2)
+    assert sut.devices_status("ABCDE").status_code == 161
+
+
+def test_command_is_not_retried_by_default(monkeypatch):
+    calls = mock_session(monkeypatch, "post", [success(161), success()])
+    sut = create_client()
+    assert sut.devices_commands("ABCDE", "turnOn").status_code == 161
+    assert len(calls) == 1
+
+    calls = mock_session(monkeypatch, "post", [requests.ConnectionError("reset")])
+    with pytest.raises(requests.ConnectionError):
+        sut.devices_commands("ABCDE", "turnOn")
+
+
+def test_command_is_retried_when_enabled(monkeypatch):
+    calls = mock_session(monkeypatch, "post", [MockResponse(500), success()])
+    sut = create_client(retry_commands=True)
+    assert sut.devices_commands("ABCDE", "turnOn").status_code == 100
+    assert len(calls) == 2
+
+
+def test_webhook_query_is_retried(monkeypatch):
+    calls = mock_session(monkeypatch, "post", [MockResponse(504), success()])
+    sut = create_client()
+    assert sut.webhook_query_url().status_code == 100
+    assert len(calls) == 2
+
+
+def test_async_read_is_retried():
+    pytest.importorskip("aiohttp")
+    from switchbot_client.aio import AsyncSwitchBotAPIClient
+
+    class AsyncMockResponse:
+        headers: dict = {}
+
+        def __init__(self, status, body):
+            self.status = status
+            self.body = body
+
+        async def read(self):
+            return self.body
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+    class MockSession:
+        closed = False
+
+        def __init__(self):
+            self.responses = [
+                AsyncMockResponse(503, b"<html>Service Unavailable</html>"),
+                AsyncMockResponse(200, json.dumps(success(161).body).encode("utf-8")),
+                AsyncMockResponse(200, json.dumps(success().body).encode("utf-8")),
+            ]
+
+        def get(self, *args, **kwargs):
+            return self.responses.pop(0)
+
+    session = MockSession()
+    sut = AsyncSwitchBotAPIClient(
+        "token", "key", session=session, retry_policy=SwitchBotRetryPolicy(backoff=0)
+    )
+    assert asyncio.run(sut.devices()).status_code == 100
+    assert not session.responses
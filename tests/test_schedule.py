@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from switchbot_client import SwitchBotClient, SwitchBotScheduleEngine
+from switchbot_client.devices import Bot
+from switchbot_client.scenes import SwitchBotScene
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.005)
+
+
+def test_runs_due_together_are_batched(sent, create_device):
+    client = SwitchBotClient("token", "key")
+    with SwitchBotScheduleEngine(client, resolution=0.01) as sut:
+        when = time.time() + 0.05
+        schedules = [
+            sut.at(when, create_device(client, Bot, "BOT1", "Bot", "HUB1"), "press"),
+            sut.at(when, create_device(client, Bot, "BOT2", "Bot", "HUB2"), "turnOn"),
+            sut.at(when, SwitchBotScene(client, "SCENE", "scene")),
+        ]
+        wait_for(lambda: all(schedule.runs == 1 for schedule in schedules))
+        stats = sut.stats()
+    assert sorted(sent) == [
+        ("BOT1", "press", None),
+        ("BOT2", "turnOn", None),
+        ("SCENE", "execute", None),
+    ]
+    assert (stats.scheduled, stats.fired, stats.batches, stats.failed) == (0, 3, 1, 0)
+    assert 0 <= stats.max_lateness < 1
+    assert all(schedule.due_at == when and schedule.next_run is None for schedule in schedules)
+    assert schedules[0].last_result.status_code == 100
+
+
+def test_repeating_schedule_keeps_its_phase(sent, create_device):
+    client = SwitchBotClient("token", "key")
+    with SwitchBotScheduleEngine(client, resolution=0.01) as sut:
+        start = time.time()
+        schedule = sut.after(0, create_device(client, Bot, "BOT", "Bot"), "press", every=0.05)
+        wait_for(lambda: schedule.runs >= 3)
+        schedule.cancel()
+        runs = schedule.runs
+        periods = (schedule.next_run - start) / 0.05
+        assert periods == pytest.approx(round(periods), abs=0.2)
+        time.sleep(0.1)
+        assert schedule.runs <= runs + 1
+
+
+def test_many_schedules(sent, create_device):
+    client = SwitchBotClient("token", "key")
+    bot = create_device(client, Bot, "BOT", "Bot")
+    with SwitchBotScheduleEngine(client) as sut:
+        now = time.time()
+        schedules = [sut.at(now + 3600 + i, bot, "press") for i in range(10000)]
+        assert sut.stats().scheduled == 10000
+        schedules[0].cancel()
+        schedules[0].cancel()
+        assert sut.stats().scheduled == 9999
+        with pytest.raises(ValueError):
+            sut.at(now, SwitchBotScene(client, "SCENE", "scene"), "press")
+    assert sent == []
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from switchbot_client import (
+    SwitchBotPriority,
+    SwitchBotRateLimiter,
+    SwitchBotRateLimitError,
+    SwitchBotRequestScheduler,
+    request_priority,
+)
+from switchbot_client.api import SwitchBotAPIClient
+
+
+class MockResponse:
+    status_code = 200
+
+    def json(self):
+        return {"statusCode": 100, "message": "success", "body": {}}
+
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode("utf-8")
+
+
+@pytest.fixture
+def session(monkeypatch):
+    calls = []
+
+    def mock_request(self, url, **kwargs):
+        calls.append(url)
+        return MockResponse()
+
+    monkeypatch.setattr(requests.Session, "get", mock_request)
+    monkeypatch.setattr(requests.Session, "post", mock_request)
+    return calls
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_interactive_requests_jump_ahead():
+    sut = SwitchBotRequestScheduler(max_concurrency=1)
+    order = []
+
+    def request(name, priority):
+        with sut.slot(priority):
+            order.append(name)
+
+    sut.acquire(SwitchBotPriority.BACKGROUND)
+    threads = []
+    for name, priority in [
+        ("read1", SwitchBotPriority.BACKGROUND),
+        ("read2", SwitchBotPriority.BACKGROUND),
+        ("command", SwitchBotPriority.INTERACTIVE),
+    ]:
+        thread = threading.Thread(target=request, args=[name, priority])
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda n=len(threads): sum(s.waiting for s in sut.stats().values()) == n)
+    sut.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == ["command", "read1", "read2"]
+    stats = sut.stats()
+    assert stats[SwitchBotPriority.INTERACTIVE].started == 1
+    assert stats[SwitchBotPriority.BACKGROUND].started == 3
+    assert stats[SwitchBotPriority.INTERACTIVE].p99_wait > 0
+    assert (
+        stats[SwitchBotPriority.BACKGROUND].max_wait
+        >= stats[SwitchBotPriority.INTERACTIVE].max_wait
+    )
+    assert sut.active == 0
+
+
+def test_client_priorities(session):
+    scheduler = SwitchBotRequestScheduler()
+    sut = SwitchBotAPIClient("token", "key", scheduler=scheduler)
+    sut.devices()
+    sut.devices_commands("device_foo", "turnOn")
+    with request_priority(SwitchBotPriority.INTERACTIVE):
+        sut.devices_status("device_foo")
+    stats = scheduler.stats()
+    assert stats[SwitchBotPriority.BACKGROUND].started == 1
+    assert stats[SwitchBotPriority.INTERACTIVE].started == 2
+    assert len(session) == 3
+
+
+def test_interactive_requests_take_the_next_rate_token(session):
+    limiter = SwitchBotRateLimiter(rate=10.0, burst=1)
+    scheduler = SwitchBotRequestScheduler(max_concurrency=4)
+    sut = SwitchBotAPIClient("token", "key", rate_limiter=limiter, scheduler=scheduler)
+    assert limiter.try_acquire() == 0
+    threads = [threading.Thread(target=sut.devices_status, args=[f"device_{i}"]) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: len(scheduler._token_waiting) == 3)
+    command = threading.Thread(target=sut.devices_commands, args=["device_foo", "turnOn"])
+    command.start()
+    for thread in threads + [command]:
+        thread.join()
+
+    assert len(session) == 4
+    assert session[0].endswith("devices/device_foo/commands")
+    assert scheduler.stats()[SwitchBotPriority.BACKGROUND].started == 3
+
+
+def test_background_requests_are_shed_when_budget_runs_low(session):
+    limiter = SwitchBotRateLimiter(rate=100.0, burst=100, daily_budget=3)
+    scheduler = SwitchBotRequestScheduler(background_reserve=1)
+    sut = SwitchBotAPIClient("token", "key", rate_limiter=limiter, scheduler=scheduler)
+    sut.devices()
+    sut.scenes()
+    with pytest.raises(SwitchBotRateLimitError):
+        sut.devices()
+    assert sut.devices_commands("device_foo", "turnOn").status_code == 100
+    assert limiter.remaining_daily_budget == 0
+    assert scheduler.stats()[SwitchBotPriority.BACKGROUND].shed == 1
+    assert len(session) == 3
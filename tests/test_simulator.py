@@ -0,0 +1,150 @@
+import pytest
+
+from switchbot_client import (
+    DeviceType,
+    RemoteType,
+    SwitchBotAPIClient,
+    SwitchBotAPIError,
+    SwitchBotClient,
+    SwitchBotRetryPolicy,
+)
+from switchbot_client.devices import (
+    DEVICE_REGISTRY,
+    AirConditioner,
+    ColorBulb,
+    Curtain,
+    Meter,
+    RobotVacuumCleanerS1Plus,
+)
+from switchbot_client.simulator import SwitchBotSimulator
+
+
+@pytest.fixture(autouse=True)
+def no_requests():
+    """Allow requests for these tests, they are sent to a local SwitchBotSimulator."""
+
+
+@pytest.fixture
+def simulator():
+    with SwitchBotSimulator(token="token", secret_key="secret", seed=1) as sim:
+        sim.add_device(DeviceType.HUB_MINI, device_id="HUB")
+        sim.add_device(DeviceType.COLOR_BULB, device_id="BULB", hub_device_id="HUB")
+        sim.add_device(DeviceType.CURTAIN, device_id="CURTAIN", hub_device_id="HUB")
+        sim.add_device(DeviceType.METER, device_id="METER", hub_device_id="HUB")
+        sim.add_device(remote_type=RemoteType.AIR_CONDITIONER, device_id="AC", hub_device_id="HUB")
+        sim.add_scene("good night", scene_id="SCENE")
+        yield sim
+
+
+def create_client(simulator: SwitchBotSimulator, secret_key: str = "secret", **kwargs):
+    api_client = SwitchBotAPIClient("token", secret_key, api_host_domain=simulator.url, **kwargs)
+    return SwitchBotClient(api_client=api_client, status_ttl=0)
+
+
+def test_devices_follow_commands(simulator):
+    client = create_client(simulator)
+    devices = {device.device_id: device for device in client.devices()}
+    assert len(devices) == 5
+    bulb = devices["BULB"]
+    assert isinstance(bulb, ColorBulb)
+    assert bulb.power() == "off"
+    assert bulb.turn_on().status_code == 100
+    assert bulb.set_brightness(30).status_code == 100
+    assert bulb.set_color("#0A0B0C").status_code == 100
+    status = bulb.status()
+    assert (status.power, status.brightness, status.color_hex) == ("on", 30, "#0a0b0c")
+    assert bulb.set_brightness(300).status_code == 190
+
+    curtain = devices["CURTAIN"]
+    assert isinstance(curtain, Curtain)
+    curtain.set_position(0, "ff", 40)
+    assert curtain.status().slide_position == 40
+    assert isinstance(devices["METER"], Meter)
+    assert devices["METER"].temperature() == 25.0
+
+    ac = devices["AC"]
+    assert isinstance(ac, AirConditioner)
+    assert ac.set_all(26, 2, 3, "on").status_code == 100
+    assert simulator.devices["AC"].status == {
+        "temperature": 26,
+        "mode": 2,
+        "fanSpeed": 3,
+        "power": "on",
+    }
+    assert client.scene("SCENE").execute().status_code == 100
+    assert ("BULB", "setBrightness", "30") in simulator.command_log
+
+
+def test_air_conditioner_set_mode_and_float_temperature(simulator):
+    ac = create_client(simulator).device("AC")
+    assert ac.set_mode(AirConditioner.Parameters.MODE_COOL).status_code == 100
+    assert simulator.command_log[-1] == ("AC", "setAll", "25.0,2,1,on")
+    assert ac.set_all(24.5, 2, 1, "on").status_code == 100
+    assert ac.set_all(None, 5, None, None).status_code == 100
+    assert simulator.devices["AC"].status == {
+        "temperature": 24.5,
+        "mode": 5,
+        "fanSpeed": 1,
+        "power": "on",
+    }
+    assert ac.command("setAll", parameter="hot,2,1,on").status_code == 190
+
+
+def test_signature_is_verified(simulator):
+    with pytest.raises(RuntimeError, match="Http 401"):
+        create_client(simulator, secret_key="wrong").devices()
+
+
+def test_offline_and_quota(simulator):
+    client = create_client(simulator, retry_policy=SwitchBotRetryPolicy(max_attempts=1))
+    bulb = client.device("BULB")
+    simulator.set_offline("BULB")
+    assert bulb.turn_on().status_code == 161
+    simulator.set_offline("BULB", False)
+    simulator.set_offline("HUB")
+    assert bulb.turn_on().status_code == 171
+
+    simulator.daily_quota = simulator.request_count
+    with pytest.raises(SwitchBotAPIError) as e:
+        client.api_client.devices()
+    assert e.value.status_code == 429
+
+
+def test_error_injection_is_retried(simulator):
+    simulator.error_rate = 0.5
+    client = create_client(simulator, retry_policy=SwitchBotRetryPolicy(max_attempts=20, backoff=0))
+    for _ in range(10):
+        assert client.api_client.devices().status_code == 100
+
+
+def test_webhooks(simulator):
+    client = create_client(simulator)
+    client.create_webhook("https://example.com/hook")
+    client.set_webhook("https://example.com/hook", False)
+    webhooks = client.webhooks()
+    assert [(w.url, w.enable) for w in webhooks] == [("https://example.com/hook", False)]
+    client.delete_webhook("https://example.com/hook")
+    assert client.webhooks() == []
+
+
+def test_populate_covers_every_type():
+    with SwitchBotSimulator() as sim:
+        sim.populate(100)
+        body = create_client(sim).api_client.devices().body
+        devices = body["deviceList"] + body["infraredRemoteList"]
+        assert len(devices) == 100 + 7
+        device_types = {device["deviceType"] for device in body["deviceList"]}
+        assert {DeviceType.HUB_MINI, DeviceType.BOT, DeviceType.LOCK} <= device_types
+        remote_types = {device["remoteType"] for device in body["infraredRemoteList"]}
+        assert RemoteType.AIR_CONDITIONER in remote_types
+
+
+def test_client_devices_of_populated_fleet():
+    with SwitchBotSimulator() as sim:
+        sim.populate(200)
+        devices = create_client(sim).devices()
+        created_types = {device.device_type for device in devices}
+        supported = set(DEVICE_REGISTRY.physical_classes()) | set(DEVICE_REGISTRY.remote_classes())
+        # populate() only adds Hub Minis as hubs
+        assert created_types == supported - {DeviceType.HUB, DeviceType.HUB_PLUS}
+        assert any(isinstance(device, RobotVacuumCleanerS1Plus) for device in devices)
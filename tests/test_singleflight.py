@@ -0,0 +1,204 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from switchbot_client.api import SwitchBotAPIClient
+from switchbot_client.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_execution():
+    sut = SingleFlight()
+    results = []
+
+    def slow():
+        wait_for(lambda: sut.shared == 4)
+        return object()
+
+    threads = [
+        threading.Thread(target=lambda: results.append(sut.do("key", slow))) for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sut.executed == 1
+    assert sut.shared == 4
+    assert len(results) == 5
+    assert all(r is results[0] for r in results)
+
+    sut.do("key", object)
+    assert sut.executed == 2
+
+
+def test_error_is_shared():
+    sut = SingleFlight()
+    errors = []
+
+    def failing():
+        wait_for(lambda: sut.shared == 1)
+        raise RuntimeError("failed")
+
+    def call():
+        try:
+            sut.do("key", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(errors) == 2
+
+
+def test_api_client_coalesces_reads(monkeypatch):
+    class MockResponse:
+        status_code = 200
+
+        @staticmethod
+        def json():
+            return {"statusCode": 100, "message": "success", "body": {"power": "on"}}
+
+        @property
+        def content(self):
+            return json.dumps(self.json()).encode("utf-8")
+
+    urls = []
+    sut = SwitchBotAPIClient("token", "key")
+
+    def mock_get(self, url, **kwargs):
+        urls.append(url)
+        if url.endswith("ABCDE/status"):
+            wait_for(lambda: sut.single_flight.shared == 2)
+        return MockResponse()
+
+    monkeypatch.setattr(requests.Session, "get", mock_get)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(sut.devices_status("ABCDE")))
+        for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sut.devices_status("FGHIJ")
+
+    assert len(urls) == 2
+    assert len(results) == 3
+    assert sut.single_flight.executed == 2
+    assert sut.single_flight.shared == 2
+
+
+def test_async_single_flight():
+    sut = AsyncSingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("failed")
+
+    async def run():
+        results = await asyncio.gather(*[sut.do("a", fetch) for _ in range(5)], sut.do("b", fetch))
+        errors = await asyncio.gather(
+            *[sut.do("c", failing) for _ in range(3)], return_exceptions=True
+        )
+        return results, errors
+
+    results, errors = asyncio.run(run())
+    assert len(executions) == 2
+    assert all(r is results[0] for r in results[:5])
+    assert results[5] is not results[0]
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert sut.executed == 3
+    assert sut.shared == 6
+
+
+def test_async_api_client_coalesces_reads():
+    pytest.importorskip("aiohttp")
+    from switchbot_client.aio import AsyncSwitchBotAPIClient
+
+    class MockResponse:
+        status = 200
+        headers: dict = {}
+
+        async def read(self):
+            await asyncio.sleep(0.01)
+            return b'{"statusCode": 100, "message": "success", "body": []}'
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+    class MockSession:
+        closed = False
+        requests = 0
+
+        def get(self, *args, **kwargs):
+            self.requests += 1
+            return MockResponse()
+
+    session = MockSession()
+    sut = AsyncSwitchBotAPIClient("token", "key", session=session)
+
+    async def run():
+        return await asyncio.gather(*[sut.devices() for _ in range(4)])
+
+    results = asyncio.run(run())
+    assert session.requests == 1
+    assert len(results) == 4
+    assert sut.single_flight.shared == 3
+
+
+def test_async_cancelled_leader_does_not_cancel_followers():
+    sut = AsyncSingleFlight()
+    executions = []
+    finished = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "result"
+
+    async def run():
+        leader = asyncio.ensure_future(sut.do("a", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(sut.do("a", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        result = await follower
+
+        # a call nobody waits for anymore is cancelled
+        abandoned = asyncio.ensure_future(sut.do("b", fetch))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        await asyncio.sleep(0.1)
+        return result
+
+    assert asyncio.run(run()) == "result"
+    assert (len(executions), len(finished)) == (2, 1)
+    assert sut._calls == {}
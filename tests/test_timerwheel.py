@@ -0,0 +1,26 @@
+import pytest
+
+from switchbot_client.timerwheel import TimerWheel
+
+
+def test_items_expire_at_their_tick():
+    sut = TimerWheel(slots=(4, 4, 2))
+    ticks = {f"item{tick}": tick for tick in [1, 3, 4, 5, 16, 17, 31, 32, 33, 100, 250]}
+    for name, tick in ticks.items():
+        sut.add(tick, name)
+    assert len(sut) == len(ticks)
+    expired = {}
+    for tick in range(1, 300):
+        for name in sut.advance(tick):
+            expired[name] = tick
+    assert expired == ticks
+    assert len(sut) == 0
+
+
+def test_past_items_expire_with_next_advance():
+    sut = TimerWheel(start=10)
+    sut.add(5, "late")
+    sut.add(10, "now")
+    assert sut.advance(10) == ["late", "now"]
+    with pytest.raises(ValueError):
+        TimerWheel(slots=(1,))
@@ -0,0 +1,70 @@
+import json
+import socket
+
+import pytest
+import urllib3
+
+from switchbot_client import (
+    DeviceType,
+    SwitchBotAPIClient,
+    SwitchBotFakeTransport,
+    SwitchBotRequestsTransport,
+    SwitchBotRetryPolicy,
+    SwitchBotUrllib3Transport,
+)
+from switchbot_client.simulator import SwitchBotSimulator
+
+
+def test_fake_transport():
+    requests = []
+
+    def handler(method, url, body):
+        requests.append((method, url, json.loads(body) if body else None))
+        return 200, {"statusCode": 100, "message": "success", "body": {"power": "on"}}
+
+    transport = SwitchBotFakeTransport(handler)
+    client = SwitchBotAPIClient("token", "key", transport=transport)
+    assert client.devices_status("ABC").body == {"power": "on"}
+    assert client.devices_commands("ABC", "turnOn").status_code == 100
+    assert requests == [
+        ("GET", "https://api.switch-bot.com/v1.1/devices/ABC/status", None),
+        ("POST", "https://api.switch-bot.com/v1.1/devices/ABC/commands", {"command": "turnOn"}),
+    ]
+    assert transport.requests == 2
+    assert (
+        SwitchBotAPIClient("token", "key", transport=SwitchBotFakeTransport()).scenes().body == {}
+    )
+    with pytest.raises(RuntimeError):
+        client.session  # pylint: disable=pointless-statement
+
+
+def test_requests_transport_is_the_default():
+    client = SwitchBotAPIClient("token", "key", pool_size=4)
+    assert isinstance(client.transport, SwitchBotRequestsTransport)
+    assert client.session is client.transport.session
+
+
+def test_urllib3_transport():
+    with SwitchBotSimulator(token="token", secret_key="secret") as simulator:
+        simulator.add_device(DeviceType.PLUG, device_id="PLUG")
+        with SwitchBotAPIClient(
+            "token", "secret", api_host_domain=simulator.url, transport=SwitchBotUrllib3Transport()
+        ) as client:
+            client.prewarm()
+            assert client.devices_commands("PLUG", "turnOn").status_code == 100
+            assert client.devices_status("PLUG").body["power"] == "on"
+
+
+def test_urllib3_transport_retries_connection_errors():
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+    client = SwitchBotAPIClient(
+        "token",
+        "secret",
+        api_host_domain=f"http://127.0.0.1:{port}",
+        transport=SwitchBotUrllib3Transport(connect_timeout=1),
+        retry_policy=SwitchBotRetryPolicy(max_attempts=2, backoff=0),
+    )
+    with pytest.raises(urllib3.exceptions.NewConnectionError):
+        client.devices()